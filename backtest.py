@@ -0,0 +1,39 @@
+# backtest.py
+"""
+Backtesting walk-forward de Casandra (ver utils.backtest): por liga y
+temporada S, entrenar con las temporadas < S y evaluar en S.
+
+    python backtest.py                                   # result, SGD, 1999..2025, todas las ligas
+    python backtest.py --ligas laliga premier --jobs 8
+    python backtest.py --target goals --desde 2010 --params '{"alpha": 1e-3}'
+"""
+
+import argparse
+import json
+
+from utils import feature_store
+from utils.backtest import FIRST_SEASON, LAST_SEASON, backtest
+from utils.train_model import CACHE_DIR, TARGETS
+
+def main():
+    ap = argparse.ArgumentParser(description="Backtesting walk-forward de Casandra")
+    ap.add_argument("--features", default=feature_store.FEATURES_DIR)
+    ap.add_argument("--ligas", nargs="*", help="limitar a estas ligas")
+    ap.add_argument("--target", choices=TARGETS, default="result")
+    ap.add_argument("--desde", type=int, default=FIRST_SEASON, help="primera temporada de test")
+    ap.add_argument("--hasta", type=int, default=LAST_SEASON, help="última temporada de test")
+    ap.add_argument("--path", choices=["sgd", "kernel"], default="sgd")
+    ap.add_argument("--params", type=json.loads, default=None, help="hiperparámetros (JSON)")
+    ap.add_argument("--subsample", type=int, default=20000, help="filas de entrenamiento para el camino kernel")
+    ap.add_argument("--epochs", type=int, default=5, help="pasadas de partial_fit (camino sgd)")
+    ap.add_argument("--jobs", type=int, default=-1, help="procesos para los folds")
+    ap.add_argument("--cache", default=CACHE_DIR, help="caché del preprocesado codificado")
+    ap.add_argument("--out", help="JSON de resultados (por defecto data/backtests/<target>-<path>.json)")
+    ap.add_argument("--debug", action="store_true")
+    args = ap.parse_args()
+
+    backtest(args.target, args.features, args.ligas, args.desde, args.hasta, args.path, args.params,
+             args.epochs, args.subsample, args.jobs, args.cache, args.out, debug=args.debug)
+
+if __name__ == "__main__":
+    main()
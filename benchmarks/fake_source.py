@@ -0,0 +1,359 @@
+# benchmarks/fake_source.py
+"""
+Servidor HTTP local que hace de ClubElo / TheSportsDB / FBref para pruebas de
+carga y escalado (los scrapers reales, sockets reales, sin tocar las fuentes).
+
+Respuestas, por orden de prioridad:
+  1) fixtures exactos del índice (grabados con run_benchmarks --record o sintéticos),
+  2) rutas sintéticas generadas a partir de las temporadas de make_fixtures:
+     searchteams / eventsday / eventsseason / eventslast / searchevents de TSDB
+     para cualquier equipo o fecha, y búsqueda de FBref sin resultados,
+  3) patrones del índice (CSV diario de ClubElo, TSDB vacío),
+  4) 404.
+
+Fallos inyectables (Faults), iguales para todos los hosts o solo para 'hosts':
+latencia base + jitter, ráfagas periódicas de 429 con Retry-After, una
+fracción de 5xx y cuerpos lentos (enviados a slow_bps bytes/s). Las respuestas
+200 llevan ETag y un If-None-Match coincidente recibe 304 (validators=False
+simula una fuente sin validadores).
+
+Los scrapers llevan las URLs de las fuentes fijas en el código: ForwardAdapter
+reescribe cada request a http://127.0.0.1:<puerto>/<scheme>/<host>/<path>?<query>
+y el servidor reconstruye la URL original. El rate limiter, las métricas y el
+router siguen viendo el host real.
+
+    with FakeSourceServer(Faults(latency_ms=80, burst_every=30, burst_len=3)) as srv:
+        install(ForwardAdapter(srv.port))
+        ...
+        print(srv.stats())
+
+Servidor suelto (para curl u otros clientes):
+
+    python -m benchmarks.fake_source --port 8765 --latency 50 --error-rate 0.05
+"""
+
+from __future__ import annotations
+
+import argparse
+import hashlib
+import json
+import os
+import random
+import sys
+import threading
+import time
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, NamedTuple, Optional, Tuple
+from urllib.parse import parse_qs, urlsplit
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if REPO_ROOT not in sys.path:
+    sys.path.insert(0, REPO_ROOT)
+
+from requests.adapters import HTTPAdapter
+
+from benchmarks import make_fixtures as fx
+from benchmarks.replay import FIXTURES_DIR, ReplayAdapter
+
+JSON = "application/json"
+HTML = "text/html; charset=utf-8"
+
+class Faults(NamedTuple):
+    latency_ms: float = 0.0       # latencia base de cada respuesta
+    jitter_ms: float = 0.0        # + U(0, jitter)
+    burst_every: float = 0.0      # cada N s una ráfaga de 429 (0 = nunca)
+    burst_len: float = 0.0        # duración de la ráfaga (s)
+    retry_after: float = 2.0      # Retry-After que se envía en la ráfaga
+    error_rate: float = 0.0       # fracción de respuestas 5xx
+    slow_rate: float = 0.0        # fracción de cuerpos lentos
+    slow_bps: int = 50_000        # bytes/s de un cuerpo lento
+    hosts: Tuple[str, ...] = ()   # hosts afectados (vacío = todos)
+    seed: int = 0
+    validators: bool = True       # ETag + 304 ante If-None-Match
+
+def _percentiles(values: List[float]) -> Dict[str, Optional[float]]:
+    if not values:
+        return {"p50": None, "p95": None, "p99": None, "max": None}
+    v = sorted(values)
+    at = lambda q: v[min(len(v) - 1, int(q * len(v)))]
+    return {"p50": round(at(0.50), 4), "p95": round(at(0.95), 4), "p99": round(at(0.99), 4), "max": round(v[-1], 4)}
+
+# ---------- Respuestas sintéticas ----------
+class FakeSource:
+    """Resuelve URLs originales de las fuentes a (status, cuerpo, content-type)."""
+
+    def __init__(self, fixtures_dir: str = FIXTURES_DIR) -> None:
+        self.replay = ReplayAdapter(fixtures_dir)
+        self.matches = [m for ms in fx.synthetic_seasons().values() for m in ms]
+        self.by_id = {tid: name for name, tid in fx.TEAM_IDS.items()}
+
+    def _team(self, q: str) -> Optional[str]:
+        from utils.get_matches import _slugify_team
+        q = (q or "").strip().lower()
+        for name in fx.LALIGA:
+            if name.lower() == q or _slugify_team(name) == _slugify_team(q):
+                return name
+        for name in fx.LALIGA:
+            if q and name.lower().startswith(q):
+                return name
+        return None
+
+    def _events(self, pred) -> List[dict]:
+        return [fx._tsdb_event(m) for m in self.matches if pred(m)]
+
+    def _tsdb(self, endpoint: str, qs: Dict[str, str]) -> Optional[dict]:
+        if endpoint == "searchteams.php":
+            name = self._team(qs.get("t", ""))
+            if name is None:
+                return {"teams": None}
+            return {"teams": [{"idTeam": fx.TEAM_IDS[name], "strTeam": name, "strSport": "Soccer",
+                               "strLeague": "Spanish La Liga", "strCountry": "Spain"}]}
+        if endpoint == "eventsday.php":
+            d = qs.get("d", "")
+            return {"events": self._events(lambda m: m["date"].strftime("%Y-%m-%d") == d) or None}
+        if endpoint in ("eventsseason.php", "eventslast.php"):
+            name = self.by_id.get(qs.get("id", ""))
+            if name is None:
+                return {"events": None}
+            mine = lambda m: name in (m["home"], m["away"])
+            if endpoint == "eventslast.php":
+                played = [m for m in self.matches if mine(m) and m["hg"] is not None]
+                return {"results": [fx._tsdb_event(m) for m in played[-5:]]}
+            year = qs.get("s", "")[:4]
+            return {"events": self._events(lambda m: mine(m) and str(m["date"].year if m["date"].month >= 7
+                                                                   else m["date"].year - 1) == year) or None}
+        if endpoint == "searchevents.php":
+            parts = qs.get("e", "").replace("_", " ").split(" vs ")
+            if len(parts) != 2:
+                return {"event": None}
+            h, a = self._team(parts[0]), self._team(parts[1])
+            return {"event": self._events(lambda m: (m["home"], m["away"]) == (h, a)) or None}
+        return None
+
+    def resolve(self, url: str) -> Optional[Tuple[int, bytes, str]]:
+        u = urlsplit(url)
+        if url in self.replay.exact:
+            return self.replay.resolve(url)
+        qs = {k: v[0] for k, v in parse_qs(u.query).items()}
+        if u.netloc == "www.thesportsdb.com":
+            data = self._tsdb(u.path.rsplit("/", 1)[-1], qs)
+            if data is not None:
+                return 200, json.dumps(data).encode(), JSON
+        if u.netloc == "fbref.com" and u.path.startswith("/en/search/"):
+            page = fx._fbref_page(f"Search results: {qs.get('search', '')}", "<p>Found 0 hits</p>")
+            return 200, page.encode(), HTML
+        return self.replay.resolve(url)
+
+# ---------- Servidor ----------
+class _Handler(BaseHTTPRequestHandler):
+    server: "_Server"
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, *args) -> None:
+        pass
+
+    def do_GET(self) -> None:
+        t0 = time.perf_counter()
+        owner = self.server.owner
+        parts = self.path.lstrip("/").split("/", 2)
+        if len(parts) < 2:
+            self._send(404, b"", "text/plain")
+            return
+        scheme, host = parts[0], parts[1]
+        url = f"{scheme}://{host}/{parts[2] if len(parts) > 2 else ''}"
+        status, body, ctype, headers, slow = owner.respond(host, url)
+        if status == 200 and owner.faults.validators:
+            etag = '"%s"' % hashlib.sha1(body).hexdigest()[:16]
+            if self.headers.get("If-None-Match") == etag:
+                status, body, slow = 304, b"", False
+            headers = dict(headers or {}, ETag=etag)
+        self._send(status, body, ctype, headers, slow_bps=owner.faults.slow_bps if slow else 0)
+        owner.observe(host, status, time.perf_counter() - t0, slow)
+
+    def _send(self, status: int, body: bytes, ctype: str, headers: Optional[Dict[str, str]] = None,
+              slow_bps: int = 0) -> None:
+        self.send_response(status)
+        self.send_header("Content-Type", ctype)
+        self.send_header("Content-Length", str(len(body)))
+        for k, v in (headers or {}).items():
+            self.send_header(k, v)
+        self.end_headers()
+        try:
+            if not slow_bps:
+                self.wfile.write(body)
+                return
+            chunk = max(1, slow_bps // 10)
+            for i in range(0, len(body), chunk):
+                self.wfile.write(body[i:i + chunk])
+                self.wfile.flush()
+                time.sleep(0.1)
+        except (BrokenPipeError, ConnectionResetError):
+            pass    # el cliente cortó (timeout / deadline)
+
+class _Server(ThreadingHTTPServer):
+    daemon_threads = True
+    request_queue_size = 128
+    owner: "FakeSourceServer"
+
+class FakeSourceServer:
+    """Servidor en un hilo de fondo; port=0 elige uno libre."""
+
+    def __init__(self, faults: Faults = Faults(), port: int = 0, host: str = "127.0.0.1",
+                 fixtures_dir: str = FIXTURES_DIR) -> None:
+        self.faults = faults
+        self.source = FakeSource(fixtures_dir)
+        self._rng = random.Random(faults.seed)
+        self._lock = threading.Lock()
+        self._httpd = _Server((host, port), _Handler)
+        self._httpd.owner = self
+        self.port = self._httpd.server_address[1]
+        self._thread: Optional[threading.Thread] = None
+        self.reset_stats()
+
+    # ---------- fallos ----------
+    def _affected(self, host: str) -> bool:
+        return not self.faults.hosts or host in self.faults.hosts
+
+    def _in_burst(self) -> bool:
+        f = self.faults
+        # la ráfaga cierra cada periodo: los primeros burst_every - burst_len s van limpios
+        return f.burst_every > 0 and (time.monotonic() - self._t0) % f.burst_every >= f.burst_every - f.burst_len
+
+    def respond(self, host: str, url: str):
+        """(status, cuerpo, content-type, cabeceras extra, lento) para una URL original."""
+        f = self.faults
+        hit = self.source.resolve(url)
+        if not self._affected(host):
+            return (*(hit or (404, b"", "text/plain")), None, False)
+        with self._lock:
+            delay = f.latency_ms + self._rng.uniform(0, f.jitter_ms)
+            error = self._rng.random() < f.error_rate
+            slow = self._rng.random() < f.slow_rate
+            code = self._rng.choice((500, 502, 503))
+        if delay:
+            time.sleep(delay / 1000.0)
+        if self._in_burst():
+            return 429, b"Too Many Requests", "text/plain", {"Retry-After": str(int(round(f.retry_after)))}, False
+        if error:
+            return code, b"Server Error", "text/plain", None, False
+        if hit is None:
+            return 404, b"", "text/plain", None, False
+        return (*hit, None, slow)
+
+    # ---------- estadísticas ----------
+    def reset_stats(self) -> None:
+        with self._lock:
+            self._t0 = time.monotonic()
+            self._hosts: Dict[str, Dict] = {}
+
+    def observe(self, host: str, status: int, seconds: float, slow: bool) -> None:
+        with self._lock:
+            h = self._hosts.setdefault(host, {"requests": 0, "status": {}, "slow": 0, "latency": []})
+            h["requests"] += 1
+            h["status"][str(status)] = h["status"].get(str(status), 0) + 1
+            h["slow"] += int(slow)
+            h["latency"].append(seconds)
+
+    def stats(self) -> Dict[str, dict]:
+        """Por host: requests, conteo por status, cuerpos lentos y latencia de servicio."""
+        with self._lock:
+            return {host: {"requests": h["requests"], "status": dict(sorted(h["status"].items())),
+                           "slow": h["slow"], "latency_s": _percentiles(h["latency"])}
+                    for host, h in sorted(self._hosts.items())}
+
+    # ---------- ciclo de vida ----------
+    def start(self) -> "FakeSourceServer":
+        self.reset_stats()
+        self._thread = threading.Thread(target=self._httpd.serve_forever, name="fake-source", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._httpd.shutdown()
+        self._httpd.server_close()
+        if self._thread:
+            self._thread.join()
+
+    def __enter__(self) -> "FakeSourceServer":
+        return self.start()
+
+    def __exit__(self, *exc) -> None:
+        self.stop()
+
+# ---------- Cliente ----------
+class ForwardAdapter(HTTPAdapter):
+    """Desvía todos los requests al servidor local y anota la latencia vista por el cliente."""
+
+    def __init__(self, port: int, host: str = "127.0.0.1") -> None:
+        super().__init__(pool_connections=4, pool_maxsize=32)
+        self.base = f"http://{host}:{port}"
+        self._lock = threading.Lock()
+        self.latencies: List[float] = []
+        self.errors = 0
+
+    def send(self, request, **kwargs):
+        original = request.url
+        u = urlsplit(original)
+        request.url = f"{self.base}/{u.scheme}/{u.netloc}{u.path}" + (f"?{u.query}" if u.query else "")
+        t0 = time.perf_counter()
+        try:
+            resp = super().send(request, **kwargs)
+            if not kwargs.get("stream"):
+                resp.content    # la latencia incluye el cuerpo (cuerpos lentos)
+        except Exception:
+            with self._lock:
+                self.errors += 1
+            raise
+        finally:
+            request.url = original
+        with self._lock:
+            self.latencies.append(time.perf_counter() - t0)
+        resp.url = original
+        return resp
+
+    def latency(self) -> Dict[str, Optional[float]]:
+        with self._lock:
+            return _percentiles(self.latencies)
+
+def faults_from_args(args: argparse.Namespace) -> Faults:
+    return Faults(latency_ms=args.latency, jitter_ms=args.jitter, burst_every=args.burst_every,
+                  burst_len=args.burst_len, retry_after=args.retry_after, error_rate=args.error_rate,
+                  slow_rate=args.slow_rate, slow_bps=args.slow_bps, hosts=tuple(args.hosts or ()),
+                  seed=args.seed, validators=not args.no_validators)
+
+def add_fault_args(ap: argparse.ArgumentParser) -> None:
+    g = ap.add_argument_group("fallos")
+    g.add_argument("--latency", type=float, default=0.0, metavar="MS", help="latencia base por respuesta")
+    g.add_argument("--jitter", type=float, default=0.0, metavar="MS", help="latencia extra U(0, MS)")
+    g.add_argument("--burst-every", type=float, default=0.0, metavar="SEG", help="ráfaga de 429 cada SEG")
+    g.add_argument("--burst-len", type=float, default=0.0, metavar="SEG", help="duración de la ráfaga")
+    g.add_argument("--retry-after", type=float, default=2.0, metavar="SEG", help="Retry-After de los 429")
+    g.add_argument("--error-rate", type=float, default=0.0, help="fracción de 5xx")
+    g.add_argument("--slow-rate", type=float, default=0.0, help="fracción de cuerpos lentos")
+    g.add_argument("--slow-bps", type=int, default=50_000, help="bytes/s de un cuerpo lento")
+    g.add_argument("--hosts", nargs="*", help="solo estos hosts (p.ej. fbref.com)")
+    g.add_argument("--seed", type=int, default=0)
+    g.add_argument("--no-validators", action="store_true", help="sin ETag / 304 (fuente sin validadores)")
+
+def main(argv: Optional[List[str]] = None) -> None:
+    ap = argparse.ArgumentParser(description="Fuente falsa (ClubElo / TSDB / FBref) para pruebas de carga")
+    ap.add_argument("--port", type=int, default=8765)
+    ap.add_argument("--bind", default="127.0.0.1")
+    add_fault_args(ap)
+    args = ap.parse_args(argv)
+    if not os.path.exists(os.path.join(FIXTURES_DIR, "index.json")):
+        fx.build()
+    srv = FakeSourceServer(faults_from_args(args), port=args.port, host=args.bind).start()
+    print(f"[fake-source] http://{args.bind}:{srv.port}/<scheme>/<host>/<path>  (Ctrl+C para parar)")
+    try:
+        while True:
+            time.sleep(10)
+            print(f"[fake-source] {datetime.now():%H:%M:%S} {json.dumps(srv.stats())}")
+    except KeyboardInterrupt:
+        pass
+    finally:
+        srv.stop()
+
+if __name__ == "__main__":
+    main()
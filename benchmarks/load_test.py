@@ -0,0 +1,150 @@
+# benchmarks/load_test.py
+"""
+Prueba de carga del minado contra la fuente falsa (benchmarks.fake_source).
+
+Para cada número de workers levanta un servidor con los fallos pedidos, encola
+las jornadas en una cola temporal (utils.work_queue) y lanza N procesos
+'mine --worker' (los scrapers reales, el rate limiter compartido en SQLite,
+sockets reales). Reporta por nivel:
+
+  - partidos minados y partidos/minuto (entre el arranque del primer worker y
+    el final del último; sin contar el arranque de los procesos),
+  - requests por host y por status (429, 5xx) vistos por el servidor,
+  - latencia de request vista por los clientes (p50 / p95 / p99 / max).
+
+    python -m benchmarks.load_test --workers 1 2 4 8 --jornadas 1 8 \\
+        --latency 80 --jitter 40 --burst-every 30 --burst-len 3 --error-rate 0.02 --slow-rate 0.05
+    python -m benchmarks.load_test --workers 1 4 --no-rate-limit      # techo sin limitador
+
+Cada nivel corre en un directorio temporal con copia de ./data (cachés, rate
+limiter y cola limpios); la caché HTTP está desactivada, así que todo request
+llega al servidor. Resultados en benchmarks/results/load-<commit>.json.
+"""
+
+from __future__ import annotations
+
+import argparse
+import contextlib
+import io
+import json
+import multiprocessing
+import os
+import shutil
+import sys
+import time
+from datetime import datetime
+from typing import List, Optional
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if REPO_ROOT not in sys.path:
+    sys.path.insert(0, REPO_ROOT)
+
+from benchmarks import make_fixtures as fx
+from benchmarks.fake_source import (Faults, FakeSourceServer, ForwardAdapter, _percentiles, add_fault_args,
+                                    faults_from_args)
+from benchmarks.replay import FIXTURES_DIR, install
+from benchmarks.run_benchmarks import RESULTS_DIR, _git_commit, _prepare_workdir
+
+LIGA = "laliga"
+
+def _worker(args: tuple) -> dict:
+    """Proceso worker: mismo bucle que 'mine.py --worker', con los requests desviados al servidor."""
+    wd, port, queue_path, node, rate_limited, deadline_s = args
+    os.chdir(wd)
+    adapter = ForwardAdapter(port)
+    install(adapter)
+    import mine
+    from utils import rate_limit, work_queue
+    if not rate_limited:
+        rate_limit.disable()
+    queue = work_queue.WorkQueue(queue_path)
+    t0 = time.time()
+    with contextlib.redirect_stdout(io.StringIO()):
+        n = mine.work(queue, node, quiet=True, prefetch=False,
+                      **({} if deadline_s is None else {"deadline_s": deadline_s}))
+    return {"node": node, "matches": n, "start": t0, "end": time.time(),
+            "latencies": adapter.latencies, "errors": adapter.errors}
+
+def run_level(workers: int, jornadas: List[int], faults: Faults, rate_limited: bool = True,
+              deadline_s: Optional[float] = None) -> dict:
+    from utils import work_queue
+    wd = _prepare_workdir()
+    try:
+        queue_path = os.path.join(wd, "data", "queue", "load.sqlite")
+        queue = work_queue.WorkQueue(queue_path)
+        queue.enqueue([LIGA], [fx.BENCH_SEASON], jornadas)
+        with FakeSourceServer(faults) as srv:
+            ctx = multiprocessing.get_context("spawn")
+            with ctx.Pool(workers) as pool:
+                outs = pool.map(_worker, [(wd, srv.port, queue_path, f"load-{i}", rate_limited, deadline_s)
+                                          for i in range(workers)])
+            server = srv.stats()
+        tasks = queue.stats()["tasks"]
+    finally:
+        shutil.rmtree(wd, ignore_errors=True)
+
+    elapsed = max(o["end"] for o in outs) - min(o["start"] for o in outs)
+    matches = sum(o["matches"] or 0 for o in outs)
+    status = {}
+    for h in server.values():
+        for code, n in h["status"].items():
+            status[code] = status.get(code, 0) + n
+    requests_total = sum(h["requests"] for h in server.values())
+    return {
+        "workers": workers,
+        "elapsed_s": round(elapsed, 2),
+        "matches": matches,
+        "matches_per_min": round(matches / max(elapsed, 1e-9) * 60, 2),
+        "tasks": tasks,
+        "requests": requests_total,
+        "requests_per_match": round(requests_total / matches, 2) if matches else None,
+        "status": dict(sorted(status.items())),
+        "by_host": server,
+        "client_latency_s": _percentiles([x for o in outs for x in o["latencies"]]),
+        "client_errors": sum(o["errors"] for o in outs),
+    }
+
+def _print_level(r: dict) -> None:
+    s, lat = r["status"], r["client_latency_s"]
+    n5xx = sum(n for code, n in s.items() if code.startswith("5"))
+    fmt = lambda v: "-" if v is None else f"{v * 1e3:.0f}"
+    print(f"{r['workers']:>7} {r['matches']:>8} {r['matches_per_min']:>9.1f} {r['requests']:>8} "
+          f"{r['requests_per_match'] or 0:>7.1f} {s.get('429', 0):>6} {n5xx:>6} "
+          f"{fmt(lat['p50']):>7} {fmt(lat['p95']):>7} {fmt(lat['p99']):>7} {fmt(lat['max']):>7}")
+
+def main(argv: Optional[List[str]] = None) -> None:
+    ap = argparse.ArgumentParser(description="Carga del minado contra la fuente falsa")
+    ap.add_argument("--workers", nargs="+", type=int, default=[1, 2, 4], help="niveles de concurrencia (procesos)")
+    ap.add_argument("--jornadas", nargs=2, type=int, default=[1, fx.BENCH_MATCHWEEK], metavar=("DESDE", "HASTA"),
+                    help=f"jornadas de {LIGA} {fx.BENCH_SEASON} a minar en cada nivel")
+    ap.add_argument("--no-rate-limit", action="store_true", help="sin rate limiter (techo de la máquina)")
+    ap.add_argument("--deadline", type=float, default=None, metavar="SEG", help="deadline por partido (por defecto el de mine.py)")
+    ap.add_argument("--out", help="fichero de resultados (por defecto benchmarks/results/load-<commit>.json)")
+    add_fault_args(ap)
+    args = ap.parse_args(argv)
+
+    if not os.path.exists(os.path.join(FIXTURES_DIR, "index.json")):
+        fx.build()
+    faults = faults_from_args(args)
+    jornadas = list(range(args.jornadas[0], args.jornadas[1] + 1))
+    print(f"[load] {LIGA} {fx.BENCH_SEASON} J{jornadas[0]}-J{jornadas[-1]}  fallos: {faults._asdict()}")
+    print(f"{'workers':>7} {'partidos':>8} {'part/min':>9} {'requests':>8} {'req/p':>7} {'429':>6} {'5xx':>6} "
+          f"{'p50 ms':>7} {'p95 ms':>7} {'p99 ms':>7} {'max ms':>7}")
+    levels = []
+    for w in args.workers:
+        r = run_level(w, jornadas, faults, rate_limited=not args.no_rate_limit, deadline_s=args.deadline)
+        levels.append(r)
+        _print_level(r)
+
+    commit = _git_commit()
+    out = args.out or os.path.join(RESULTS_DIR, f"load-{commit}.json")
+    os.makedirs(os.path.dirname(out), exist_ok=True)
+    with open(out, "w", encoding="utf-8") as f:
+        json.dump({"commit": commit, "timestamp": datetime.now().isoformat(timespec="seconds"),
+                   "league": LIGA, "season": fx.BENCH_SEASON, "jornadas": jornadas,
+                   "rate_limited": not args.no_rate_limit, "faults": faults._asdict(), "levels": levels},
+                  f, indent=2)
+    print(f"[load] resultados -> {out}")
+
+if __name__ == "__main__":
+    main()
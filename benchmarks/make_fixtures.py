@@ -0,0 +1,220 @@
+# benchmarks/make_fixtures.py
+"""
+Genera el set de fixtures sintético (determinista) para los benchmarks.
+
+Reproduce la FORMA de las respuestas reales que parsean los scrapers:
+  - ClubElo: CSV diario (Rank,Club,Country,Level,Elo,From,To) con ~630 clubes.
+  - TheSportsDB: searchteams / eventsday / eventsseason / eventslast (JSON).
+  - FBref: página de calendario de liga y 'Scores & Fixtures' de un equipo (HTML).
+
+Las respuestas grabadas con `run_benchmarks --record` se añaden como entradas
+exactas del índice y tienen prioridad sobre estas.
+
+    python -m benchmarks.make_fixtures
+"""
+
+from __future__ import annotations
+
+import csv
+import io
+import json
+import os
+import random
+import zlib
+from datetime import datetime, timedelta
+from typing import Dict, List, Tuple
+from urllib.parse import quote
+
+from benchmarks.replay import FIXTURES_DIR, load_index, save_index
+
+SEED = 20251005
+BENCH_DATE = "2025-10-05"        # fecha de corte de todos los casos
+BENCH_SEASON = 2025
+BENCH_MATCHWEEK = 8
+
+TSDB_BASE = "https://www.thesportsdb.com/api/v1/json/123"
+CLUBELO_PATTERN = r"^https?://api\.clubelo\.com/\d{4}-\d{2}-\d{2}$"
+FBREF_LEAGUE_URL = ("https://fbref.com/en/comps/12/2025-2026/schedule/"
+                    "2025-2026-La-Liga-Scores-and-Fixtures")
+FBREF_SQUAD_URL = ("https://fbref.com/en/squads/206d90db/2025-2026/matchlogs/all_comps/schedule/"
+                   "Barcelona-Scores-and-Fixtures-All-Competitions")
+
+LALIGA = [
+    "Alavés", "Athletic Club", "Atlético Madrid", "Barcelona", "Celta Vigo", "Elche",
+    "Espanyol", "Getafe", "Girona", "Levante", "Mallorca", "Osasuna", "Oviedo",
+    "Rayo Vallecano", "Real Betis", "Real Madrid", "Real Sociedad", "Sevilla",
+    "Valencia", "Villarreal",
+]
+# equipos que usan los casos de benchmark (resuelven id en TSDB)
+BENCH_TEAMS = ("Sevilla", "Barcelona")
+TEAM_IDS: Dict[str, str] = {name: str(133700 + i) for i, name in enumerate(LALIGA)}
+TEAM_IDS["Barcelona"] = "133739"  # coherente con data/tsdb_teams_cache.json
+
+def _round_robin(teams: List[str]) -> List[List[Tuple[str, str]]]:
+    """Calendario ida y vuelta por método del círculo."""
+    t = list(teams)
+    n = len(t)
+    rounds: List[List[Tuple[str, str]]] = []
+    for r in range(n - 1):
+        pairs = []
+        for i in range(n // 2):
+            h, a = t[i], t[n - 1 - i]
+            pairs.append((h, a) if r % 2 == 0 else (a, h))
+        rounds.append(pairs)
+        t = [t[0]] + [t[-1]] + t[1:-1]
+    return rounds + [[(a, h) for h, a in rd] for rd in rounds]
+
+def _season_matches(rng: random.Random, year: int, cutoff: datetime) -> List[dict]:
+    """[{round, date, home, away, hg, ag}] con marcador solo si date < cutoff."""
+    teams = list(LALIGA)
+    rng.shuffle(teams)
+    out = []
+    start = datetime(year, 8, 15)
+    for rnd, pairs in enumerate(_round_robin(teams), start=1):
+        base = start + timedelta(days=7 * (rnd - 1))
+        for j, (h, a) in enumerate(pairs):
+            d = base + timedelta(days=j % 4)
+            played = d < cutoff
+            out.append({
+                "round": rnd, "date": d, "home": h, "away": a,
+                "hg": rng.choice([0, 0, 1, 1, 1, 2, 2, 3, 4]) if played else None,
+                "ag": rng.choice([0, 0, 1, 1, 2, 2, 3]) if played else None,
+            })
+    return out
+
+def synthetic_seasons() -> Dict[int, List[dict]]:
+    """Las dos temporadas sintéticas de build() (mismo SEED, mismos marcadores)."""
+    rng = random.Random(SEED)
+    cutoff = datetime.strptime(BENCH_DATE, "%Y-%m-%d")
+    return {y: _season_matches(rng, y, cutoff) for y in (BENCH_SEASON - 1, BENCH_SEASON)}
+
+# ---------- ClubElo ----------
+def _clubelo_csv(rng: random.Random) -> str:
+    repo = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    with open(os.path.join(repo, "data", "team_aliases.json"), "r", encoding="utf-8") as f:
+        aliases = json.load(f)
+    names = list(dict.fromkeys(LALIGA + [n for v in aliases.values() for n in v]))
+    countries = ["ESP", "ENG", "ITA", "GER", "FRA", "POR", "NED", "BEL", "TUR", "SCO"]
+    i = 0
+    while len(names) < 630:
+        names.append(f"Club {countries[i % len(countries)]} {i}")
+        i += 1
+    rows = sorted(((n, round(rng.uniform(1250, 2050), 6)) for n in names), key=lambda t: -t[1])
+    buf = io.StringIO()
+    w = csv.writer(buf, lineterminator="\n")
+    w.writerow(["Rank", "Club", "Country", "Level", "Elo", "From", "To"])
+    for rank, (n, elo) in enumerate(rows, start=1):
+        w.writerow([rank if rank <= 600 else "None", n, rng.choice(countries), rng.choice([1, 2]),
+                    elo, "2025-09-29", "2025-10-08"])
+    return buf.getvalue()
+
+# ---------- TheSportsDB ----------
+def _tsdb_event(m: dict, league: str = "Spanish La Liga") -> dict:
+    h, a = m["home"], m["away"]
+    return {
+        "idEvent": str(2000000 + zlib.crc32(f"{m['date']:%Y-%m-%d}|{h}|{a}".encode()) % 1000000),
+        "strEvent": f"{h} vs {a}", "strSport": "Soccer", "strLeague": league,
+        "strHomeTeam": h, "strAwayTeam": a,
+        "idHomeTeam": TEAM_IDS[h], "idAwayTeam": TEAM_IDS[a],
+        "intHomeScore": None if m["hg"] is None else str(m["hg"]),
+        "intAwayScore": None if m["ag"] is None else str(m["ag"]),
+        "intRound": str(m["round"]), "dateEvent": m["date"].strftime("%Y-%m-%d"),
+        "strTime": "19:00:00", "strStatus": "Match Finished" if m["hg"] is not None else "Not Started",
+    }
+
+# ---------- FBref ----------
+def _fbref_table(rows: List[dict], table_id: str) -> str:
+    out = [f'<table class="stats_table sortable min_width" id="{table_id}"><thead><tr>'
+           '<th data-stat="gameweek">Wk</th><th data-stat="dayofweek">Day</th><th data-stat="date">Date</th>'
+           '<th data-stat="start_time">Time</th><th data-stat="home_team">Home</th><th data-stat="home_xg">xG</th>'
+           '<th data-stat="score">Score</th><th data-stat="away_xg">xG</th><th data-stat="away_team">Away</th>'
+           '<th data-stat="attendance">Attendance</th><th data-stat="venue">Venue</th>'
+           '<th data-stat="referee">Referee</th><th data-stat="match_report">Match Report</th>'
+           '<th data-stat="notes">Notes</th></tr></thead><tbody>']
+    for m in rows:
+        d = m["date"].strftime("%Y-%m-%d")
+        score = "" if m["hg"] is None else f'<a href="/en/matches/x">{m["hg"]}&ndash;{m["ag"]}</a>'
+        out.append(
+            f'<tr><th scope="row" class="right" data-stat="gameweek">{m["round"]}</th>'
+            f'<td data-stat="dayofweek">{m["date"].strftime("%a")}</td>'
+            f'<td data-stat="date" csk="{d.replace("-", "")}"><a href="/en/matches/{d}">{d}</a></td>'
+            f'<td data-stat="start_time"><span class="venuetime">19:00</span></td>'
+            f'<td data-stat="home_team"><a href="/en/squads/00000000/{m["home"]}-Stats">{m["home"]}</a></td>'
+            f'<td data-stat="home_xg">1.2</td><td data-stat="score">{score}</td><td data-stat="away_xg">0.9</td>'
+            f'<td data-stat="away_team"><a href="/en/squads/00000000/{m["away"]}-Stats">{m["away"]}</a></td>'
+            f'<td data-stat="attendance">41,233</td><td data-stat="venue">Estadio</td>'
+            f'<td data-stat="referee">Referee Name</td>'
+            f'<td data-stat="match_report"><a href="/en/matches/x">Match Report</a></td>'
+            f'<td data-stat="notes"></td></tr>'
+        )
+    out.append("</tbody></table>")
+    return "\n".join(out)
+
+def _fbref_page(title: str, table: str) -> str:
+    nav = "\n".join(f'<li><a href="/en/comps/{i}/">Competition {i}</a></li>' for i in range(400))
+    return (f"<!DOCTYPE html><html><head><title>{title}</title></head><body>"
+            f'<div id="nav"><ul>{nav}</ul></div><div id="content"><h1>{title}</h1>'
+            f'<div class="table_wrapper">{table}</div></div></body></html>')
+
+# ---------- Escritura ----------
+def build(fixtures_dir: str = FIXTURES_DIR) -> dict:
+    rng = random.Random(SEED)
+    cutoff = datetime.strptime(BENCH_DATE, "%Y-%m-%d")
+    seasons = {y: _season_matches(rng, y, cutoff) for y in (BENCH_SEASON - 1, BENCH_SEASON)}
+
+    idx = load_index(fixtures_dir)
+    # conserva lo grabado; regenera lo sintético
+    idx["exact"] = {u: e for u, e in idx["exact"].items() if e.get("file", "").startswith("recorded")}
+    idx["patterns"] = []
+
+    def put(rel: str, body: str, url: str = None, pattern: str = None, ctype: str = "application/json") -> None:
+        path = os.path.join(fixtures_dir, rel)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(body)
+        entry = {"file": rel, "status": 200, "content_type": ctype}
+        if url:
+            idx["exact"].setdefault(url, entry)
+        if pattern:
+            idx["patterns"].append(dict(entry, pattern=pattern))
+
+    put("clubelo/day.csv", _clubelo_csv(rng), pattern=CLUBELO_PATTERN, ctype="text/csv")
+
+    for name in LALIGA:
+        body = json.dumps({"teams": [{"idTeam": TEAM_IDS[name], "strTeam": name, "strSport": "Soccer",
+                                      "strLeague": "Spanish La Liga", "strCountry": "Spain"}]})
+        for q in {name, name.lower()}:
+            put(f"tsdb/searchteams_{TEAM_IDS[name]}.json", body, url=f"{TSDB_BASE}/searchteams.php?t={quote(q)}")
+
+    day = [m for m in seasons[BENCH_SEASON] if m["date"].strftime("%Y-%m-%d") == BENCH_DATE]
+    put(f"tsdb/eventsday_{BENCH_DATE}.json", json.dumps({"events": [_tsdb_event(m) for m in day] or None}),
+        url=f"{TSDB_BASE}/eventsday.php?d={BENCH_DATE}&s=Soccer")
+
+    for name in BENCH_TEAMS:
+        tid = TEAM_IDS[name]
+        for y, ms in seasons.items():
+            s = f"{y}-{y+1}"
+            evs = [_tsdb_event(m) for m in ms if name in (m["home"], m["away"])]
+            put(f"tsdb/eventsseason_{tid}_{s}.json", json.dumps({"events": evs}),
+                url=f"{TSDB_BASE}/eventsseason.php?id={tid}&s={quote(s)}")
+        last = [m for m in seasons[BENCH_SEASON] if name in (m["home"], m["away"]) and m["hg"] is not None][-5:]
+        put(f"tsdb/eventslast_{tid}.json", json.dumps({"results": [_tsdb_event(m) for m in last]}),
+            url=f"{TSDB_BASE}/eventslast.php?id={tid}")
+
+    # TSDB sin fixture concreto -> respuesta vacía (como TSDB ante búsquedas sin resultado)
+    put("tsdb/empty.json", json.dumps({}), pattern=r"^https://www\.thesportsdb\.com/api/")
+
+    league_html = _fbref_page("2025-2026 La Liga Scores & Fixtures",
+                              _fbref_table(seasons[BENCH_SEASON], "sched_2025-2026_12_1"))
+    put("fbref/league_schedule.html", league_html, url=FBREF_LEAGUE_URL, ctype="text/html; charset=utf-8")
+
+    squad_rows = [m for y in sorted(seasons) for m in seasons[y] if "Barcelona" in (m["home"], m["away"])]
+    squad_html = _fbref_page("Barcelona Scores & Fixtures", _fbref_table(squad_rows, "matchlogs_for"))
+    put("fbref/squad_schedule.html", squad_html, url=FBREF_SQUAD_URL, ctype="text/html; charset=utf-8")
+
+    save_index(idx, fixtures_dir)
+    return idx
+
+if __name__ == "__main__":
+    idx = build()
+    print(f"[fixtures] {len(idx['exact'])} exactas, {len(idx['patterns'])} patrones en {FIXTURES_DIR}")
@@ -0,0 +1,170 @@
+# benchmarks/replay.py
+"""
+Record / replay de respuestas HTTP para benchmarks sin red.
+
+Los fixtures viven en benchmarks/fixtures/ con un índice (index.json):
+
+    {
+      "exact":    {"<url>": {"file": "tsdb/x.json", "status": 200, "content_type": "..."}},
+      "patterns": [{"pattern": "<regex>", "file": "...", "status": 200, "content_type": "..."}]
+    }
+
+Las entradas exactas (grabadas) tienen prioridad sobre los patrones (sintéticos).
+Una URL sin fixture devuelve 404 y queda anotada en 'unmatched'.
+
+install(adapter) engancha el adapter en requests.Session, de modo que tanto
+requests.get(...) como requests.Session().get(...) de los scrapers pasan por él.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import re
+import threading
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import BaseAdapter, HTTPAdapter
+from requests.models import Response
+from requests.structures import CaseInsensitiveDict
+
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures")
+INDEX_NAME = "index.json"
+
+def load_index(fixtures_dir: str = FIXTURES_DIR) -> dict:
+    path = os.path.join(fixtures_dir, INDEX_NAME)
+    if not os.path.exists(path):
+        return {"exact": {}, "patterns": []}
+    with open(path, "r", encoding="utf-8") as f:
+        idx = json.load(f)
+    idx.setdefault("exact", {})
+    idx.setdefault("patterns", [])
+    return idx
+
+def save_index(idx: dict, fixtures_dir: str = FIXTURES_DIR) -> None:
+    os.makedirs(fixtures_dir, exist_ok=True)
+    with open(os.path.join(fixtures_dir, INDEX_NAME), "w", encoding="utf-8") as f:
+        json.dump(idx, f, ensure_ascii=False, indent=2, sort_keys=True)
+
+def _build_response(req, status: int, body: bytes, content_type: str) -> Response:
+    r = Response()
+    r.status_code = status
+    r._content = body
+    r.headers = CaseInsensitiveDict({"Content-Type": content_type, "Content-Length": str(len(body))})
+    r.encoding = "utf-8"
+    r.url = req.url
+    r.request = req
+    r.reason = "OK" if status < 400 else "Not Found"
+    return r
+
+class ReplayAdapter(BaseAdapter):
+    """Sirve respuestas desde fixtures; cuenta requests emitidos y URLs sin fixture."""
+
+    def __init__(self, fixtures_dir: str = FIXTURES_DIR) -> None:
+        super().__init__()
+        self.fixtures_dir = fixtures_dir
+        idx = load_index(fixtures_dir)
+        self.exact: Dict[str, dict] = idx["exact"]
+        self.patterns = [(re.compile(p["pattern"]), p) for p in idx["patterns"]]
+        self._bodies: Dict[str, bytes] = {}
+        self._lock = threading.Lock()
+        self.requests = 0
+        self.by_host: Dict[str, int] = {}
+        self.unmatched: List[str] = []
+
+    def _lookup(self, url: str) -> Optional[dict]:
+        entry = self.exact.get(url)
+        if entry:
+            return entry
+        for rx, p in self.patterns:
+            if rx.search(url):
+                return p
+        return None
+
+    def _body(self, rel: str) -> bytes:
+        b = self._bodies.get(rel)
+        if b is None:
+            with open(os.path.join(self.fixtures_dir, rel), "rb") as f:
+                b = self._bodies[rel] = f.read()
+        return b
+
+    def resolve(self, url: str) -> Optional[Tuple[int, bytes, str]]:
+        """(status, cuerpo, content-type) del fixture de 'url', o None si no hay."""
+        entry = self._lookup(url)
+        if not entry:
+            return None
+        return (int(entry.get("status", 200)), self._body(entry["file"]),
+                entry.get("content_type", "text/html; charset=utf-8"))
+
+    def send(self, request, **kwargs) -> Response:
+        url = request.url
+        host = urlsplit(url).netloc
+        with self._lock:
+            self.requests += 1
+            self.by_host[host] = self.by_host.get(host, 0) + 1
+        hit = self.resolve(url)
+        if hit is None:
+            with self._lock:
+                self.unmatched.append(url)
+            return _build_response(request, 404, b"", "text/plain")
+        return _build_response(request, *hit)
+
+    def reset_counters(self) -> None:
+        with self._lock:
+            self.requests = 0
+            self.by_host = {}
+            self.unmatched = []
+
+    def close(self) -> None:
+        pass
+
+class RecordingAdapter(HTTPAdapter):
+    """Hace el request real y guarda el cuerpo como fixture exacto (modo --record)."""
+
+    def __init__(self, fixtures_dir: str = FIXTURES_DIR) -> None:
+        super().__init__()
+        self.fixtures_dir = fixtures_dir
+        self.idx = load_index(fixtures_dir)
+        self._lock = threading.Lock()
+
+    def send(self, request, **kwargs) -> Response:
+        resp = super().send(request, **kwargs)
+        if resp.status_code == 200:
+            host = urlsplit(request.url).netloc.replace(":", "_")
+            rel = os.path.join("recorded", host, hashlib.sha1(request.url.encode()).hexdigest()[:16])
+            path = os.path.join(self.fixtures_dir, rel)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(path, "wb") as f:
+                f.write(resp.content)
+            with self._lock:
+                self.idx["exact"][request.url] = {
+                    "file": rel, "status": 200,
+                    "content_type": resp.headers.get("Content-Type", "text/html; charset=utf-8"),
+                }
+                save_index(self.idx, self.fixtures_dir)
+        return resp
+
+_ORIG_GET_ADAPTER = None
+
+def install(adapter: BaseAdapter) -> None:
+    """Todas las sesiones de requests usarán 'adapter' (sin caché HTTP de por medio)."""
+    global _ORIG_GET_ADAPTER
+    from utils import http_cache
+    http_cache.disable()
+    try:
+        import requests_cache
+        requests_cache.uninstall_cache()
+    except Exception:
+        pass
+    if _ORIG_GET_ADAPTER is None:
+        _ORIG_GET_ADAPTER = requests.sessions.Session.get_adapter
+    requests.sessions.Session.get_adapter = lambda self, url: adapter
+
+def uninstall() -> None:
+    global _ORIG_GET_ADAPTER
+    if _ORIG_GET_ADAPTER is not None:
+        requests.sessions.Session.get_adapter = _ORIG_GET_ADAPTER
+        _ORIG_GET_ADAPTER = None
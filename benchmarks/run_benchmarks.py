@@ -0,0 +1,253 @@
+# benchmarks/run_benchmarks.py
+"""
+Benchmarks offline de los hot paths de scraping / matching.
+
+Reproduce fixtures (ClubElo CSV, TSDB JSON, FBref HTML) a través de un adapter
+de requests, sin tocar la red, y mide por caso:
+  - tiempo (min / mediana / media sobre --repeat ejecuciones)
+  - requests HTTP emitidos por ejecución
+  - pico de memoria (tracemalloc, en una ejecución aparte)
+
+Uso:
+    python -m benchmarks.run_benchmarks                       # escribe benchmarks/results/<commit>.json
+    python -m benchmarks.run_benchmarks --only parse_csv best_row_for_team
+    python -m benchmarks.run_benchmarks --compare benchmarks/results/abc123.json
+    python -m benchmarks.run_benchmarks --record             # graba respuestas reales como fixtures
+
+Se ejecuta en un directorio temporal con copia de ./data para no ensuciar las
+cachés del repo (los scrapers escriben en ./data y crean la caché HTTP en cwd).
+"""
+
+from __future__ import annotations
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime
+from typing import Callable, Dict, List, Optional, Tuple
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if REPO_ROOT not in sys.path:
+    sys.path.insert(0, REPO_ROOT)
+
+from benchmarks import make_fixtures as fx
+from benchmarks.replay import FIXTURES_DIR, RecordingAdapter, ReplayAdapter, install, load_index, uninstall
+
+RESULTS_DIR = os.path.join(REPO_ROOT, "benchmarks", "results")
+
+# ---------- Casos ----------
+# nombres a emparejar contra el CSV de ClubElo: aciertos exactos, por tokens y fallos (peor caso)
+MATCH_NAMES = [
+    "Barcelona", "Real Madrid", "Atlético Madrid", "Athletic Club", "Sevilla FC",
+    "Manchester City", "Bayern München", "Inter Milan", "Paris Saint-Germain", "Equipo Inexistente",
+]
+
+def _cases() -> Dict[str, Tuple[Callable[[], object], Callable[[], None]]]:
+    """nombre -> (setup que devuelve el callable a medir, teardown)."""
+    def parse_csv():
+        from utils.get_elo import _parse_csv
+        with open(os.path.join(FIXTURES_DIR, "clubelo", "day.csv"), encoding="utf-8") as f:
+            text = f.read()
+        return lambda: _parse_csv(text)
+
+    def best_row_for_team():
+        from utils.get_elo import _alias_variants_from_name, _best_row_for_team, _parse_csv
+        with open(os.path.join(FIXTURES_DIR, "clubelo", "day.csv"), encoding="utf-8") as f:
+            rows = _parse_csv(f.read())
+        variants = [_alias_variants_from_name(n) for n in MATCH_NAMES]
+        return lambda: [_best_row_for_team(rows, v) for v in variants]
+
+    def from_fbref():
+        from utils.get_matches import _from_fbref
+        return lambda: _from_fbref("laliga", fx.BENCH_SEASON, fx.BENCH_MATCHWEEK)
+
+    def fbref_parse_scores_fixtures():
+        from utils.get_previews_matches import _fbref_parse_scores_fixtures
+        cutoff = datetime.strptime(fx.BENCH_DATE, "%Y-%m-%d")
+        return lambda: _fbref_parse_scores_fixtures(fx.FBREF_SQUAD_URL, cutoff)
+
+    def tsdb_collect_previous():
+        from utils.get_previews_matches import _tsdb_collect_previous
+        cutoff = datetime.strptime(fx.BENCH_DATE, "%Y-%m-%d")
+        return lambda: _tsdb_collect_previous(fx.TEAM_IDS["Barcelona"], cutoff, 10)
+
+    def get_match_features():
+        from utils.get_match_features import get_match_features
+        date = datetime.strptime(fx.BENCH_DATE, "%Y-%m-%d").strftime("%d/%m/%y")
+        return lambda: get_match_features("Sevilla-Barcelona", date, "laliga")
+
+    return {
+        "parse_csv": parse_csv,
+        "best_row_for_team": best_row_for_team,
+        "from_fbref": from_fbref,
+        "fbref_parse_scores_fixtures": fbref_parse_scores_fixtures,
+        "tsdb_collect_previous": tsdb_collect_previous,
+        "get_match_features": get_match_features,
+    }
+
+# ---------- Entorno ----------
+def _git_commit() -> str:
+    try:
+        out = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=REPO_ROOT,
+                             capture_output=True, text=True, timeout=10)
+        sha = out.stdout.strip() or "unknown"
+        dirty = subprocess.run(["git", "status", "--porcelain", "--untracked-files=no"], cwd=REPO_ROOT,
+                               capture_output=True, text=True, timeout=30).stdout.strip()
+        return sha + ("-dirty" if dirty else "")
+    except Exception:
+        return "unknown"
+
+def _prepare_workdir() -> str:
+    wd = tempfile.mkdtemp(prefix="casandra-bench-")
+    shutil.copytree(os.path.join(REPO_ROOT, "data"), os.path.join(wd, "data"))
+    return wd
+
+def _quiet_scrapers() -> None:
+    """
+    Sin rate limit: los fixtures no lo necesitan y las esperas ocultarían el CPU.
+    Sin memo de parseo por contenido (http_cache.parsed): cada repetición mide el parseo.
+    """
+    from utils import http_cache, rate_limit
+    rate_limit.disable()
+    http_cache.PARSED_MAX = 0
+
+# ---------- Medición ----------
+def _run_case(name: str, setup, adapter: ReplayAdapter, repeat: int) -> dict:
+    try:
+        with contextlib.redirect_stdout(io.StringIO()):
+            fn = setup()
+            fn()  # warm-up (imports, compilación de regex, lectura de fixtures)
+    except Exception as e:
+        return {"status": "error", "error": f"{type(e).__name__}: {e}"}
+
+    times: List[float] = []
+    adapter.reset_counters()
+    with contextlib.redirect_stdout(io.StringIO()):
+        for _ in range(repeat):
+            t0 = time.perf_counter()
+            fn()
+            times.append(time.perf_counter() - t0)
+    reqs = adapter.requests / repeat
+    unmatched = sorted(set(adapter.unmatched))
+
+    tracemalloc.start()
+    try:
+        with contextlib.redirect_stdout(io.StringIO()):
+            fn()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    return {
+        "status": "ok",
+        "repeat": repeat,
+        "min_s": min(times),
+        "median_s": statistics.median(times),
+        "mean_s": statistics.fmean(times),
+        "requests_per_run": reqs,
+        "requests_by_host": {h: c / repeat for h, c in sorted(adapter.by_host.items())},
+        "unmatched_urls": unmatched,
+        "peak_mem_kib": round(peak / 1024, 1),
+    }
+
+def run(only: Optional[List[str]] = None, repeat: int = 5) -> dict:
+    cases = _cases()
+    names = [n for n in cases if not only or n in only]
+    cwd = os.getcwd()
+    wd = _prepare_workdir()
+    adapter = ReplayAdapter()
+    try:
+        os.chdir(wd)
+        install(adapter)
+        _quiet_scrapers()
+        results = {}
+        for n in names:
+            results[n] = _run_case(n, cases[n], adapter, repeat)
+            r = results[n]
+            if r["status"] == "ok":
+                print(f"{n:<30} median {r['median_s']*1e3:9.2f} ms  req/run {r['requests_per_run']:5.1f}"
+                      f"  peak {r['peak_mem_kib']:9.1f} KiB")
+            else:
+                print(f"{n:<30} ERROR {r['error']}")
+    finally:
+        uninstall()
+        os.chdir(cwd)
+        shutil.rmtree(wd, ignore_errors=True)
+    return {
+        "commit": _git_commit(),
+        "timestamp": datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "fixtures": len(load_index()["exact"]),
+        "results": results,
+    }
+
+def record() -> None:
+    """Ejecuta los casos de red una vez contra las fuentes reales y graba las respuestas."""
+    cwd = os.getcwd()
+    wd = _prepare_workdir()
+    try:
+        os.chdir(wd)
+        adapter = RecordingAdapter()
+        install(adapter)
+        for n, setup in _cases().items():
+            if n in ("parse_csv", "best_row_for_team"):
+                continue
+            try:
+                setup()()
+                print(f"[record] {n} ok")
+            except Exception as e:
+                print(f"[record] {n} error: {e}")
+    finally:
+        uninstall()
+        os.chdir(cwd)
+        shutil.rmtree(wd, ignore_errors=True)
+
+def compare(base: dict, head: dict) -> None:
+    print(f"{'case':<30} {base['commit']:>14} {head['commit']:>14}   ratio")
+    for n, h in head["results"].items():
+        b = base["results"].get(n)
+        if not b or b.get("status") != "ok" or h.get("status") != "ok":
+            print(f"{n:<30} {'-':>14} {'-':>14}")
+            continue
+        ratio = h["median_s"] / b["median_s"] if b["median_s"] else float("nan")
+        print(f"{n:<30} {b['median_s']*1e3:11.2f} ms {h['median_s']*1e3:11.2f} ms   x{ratio:.2f}"
+              f"  req {b['requests_per_run']:.0f}->{h['requests_per_run']:.0f}")
+
+def main(argv: Optional[List[str]] = None) -> None:
+    ap = argparse.ArgumentParser(description="Benchmarks offline de Casandra")
+    ap.add_argument("--only", nargs="*", help="casos a ejecutar")
+    ap.add_argument("--repeat", type=int, default=5)
+    ap.add_argument("--out", help="fichero de resultados (por defecto benchmarks/results/<commit>.json)")
+    ap.add_argument("--compare", help="resultados base contra los que comparar")
+    ap.add_argument("--record", action="store_true", help="grabar fixtures desde la red")
+    args = ap.parse_args(argv)
+
+    if args.record:
+        record()
+        return
+    if not os.path.exists(os.path.join(FIXTURES_DIR, "index.json")):
+        fx.build()
+
+    res = run(args.only, args.repeat)
+    out = args.out or os.path.join(RESULTS_DIR, f"{res['commit']}.json")
+    os.makedirs(os.path.dirname(out), exist_ok=True)
+    with open(out, "w", encoding="utf-8") as f:
+        json.dump(res, f, indent=2)
+    print(f"[bench] resultados -> {out}")
+    if args.compare:
+        with open(args.compare, "r", encoding="utf-8") as f:
+            compare(json.load(f), res)
+
+if __name__ == "__main__":
+    main()
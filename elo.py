@@ -0,0 +1,46 @@
+# elo.py
+"""
+Elo propio a partir del histórico minado (ver utils/elo_engine.py).
+
+    python elo.py                                   # actualiza data/elo/elo_history.npz (incremental)
+    python elo.py --rebuild --k 25 --home-adv 80    # reconstrucción completa con otros parámetros
+    python elo.py --team "Sevilla" --fecha 05/10/25
+    python elo.py --validate 300                    # compara con ClubElo cacheado (sin red)
+"""
+
+import argparse
+import os
+import time
+
+from utils.elo_engine import ELO_DIR, EloConfig, build, default_history, validate
+from utils.match_store import load_match_store
+
+def main():
+    ap = argparse.ArgumentParser(description="Elo local de Casandra")
+    ap.add_argument("--rebuild", action="store_true", help="reconstruir desde cero")
+    ap.add_argument("--k", type=float, default=EloConfig.k)
+    ap.add_argument("--home-adv", type=float, default=EloConfig.home_adv)
+    ap.add_argument("--no-gd", action="store_true", help="sin escalado por diferencia de goles")
+    ap.add_argument("--team")
+    ap.add_argument("--fecha", help="dd/mm/aa")
+    ap.add_argument("--validate", type=int, metavar="N", help="validar contra ClubElo con N muestras")
+    ap.add_argument("--debug", action="store_true")
+    args = ap.parse_args()
+
+    t0 = time.perf_counter()
+    if args.rebuild:
+        store = load_match_store()
+        hist = build(store, EloConfig(k=args.k, home_adv=args.home_adv, gd_scaling=not args.no_gd))
+        hist.save(os.path.join(ELO_DIR, "elo_history.npz"))
+    else:
+        hist = default_history()
+    print(f"[elo] {hist.n_matches} partidos, {len(hist.teams)} equipos, {len(hist.days)} días "
+          f"({time.perf_counter() - t0:.2f}s)")
+
+    if args.team and args.fecha:
+        print(f"[elo] {args.team} @ {args.fecha}: {hist.rating(args.team, args.fecha)}")
+    if args.validate:
+        print(f"[elo] validación: {validate(hist, load_match_store(), sample=args.validate, debug=args.debug)}")
+
+if __name__ == "__main__":
+    main()
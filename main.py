@@ -1,3 +1,116 @@
-from utils.get_elo import get_team_elo
-from utils.get_match_result import get_match_result
-from utils.unslug_team import unslug_team
+# main.py
+"""
+Aplicación de terminal de Casandra.
+
+Muestra las 5 grandes ligas; al elegir una, lista los partidos de la próxima
+jornada con su resultado y total de goles más probables, ordenados de mayor a
+menor seguridad.
+
+    python main.py
+    python main.py --liga laliga --jornada 9 --temporada 2025
+    python main.py --cached [--liga laliga]     # solo predicciones ya cacheadas, sin red
+    python main.py --liga laliga --refresh --profile   # perfil de la jornada en data/profiles/
+    python main.py --liga laliga --live [--interval 60] # día de partido: resultados en vivo y
+                                                        # predicciones de la jornada siguiente al día
+
+El arranque es ligero: utils.predict solo importa la librería estándar y los
+modelos (numpy mmap) y scrapers se cargan cuando hacen falta.
+"""
+
+import argparse
+from datetime import datetime
+
+from utils.predict import LIGAS, cached_predictions, season_for_date
+
+LIGAS_NOMBRE = {
+    "laliga": "LaLiga (España)",
+    "premier": "Premier League (Inglaterra)",
+    "seriea": "Serie A (Italia)",
+    "bundesliga": "Bundesliga (Alemania)",
+    "ligue1": "Ligue 1 (Francia)",
+}
+RESULTADO = {"1": "Local", "X": "Empate", "2": "Visitante"}
+
+def _elegir_liga() -> str:
+    for i, liga in enumerate(LIGAS, start=1):
+        print(f"  {i}. {LIGAS_NOMBRE[liga]}")
+    while True:
+        op = input("Elige competición [1-5]: ").strip()
+        if op.isdigit() and 1 <= int(op) <= len(LIGAS):
+            return LIGAS[int(op) - 1]
+        print("Opción inválida.")
+
+def _mostrar(entry: dict) -> None:
+    print(f"\n{LIGAS_NOMBRE.get(entry['liga'], entry['liga'])} — temporada {entry['temporada']}/"
+          f"{entry['temporada'] + 1}, jornada {entry['jornada']}\n")
+    print(f"{'Fecha':<9} {'Partido':<40} {'Resultado':<10} {'Conf.':>6}  {'Goles':>5} {'Conf.':>6}")
+    for p in entry["predicciones"]:
+        partido = f"{p['local']} - {p['visitante']}"
+        goles = "6+" if p["goals"] == "6" else p["goals"]
+        print(f"{p['fecha']:<9} {partido:<40} {RESULTADO.get(p['result'], p['result']):<10} "
+              f"{p['conf_result']:>6.0%}  {goles:>5} {p['conf_goals']:>6.0%}")
+
+def _listar_cache(liga=None) -> None:
+    entries = cached_predictions(liga)
+    if not entries:
+        print("No hay predicciones cacheadas.")
+        return
+    for key in sorted(entries, key=lambda k: (k.split("|")[0], int(k.split("|")[1]), int(k.split("|")[2]))):
+        _mostrar(entries[key])
+
+def _en_vivo(liga, temporada, jornada, interval, debug) -> None:
+    from utils.live import LiveMatchday
+    from utils.predict import PredictionEngine
+    try:
+        engine = PredictionEngine()
+    except FileNotFoundError as e:
+        print(f"{e} (solo se actualizará la forma de los equipos)")
+        engine = None
+    live = LiveMatchday(liga, temporada, jornada, engine=engine, debug=debug)
+    print(f"En vivo: {LIGAS_NOMBRE.get(liga, liga)} jornada {jornada} ({len(live.fixtures)} partidos), "
+          f"sondeo cada {interval:.0f}s. Ctrl+C para salir.")
+    try:
+        live.run(interval, on_update=_mostrar)
+    except KeyboardInterrupt:
+        pass
+
+def main():
+    ap = argparse.ArgumentParser(description="Casandra: predicción de la próxima jornada")
+    ap.add_argument("--liga", choices=LIGAS)
+    ap.add_argument("--temporada", type=int)
+    ap.add_argument("--jornada", type=int)
+    ap.add_argument("--refresh", action="store_true", help="ignorar la caché de predicciones")
+    ap.add_argument("--cached", action="store_true", help="listar predicciones cacheadas (sin red ni modelos)")
+    ap.add_argument("--profile", nargs="?", const="./data/profiles", metavar="DIR",
+                    help="profiler de muestreo + desglose por etapa de get_match_features")
+    ap.add_argument("--live", action="store_true",
+                    help="seguir la jornada en curso y actualizar la forma / predicciones al terminar partidos")
+    ap.add_argument("--interval", type=float, default=60.0, metavar="SEG", help="--live: segundos entre sondeos")
+    ap.add_argument("--debug", action="store_true")
+    args = ap.parse_args()
+
+    if args.cached:
+        _listar_cache(args.liga)
+        return
+    from utils.predict import PredictionEngine, next_matchweek
+
+    liga = args.liga or _elegir_liga()
+    temporada = args.temporada or season_for_date(datetime.now())
+    jornada = args.jornada or next_matchweek(liga, temporada, debug=args.debug)
+    if not jornada:
+        print("No se encontró una próxima jornada para esa liga.")
+        return
+    if args.live:
+        _en_vivo(liga, temporada, jornada, args.interval, args.debug)
+        return
+    engine = PredictionEngine()
+    if args.profile:
+        from utils import profiling
+        with profiling.Profiler(args.profile, run=f"predict-{liga}-{temporada}-J{jornada}"):
+            entry = engine.predict_matchweek(liga, temporada, jornada, refresh=args.refresh, debug=args.debug)
+    else:
+        entry = engine.predict_matchweek(liga, temporada, jornada, refresh=args.refresh, debug=args.debug)
+    _mostrar(entry)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,206 @@
+# mine.py
+"""
+Script de minado de data: recorre (liga, temporada, jornada), obtiene las
+features de cada partido y las añade al shard data/features/<liga>/<temporada>.csv.
+
+    python mine.py --ligas laliga premier --temporadas 2020 2024 --jornadas 5 38
+
+Reanudable: los partidos ya presentes en el shard se saltan. El minado local
+es un pipeline (utils.pipeline): calendario -> búsquedas por equipo ->
+ensamblado -> escritor, con colas acotadas entre etapas.
+
+    python mine.py --ligas laliga --temporadas 2000 2024 --lookup-workers 6 --queue-size 32
+
+    python mine.py --ligas laliga --temporadas 2024 2024 --profile   # data/profiles/<run>/
+
+Varios nodos (utils.work_queue): se encolan las (liga, temporada, jornada) y
+cada nodo toma tareas con lease + heartbeat; las filas van a un almacén común
+que después se vuelca a los shards.
+
+    python mine.py --enqueue --ligas laliga --temporadas 1995 2025     # una vez
+    python mine.py --worker [--node nodo-a]                            # en cada nodo
+    python mine.py --status                                            # rendimiento por nodo
+    python mine.py --export                                            # almacén -> shards
+"""
+
+import argparse
+import contextlib
+import io
+import time
+
+from utils import feature_store, metrics, pipeline, profiling, work_queue
+from utils.prefetch import Prefetcher
+from utils.get_match_features import MATCH_DEADLINE, get_match_features
+from utils.get_matches import get_matches_list
+
+LIGAS = ["laliga", "premier", "seriea", "bundesliga", "ligue1"]
+
+def mine_matchweek(liga, temporada, jornada, done, write, quiet=True, debug=False, abort=None,
+                   deadline_s=MATCH_DEADLINE):
+    """
+    Mina una jornada: write(row) por cada partido nuevo (no presente en 'done').
+    Devuelve los partidos escritos, o None si no se pudo obtener el calendario.
+    'abort' (threading.Event) corta entre partidos (lease perdido).
+    'deadline_s' acota el tiempo por partido (features faltantes -> columna Faltantes).
+    """
+    with profiling.stage("fixtures"):
+        matches = get_matches_list(liga, temporada, jornada, debug=debug)
+    if matches is None:
+        return None
+    print(f"[mine] {liga} {temporada} J{jornada}: {len(matches)} partidos")
+    written = 0
+    for slug, fecha in matches:
+        if abort is not None and abort.is_set():
+            break
+        local, away = pipeline.match_names(slug)
+        if (fecha, local, away) in done:
+            continue
+        try:
+            with contextlib.redirect_stdout(io.StringIO()) if quiet else contextlib.nullcontext():
+                match = get_match_features((local, away), fecha, liga, deadline_s=deadline_s)
+        except Exception as e:
+            print(f"[mine][err] {local}-{away} {fecha}: {e}")
+            metrics.inc("mine_errors_total", league=liga)
+            continue
+        with profiling.stage("write"):
+            write(match.to_row(Temporada=temporada, Jornada=jornada))
+        written += 1
+    return written
+
+def mine(ligas, temporadas, jornadas, out_dir=feature_store.FEATURES_DIR, quiet=True, debug=False,
+         deadline_s=MATCH_DEADLINE, lookup_workers=pipeline.LOOKUP_WORKERS,
+         assembly_workers=pipeline.ASSEMBLY_WORKERS, queue_size=pipeline.QUEUE_SIZE):
+    """
+    Minado local con utils.pipeline; devuelve los partidos escritos. La etapa de
+    búsquedas ya va por delante del ensamblado, así que aquí no hace falta Prefetcher.
+    """
+    return pipeline.run(ligas, temporadas, jornadas, out_dir, quiet=quiet, debug=debug, deadline_s=deadline_s,
+                        lookup_workers=lookup_workers, assembly_workers=assembly_workers, queue_size=queue_size)
+
+def work(queue, node, out_dir=feature_store.FEATURES_DIR, quiet=True, debug=False, wait=False, poll=30.0,
+         deadline_s=MATCH_DEADLINE, prefetch=True):
+    """
+    Bucle de un nodo: toma tareas de la cola hasta que no quede ninguna
+    (con wait=True sigue esperando tareas nuevas / leases que expiren).
+    """
+    pf = Prefetcher(debug=debug) if prefetch else None
+    try:
+        return _work(queue, node, out_dir, quiet, debug, wait, poll, deadline_s, pf)
+    finally:
+        if pf:
+            pf.close()
+
+def _work(queue, node, out_dir, quiet, debug, wait, poll, deadline_s, pf):
+    t0, total, tasks = time.time(), 0, 0
+    while True:
+        task = queue.lease(node)
+        if task is None:
+            if not wait:
+                break
+            time.sleep(poll)
+            continue
+        if pf:
+            # la siguiente tarea de la cola suele ser la jornada siguiente
+            pf.schedule(task.liga, task.temporada, task.jornada + 1)
+        # ya minados: en el almacén común o en los shards locales
+        done = queue.done_keys(task.liga, task.temporada)
+        done |= feature_store.done_keys(feature_store.shard_path(task.liga, task.temporada, out_dir))
+        try:
+            with work_queue.Heartbeat(queue, task) as hb:
+                n = mine_matchweek(task.liga, task.temporada, task.jornada, done,
+                                   lambda row: queue.put_row(task, row), quiet=quiet, debug=debug, abort=hb.lost,
+                                   deadline_s=deadline_s)
+        except Exception as e:
+            queue.fail(task, f"{type(e).__name__}: {e}")
+            print(f"[worker][err] {task.liga} {task.temporada} J{task.jornada}: {e}")
+            continue
+        if hb.lost.is_set():
+            print(f"[worker] lease perdido: {task.liga} {task.temporada} J{task.jornada}")
+        elif n is None:
+            queue.fail(task, "sin calendario")
+        else:
+            queue.complete(task, n)
+            total += n
+            tasks += 1
+            mins = max(time.time() - t0, 1e-9) / 60
+            print(f"[worker] {node}: {tasks} tareas, {total} partidos ({total / mins:.1f}/min)")
+    return total
+
+def _print_status(queue) -> None:
+    st = queue.stats()
+    print(f"tareas: {st['tasks']}  filas sin exportar: {st['rows_pending_export']}")
+    agg = st["aggregate"]
+    print(f"agregado: {agg['matches']} partidos, {agg['matches_per_min']}/min, {agg['live_nodes']} nodos activos")
+    for node, v in sorted(st["nodes"].items()):
+        print(f"  {node:<30} {v['tasks_done']:>5} tareas  {v['matches']:>6} partidos  "
+              f"{v['matches_per_min']:>7}/min  ocupado {v['busy_pct']}%  (visto hace {v['idle_for_s']}s)")
+
+def main():
+    ap = argparse.ArgumentParser(description="Minado de features de Casandra")
+    ap.add_argument("--ligas", nargs="+", default=LIGAS, choices=LIGAS)
+    ap.add_argument("--temporadas", nargs=2, type=int, default=[1994, 2025], metavar=("DESDE", "HASTA"))
+    ap.add_argument("--jornadas", nargs=2, type=int, default=[5, 38], metavar=("DESDE", "HASTA"))
+    ap.add_argument("--out", default=feature_store.FEATURES_DIR)
+    ap.add_argument("--metrics", help="volcar métricas al terminar (.json o .prom)")
+    ap.add_argument("--verbose", action="store_true", help="mostrar trazas de get_match_features")
+    ap.add_argument("--no-prefetch", action="store_true",
+                    help="--worker: no calentar la jornada siguiente en segundo plano")
+    ap.add_argument("--lookup-workers", type=int, default=pipeline.LOOKUP_WORKERS,
+                    help="hilos de búsquedas por equipo (Elo, forma)")
+    ap.add_argument("--assembly-workers", type=int, default=pipeline.ASSEMBLY_WORKERS,
+                    help="hilos de ensamblado (get_match_features)")
+    ap.add_argument("--queue-size", type=int, default=pipeline.QUEUE_SIZE,
+                    help="capacidad de cada cola entre etapas (backpressure)")
+    ap.add_argument("--deadline", type=float, default=MATCH_DEADLINE, metavar="SEG",
+                    help="tiempo máximo por partido; lo que no llegue queda como feature faltante")
+    ap.add_argument("--profile", nargs="?", const=profiling.PROFILES_DIR, metavar="DIR",
+                    help="profiler de muestreo + desglose por etapa (flamegraph en DIR/<run>/)")
+    modo = ap.add_mutually_exclusive_group()
+    modo.add_argument("--enqueue", action="store_true", help="encolar (liga, temporada, jornada) en la cola compartida")
+    modo.add_argument("--worker", action="store_true", help="minar tareas de la cola compartida")
+    modo.add_argument("--status", action="store_true", help="estado de la cola y rendimiento por nodo")
+    modo.add_argument("--export", action="store_true", help="volcar el almacén común a los shards")
+    ap.add_argument("--queue", default=work_queue.DB_PATH, help="base SQLite de la cola (compartida entre nodos)")
+    ap.add_argument("--node", default=None, help="nombre del nodo (por defecto host-pid)")
+    ap.add_argument("--wait", action="store_true", help="--worker: seguir esperando tareas al vaciarse la cola")
+    ap.add_argument("--retry-failed", action="store_true", help="--enqueue: reabrir tareas fallidas")
+    args = ap.parse_args()
+
+    if args.enqueue or args.worker or args.status or args.export:
+        queue = work_queue.WorkQueue(args.queue)
+        if args.enqueue:
+            n = queue.enqueue(args.ligas, range(args.temporadas[0], args.temporadas[1] + 1),
+                              range(args.jornadas[0], args.jornadas[1] + 1))
+            print(f"[queue] {n} tareas nuevas")
+            if args.retry_failed:
+                print(f"[queue] {queue.retry_failed()} tareas fallidas reabiertas")
+        elif args.status:
+            _print_status(queue)
+        elif args.export:
+            print(f"[queue] {queue.export_shards(args.out)} filas añadidas a los shards")
+        else:
+            node = args.node or work_queue.default_node()
+            prof = profiling.Profiler(args.profile, run=f"worker-{node}") if args.profile else contextlib.nullcontext()
+            try:
+                with prof:
+                    work(queue, node, args.out, quiet=not args.verbose, wait=args.wait, deadline_s=args.deadline,
+                         prefetch=not args.no_prefetch)
+            finally:
+                if args.metrics:
+                    metrics.dump(args.metrics)
+        return
+
+    run = f"mine-{'_'.join(args.ligas) if len(args.ligas) < len(LIGAS) else 'all'}-{args.temporadas[0]}-{args.temporadas[1]}"
+    prof = profiling.Profiler(args.profile, run=run) if args.profile else contextlib.nullcontext()
+    try:
+        with prof:
+            mine(args.ligas, range(args.temporadas[0], args.temporadas[1] + 1),
+                 range(args.jornadas[0], args.jornadas[1] + 1), args.out, quiet=not args.verbose,
+                 deadline_s=args.deadline, lookup_workers=args.lookup_workers,
+                 assembly_workers=args.assembly_workers, queue_size=args.queue_size)
+    finally:
+        if args.metrics:
+            metrics.dump(args.metrics)
+
+if __name__ == "__main__":
+    main()
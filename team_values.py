@@ -0,0 +1,37 @@
+# team_values.py
+"""
+Genera data/team_values.csv (valor de mercado por club y temporada) desde
+Transfermarkt; utils.get_team_value lo carga al primer uso.
+
+    python team_values.py                                # 5 ligas, 1ª y 2ª, 1994..2025
+    python team_values.py --ligas laliga --desde 2020
+    python team_values.py --team Sevilla --fecha 05/10/25
+"""
+
+import argparse
+
+from utils.get_team_value import FIRST_SEASON, LAST_SEASON, TEAM_VALUES_CSV, build_team_values, get_team_value, \
+    load_team_values
+from utils.transfermarkt import COMPETITIONS
+
+def main():
+    ap = argparse.ArgumentParser(description="Valores de mercado de Casandra")
+    ap.add_argument("--ligas", nargs="*", choices=list(COMPETITIONS), help="limitar a estas ligas")
+    ap.add_argument("--desde", type=int, default=FIRST_SEASON, help="primera temporada (año de inicio)")
+    ap.add_argument("--hasta", type=int, default=LAST_SEASON, help="última temporada (año de inicio)")
+    ap.add_argument("--out", default=TEAM_VALUES_CSV)
+    ap.add_argument("--team", help="consultar un equipo tras generar (con --fecha dd/mm/aa)")
+    ap.add_argument("--fecha")
+    ap.add_argument("--debug", action="store_true")
+    args = ap.parse_args()
+
+    if not args.team:
+        n = build_team_values(args.out, range(args.desde, args.hasta + 1), args.ligas, debug=args.debug)
+        print(f"[VALUE] {n} valores escritos en {args.out}")
+    store = load_team_values(args.out)
+    print(f"[VALUE] {len(store.team_idx)} clubes; descartados: {len(store.refused)}")
+    if args.team and args.fecha:
+        print(f"{args.team} {args.fecha}: {get_team_value(args.team, args.fecha, debug=args.debug)}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,47 @@
+# tests/test_backtest.py
+import numpy as np
+
+from utils import backtest, feature_store
+from utils.train_model import encode
+
+def _store(root):
+    rng = np.random.default_rng(0)
+    for temporada in (2000, 2001, 2002):
+        with feature_store.ShardWriter(feature_store.shard_path("laliga", temporada, root)) as w:
+            for i in range(60):
+                # la media de ELO_L sube por temporada: una fuga del futuro la movería
+                elo = None if i % 7 == 0 else 1500 + 100 * (temporada - 2000) + rng.normal(0, 10)
+                w.write({"Fecha": "01/09/00", "Competición": "laliga", "Temporada": temporada,
+                         "Local": f"T{i % 5}", "Visitante": f"T{(i + 1) % 5}", "ELO_L": elo,
+                         "GL": int(rng.integers(0, 3)), "GV": int(rng.integers(0, 3))})
+        with feature_store.ShardWriter(feature_store.shard_path("laliga", 2003, root)) as w:
+            w.write({"Fecha": "01/09/03", "Competición": "laliga", "Local": "T0", "Visitante": "T1",
+                     "ELO_L": 9999, "GL": 1, "GV": 0})        # sin Temporada -> season 0
+
+def test_fold_uses_only_past_seasons(tmp_path):
+    _store(str(tmp_path / "feat"))
+    paths = feature_store.list_shards(str(tmp_path / "feat"))
+    ds = encode(paths, "result", str(tmp_path / "cache"))
+    missing = backtest.missing_mask(ds, paths, "result")
+    stats = backtest.season_stats(ds, missing)
+    assert 0 in stats["seasons"]
+
+    fm = backtest.FoldMatrix(ds.X, missing, *backtest.fold_scaler(stats, 2002))
+    col = ds.encoder.numeric.index("ELO_L")
+    tr = np.flatnonzero((ds.season > 0) & (ds.season < 2002))
+    x = fm[tr][:, col]
+    miss = np.asarray(missing[tr][:, col])
+    assert miss.any() and np.all(x[miss] == 0.0)             # ausentes = media del fold
+    assert abs(x[~miss].mean()) < 1e-4                       # estandarizado con 2000-2001 solamente
+    assert abs(x[~miss].std() - 1.0) < 1e-3
+    assert backtest.plan_folds(ds, 1999, 2025) == [2001, 2002]
+
+def test_fold_log_loss_is_calibrated(tmp_path):
+    _store(str(tmp_path / "feat"))
+    paths = feature_store.list_shards(str(tmp_path / "feat"))
+    ds = encode(paths, "result", str(tmp_path / "cache"))
+    backtest.season_stats(ds, backtest.missing_mask(ds, paths, "result"))
+    res = backtest.run_fold(ds.cache_path, "laliga", 2002, len(ds.classes))
+    assert res["n_calibration"] == 60 and res["n_train"] == 120
+    # datos sin señal: calibrado, no puede quedar muy por encima de la distribución de clases
+    assert res["log_loss"] < res["base_log_loss"] + 0.15
@@ -0,0 +1,27 @@
+# tests/test_feature_cache.py
+from utils.feature_cache import FeatureCache
+
+def test_club_spellings_share_entries():
+    fc = FeatureCache()
+    calls = []
+    compute = lambda: calls.append(1) or (3, 1900)
+    for name in ("Sevilla FC", "Sevilla", "sevilla", "SEVILLA"):
+        assert fc.get_or_compute("elo", name, "05/10/25", compute) == (3, 1900)
+    assert len(calls) == 1
+
+def test_value_is_keyed_by_season(tmp_path):
+    fc = FeatureCache(str(tmp_path / "features.sqlite"))
+    calls = []
+    compute = lambda: calls.append(1) or 412.5
+    for fecha in ("17/08/25", "05/10/25", "24/05/26"):
+        assert fc.get_or_compute("value", "Real Madrid", fecha, compute) == 412.5
+    assert len(calls) == 1
+    fc.get_or_compute("value", "Real Madrid", "16/08/26", compute)
+    assert len(calls) == 2
+    assert FeatureCache(fc.path).get_or_compute("value", "Real Madrid CF", "01/03/26", compute) == 412.5
+    assert len(calls) == 2
+
+def test_invalidate_team_uses_canonical_name():
+    fc = FeatureCache()
+    fc.get_or_compute("form", "Girona FC", "05/10/25", lambda: ["r"], n=5)
+    assert fc.invalidate_team("Girona", "form") == 1
@@ -0,0 +1,19 @@
+# tests/test_feature_store.py
+import csv
+
+from utils import feature_store
+
+def test_old_shard_is_migrated_before_append(tmp_path):
+    path = tmp_path / "laliga" / "2024.csv"
+    path.parent.mkdir()
+    old = [c for c in feature_store.FEATURE_COLUMNS if c != "Faltantes"]
+    with open(path, "w", encoding="utf-8", newline="") as f:
+        w = csv.DictWriter(f, fieldnames=old)
+        w.writeheader()
+        w.writerow({"Fecha": "01/09/24", "Local": "Sevilla", "Visitante": "Girona", "GL": "1", "GV": "0"})
+    with feature_store.ShardWriter(str(path)) as w:
+        w.write({"Fecha": "08/09/24", "Local": "Getafe", "Visitante": "Sevilla", "Faltantes": "elo,value"})
+    rows = list(feature_store.iter_rows([str(path)]))
+    assert feature_store._header(str(path)) == feature_store.FEATURE_COLUMNS
+    assert [(r["Local"], r["GL"], r["Faltantes"]) for r in rows] == [("Sevilla", "1", ""), ("Getafe", "", "elo,value")]
+    assert feature_store.done_keys(str(path)) == {("01/09/24", "Sevilla", "Girona"), ("08/09/24", "Getafe", "Sevilla")}
@@ -0,0 +1,42 @@
+# tests/test_get_elo.py
+import pytest
+
+from utils import get_elo, negative_cache
+
+TABLE = ([{"Club": "Barcelona", "Elo": "1950"}, {"Club": "Girona", "Elo": "1800"}],
+         {"barcelona": 1, "girona": 2})
+
+@pytest.fixture
+def neg(monkeypatch, tmp_path):
+    monkeypatch.setattr(negative_cache, "DB_PATH", str(tmp_path / "neg.sqlite"))
+    negative_cache.enable()
+
+@pytest.fixture
+def days(monkeypatch):
+    seen = []
+    def table(url, debug=False):
+        seen.append(url)
+        return TABLE
+    monkeypatch.setattr(get_elo, "_day_table", table)
+    return seen
+
+def test_found_team(neg, days):
+    assert get_elo.get_team_elo("Girona", "28/09/15") == (2, 1800)
+
+def test_unlisted_team_is_recorded_per_season(neg, days):
+    assert get_elo.get_team_elo("Numancia", "28/09/15") is None
+    assert len(days) == 4 and not negative_cache.lookup("clubelo_team", "numancia|2015")
+    assert get_elo.get_team_elo("Numancia", "05/10/15") is None
+    assert negative_cache.lookup("clubelo_team", "numancia|2015") == negative_cache.NOT_FOUND
+    # otra fecha de la temporada: ni descarga ni matching
+    assert get_elo.get_team_elo("Numancia", "20/12/15") is None
+    assert len(days) == 8
+    # otra temporada: se vuelve a consultar
+    assert get_elo.get_team_elo("Numancia", "20/12/16") is None
+    assert len(days) == 12
+    assert not negative_cache.lookup("clubelo_team", "numancia|2016")
+
+def test_row_without_rank_is_not_a_negative(neg, monkeypatch):
+    monkeypatch.setattr(get_elo, "_day_table", lambda url, debug=False: (TABLE[0], {"barcelona": 1}))
+    assert get_elo.get_team_elo("Girona", "28/09/15") is None
+    assert negative_cache.count("clubelo_team_day") == 0
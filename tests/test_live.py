@@ -0,0 +1,34 @@
+# tests/test_live.py
+from datetime import datetime, timedelta
+
+import pytest
+
+from utils import live
+
+def _fixture(slug, day):
+    home, away = slug.split("-")
+    return live.Fixture(slug, day.strftime("%d/%m/%y"), home, away)
+
+@pytest.fixture
+def no_sleep(monkeypatch):
+    def fail(_):
+        raise AssertionError("run() se quedó durmiendo")
+    monkeypatch.setattr(live.time, "sleep", fail)
+
+def _matchday(monkeypatch, fixtures, finished=()):
+    monkeypatch.setattr(live, "_fixtures", lambda *a, **k: list(fixtures))
+    md = live.LiveMatchday("laliga", 2025, 9)
+    md.finished.update(finished)
+    return md
+
+def test_postponed_match_ends_run(monkeypatch, no_sleep, capsys):
+    past = datetime.now() - timedelta(days=5)
+    md = _matchday(monkeypatch, [_fixture("a-b", past), _fixture("c-d", past)], finished={"a-b"})
+    md.run(interval=60)
+    assert [f.slug for f in md.stranded()] == ["c-d"]
+    assert "aplazados" in capsys.readouterr().out
+
+def test_future_fixture_is_not_stranded(monkeypatch):
+    md = _matchday(monkeypatch, [_fixture("a-b", datetime.now() - timedelta(days=5)),
+                                 _fixture("c-d", datetime.now() + timedelta(days=2))])
+    assert md.stranded() == []
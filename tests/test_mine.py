@@ -0,0 +1,10 @@
+# tests/test_mine.py
+import mine
+from utils import get_match_features as gmf
+
+def test_mine_matchweek_hyphenated_names(monkeypatch):
+    monkeypatch.setattr(gmf, "STAGES", [])
+    monkeypatch.setattr(mine, "get_matches_list", lambda *a, **k: [("psg-se", "05/10/25")])
+    rows = []
+    assert mine.mine_matchweek("ligue1", 2025, 9, set(), rows.append) == 1
+    assert (rows[0]["Local"], rows[0]["Visitante"]) == ("Paris Saint-Germain", "Saint-Etienne")
@@ -0,0 +1,10 @@
+# tests/test_pipeline.py
+from utils import get_match_features as gmf
+from utils import pipeline
+
+def test_assemble_hyphenated_names(monkeypatch):
+    monkeypatch.setattr(gmf, "STAGES", [])
+    job = pipeline.MatchJob("ligue1", 2025, 9, "Paris Saint-Germain", "Saint-Etienne", "05/10/25")
+    assert pipeline.match_names("psg-se") == job.teams
+    _, row = pipeline.assemble(job)
+    assert (row["Local"], row["Visitante"], row["Jornada"]) == ("Paris Saint-Germain", "Saint-Etienne", 9)
@@ -0,0 +1,86 @@
+# tests/test_predict.py
+from datetime import datetime
+
+import pytest
+
+from utils import get_matches, predict
+
+MATCHES = [("a-b", "20/10/26"), ("c-d", "21/10/26")]
+
+class Calls:
+    def __init__(self, fixtures):
+        self.fixtures, self.n = fixtures, 0
+
+    def __call__(self, liga, temporada, jornada, debug=False):
+        self.n += 1
+        return self.fixtures.get(jornada, [])
+
+@pytest.fixture
+def engine(tmp_path):
+    e = object.__new__(predict.PredictionEngine)
+    e.cache_path, e.model_id, e._prefetcher = str(tmp_path / "preds.json"), "m1", None
+    e.build_rows = lambda liga, temporada, jornada, matches, debug=False: matches
+    e.predict_rows = lambda rows: [{"partido": slug} for slug, _ in rows]
+    return e
+
+def _calls(monkeypatch, fixtures):
+    calls = Calls(fixtures)
+    monkeypatch.setattr(get_matches, "get_matches_list", calls)
+    return calls
+
+def test_recent_entry_skips_network(monkeypatch, engine):
+    calls = _calls(monkeypatch, {9: MATCHES})
+    first = engine.predict_matchweek("laliga", 2026, 9, prefetch_next=False)
+    assert engine.predict_matchweek("laliga", 2026, 9, prefetch_next=False) == first
+    assert calls.n == 1
+
+def test_old_entry_is_revalidated(monkeypatch, engine):
+    calls = _calls(monkeypatch, {9: MATCHES})
+    engine.predict_matchweek("laliga", 2026, 9, prefetch_next=False)
+    monkeypatch.setattr(predict, "_is_recent", lambda entry, max_age=0: False)
+    calls.fixtures[9] = MATCHES[:1]
+    entry = engine.predict_matchweek("laliga", 2026, 9, prefetch_next=False)
+    assert calls.n == 2 and [p["partido"] for p in entry["predicciones"]] == ["a-b"]
+
+def test_model_change_invalidates_entry(monkeypatch, engine):
+    calls = _calls(monkeypatch, {9: MATCHES})
+    engine.predict_matchweek("laliga", 2026, 9, prefetch_next=False)
+    engine.model_id = "m2"
+    engine.predict_matchweek("laliga", 2026, 9, prefetch_next=False)
+    assert calls.n == 2
+
+def test_empty_fixture_list_is_not_cached(monkeypatch, engine):
+    calls = _calls(monkeypatch, {})
+    assert engine.predict_matchweek("laliga", 2026, 9, prefetch_next=False)["predicciones"] == []
+    engine.predict_matchweek("laliga", 2026, 9, prefetch_next=False)
+    assert calls.n == 2
+    assert predict.cached_predictions(path=engine.cache_path) == {}
+
+def test_next_matchweek_is_persisted(monkeypatch, tmp_path):
+    path = str(tmp_path / "next.json")
+    calls = _calls(monkeypatch, {1: [("a-b", "01/09/26")], 2: [("c-d", "10/09/26"), ("e-f", "12/09/26")],
+                                 3: [("g-h", "20/09/26")]})
+    assert predict.next_matchweek("laliga", 2026, datetime(2026, 9, 5), path=path) == 2
+    assert calls.n == 2
+    assert predict.next_matchweek("laliga", 2026, datetime(2026, 9, 12), path=path) == 2
+    assert calls.n == 2
+    # pasada la jornada, la búsqueda sigue desde la 2
+    assert predict.next_matchweek("laliga", 2026, datetime(2026, 9, 15), path=path) == 3
+    assert calls.n == 4
+
+def test_hyphenated_team_names(monkeypatch, engine):
+    from utils import get_match_features as gmf
+    monkeypatch.setattr(gmf, "STAGES", [])
+    _calls(monkeypatch, {9: [("psg-se", "20/10/26")]})
+    seen, real = [], gmf.get_match_features
+    def features(teams, fecha, liga, **kw):
+        seen.append(teams)
+        return real(teams, fecha, liga, **kw)
+    monkeypatch.setattr(gmf, "get_match_features", features)
+    engine.build_rows = predict.PredictionEngine.build_rows.__get__(engine)
+    engine.predict_rows = lambda rows: [{"partido": r["slug"], "local": r["Local"], "visitante": r["Visitante"]}
+                                        for r in rows]
+    entry = engine.predict_matchweek("ligue1", 2026, 9, prefetch_next=False)
+    assert seen == [("Paris Saint-Germain", "Saint-Etienne")]
+    assert entry["predicciones"] == [{"partido": "psg-se", "local": "Paris Saint-Germain",
+                                      "visitante": "Saint-Etienne"}]
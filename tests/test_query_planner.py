@@ -0,0 +1,49 @@
+# tests/test_query_planner.py
+from datetime import datetime
+
+import pytest
+
+from utils import get_match_result as gmr
+from utils import http_cache, query_planner
+
+@pytest.fixture
+def fresh(monkeypatch):
+    urls = set()
+    monkeypatch.setattr(http_cache, "is_fresh", lambda url: url in urls)
+    return urls
+
+def test_only_fresh_urls_are_free(fresh):
+    fresh.add("https://x.test/fresh")
+    budget = query_planner.RequestBudget(1)
+    assert budget.take("https://x.test/fresh") and budget.spent == 0
+    assert budget.take("https://x.test/expired") and budget.spent == 1
+    assert not budget.take("https://x.test/expired")
+
+def _query():
+    return gmr._MatchQuery("Sevilla", "Barcelona", datetime(2025, 10, 5), "133739", "133604", "laliga", False)
+
+def test_team_season_skipped_without_fresh_season(fresh, monkeypatch, tmp_path):
+    q = _query()
+    calls = []
+    planner = query_planner.Planner("t", [
+        query_planner.Strategy("team_season", lambda q, b: calls.append("team_season"), prior=0.7,
+                               cost=gmr._cost_team_season),
+        query_planner.Strategy("day", lambda q, b: calls.append("day"), prior=0.8, cost=gmr._cost_day),
+    ], path=str(tmp_path / "planner.json"))
+    planner.run(q, query_planner.RequestBudget(6))
+    assert calls == ["day"]
+
+    fresh.add(gmr._team_season_url(q.id_away, q.d))
+    assert gmr._cost_team_season(q) == 0.0
+    calls.clear()
+    planner.run(q, query_planner.RequestBudget(6))
+    assert calls == ["team_season", "day"]
+
+def test_query_shapes_have_their_own_stats(fresh, monkeypatch, tmp_path):
+    monkeypatch.setattr(gmr._SHAPES, "path", str(tmp_path / "shapes.json"))
+    monkeypatch.setattr(gmr._SHAPES, "_stats", {})
+    monkeypatch.setattr(gmr._PLANNER, "_stats", {})
+    monkeypatch.setattr(gmr, "_robust_get_json", lambda url, **kw: {"event": []})
+    list(gmr._search_event_candidates(["Sevilla"], ["Barcelona"], "2025-10-05", scope="laliga"))
+    assert set(gmr._SHAPES.stats("laliga")["laliga"]) == {"search:0x0:vs", "search:0x0:v"}
+    assert gmr._PLANNER.stats("laliga") == {"laliga": {}}
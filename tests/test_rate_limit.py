@@ -0,0 +1,74 @@
+# tests/test_rate_limit.py
+from datetime import datetime, timedelta, timezone
+
+import pytest
+import requests
+import requests_cache
+from urllib3 import HTTPResponse
+
+from utils import http_cache, rate_limit
+
+HOST = "rate-limit.test"
+URL = f"https://{HOST}/api/eventsday.php?d=2025-10-19"
+
+@pytest.fixture
+def cache(tmp_path, monkeypatch):
+    monkeypatch.setattr(rate_limit, "DB_PATH", str(tmp_path / "rate.sqlite"))
+    monkeypatch.setitem(rate_limit.HOST_LIMITS, HOST, rate_limit.HostLimit(5.0, 5.0, 1))
+    rate_limit.enable()
+    requests_cache.install_cache(str(tmp_path / "http"), backend="memory")
+    monkeypatch.setattr(http_cache, "_INSTALLED", True)
+    yield requests_cache.get_cache()
+    requests_cache.uninstall_cache()
+
+def _store(cache, expires, url=URL):
+    r = requests.Response()
+    r.status_code, r._content, r.url = 200, b'{"events": []}', url
+    r.request = requests.Request("GET", url).prepare()
+    r.raw = HTTPResponse(status=200, request_url=url, preload_content=False)
+    r.headers["ETag"] = '"v1"'
+    cache.save_response(r, expires=expires)
+
+def test_fresh_entry_is_free(cache):
+    _store(cache, datetime.now(timezone.utc) + timedelta(hours=1))
+    assert http_cache.is_fresh(URL)
+    assert [rate_limit.acquire(URL) for _ in range(5)] == [0.0] * 5
+
+def test_expired_entry_waits_on_bucket(cache):
+    _store(cache, datetime.now(timezone.utc) - timedelta(hours=1))
+    assert not http_cache.is_fresh(URL)
+    assert rate_limit.acquire(URL) == 0.0          # burst 1: el primero pasa
+    assert rate_limit.acquire(URL) > 0.1           # el segundo espera al bucket (5 req/s)
+
+def test_expired_entry_respects_retry_after(cache):
+    _store(cache, datetime.now(timezone.utc) - timedelta(hours=1))
+    rate_limit.feedback(URL, 429, {"Retry-After": "1"})
+    assert rate_limit.acquire(URL) >= 0.9
+
+def test_forced_live_polls_wait_on_bucket(cache, monkeypatch):
+    from utils import get_match_result as gmr, live
+    day = (datetime.now() - timedelta(hours=2)).strftime("%Y-%m-%d")
+    url = gmr._day_url(day)
+    monkeypatch.setitem(rate_limit.HOST_LIMITS, rate_limit.host_of(url), rate_limit.HostLimit(5.0, 5.0, 1))
+    waits = []
+    monkeypatch.setattr(rate_limit.deadline, "sleep", lambda s, *a: waits.append(s))
+
+    class Fresh:
+        status_code, headers, from_cache = 200, {}, False
+        def json(self):
+            return {"events": []}
+        def raise_for_status(self):
+            pass
+
+    def get(session, u, **kw):
+        _store(cache, datetime.now(timezone.utc) + timedelta(hours=24), u)
+        return Fresh()
+    monkeypatch.setattr(gmr.requests.Session, "get", get)
+    fx = live.Fixture("a-b", datetime.strptime(day, "%Y-%m-%d").strftime("%d/%m/%y"), "A", "B")
+    monkeypatch.setattr(live, "_fixtures", lambda *a, **k: [fx])
+    md = live.LiveMatchday("laliga", 2025, 9)
+
+    md.poll()
+    assert http_cache.is_fresh(url)       # la primera pasada deja la entrada fresca
+    md.poll()                             # la segunda se fuerza igual: pasa por el bucket
+    assert waits and waits[0] > 0.1
@@ -0,0 +1,62 @@
+# tests/test_singleflight.py
+import threading
+import time
+
+import pytest
+
+from utils import deadline, singleflight
+
+def _leader(g, key, fn):
+    out = {}
+    def run():
+        try:
+            out["value"] = g.do(key, fn)
+        except BaseException as e:
+            out["error"] = e
+    t = threading.Thread(target=run)
+    t.start()
+    return t, out
+
+def test_joiner_respects_own_deadline():
+    g = singleflight.Group("test-join-deadline")
+    release = threading.Event()
+    t, _ = _leader(g, "k", lambda: release.wait(5) and "slow")
+    time.sleep(0.05)
+    t0 = time.monotonic()
+    with pytest.raises(deadline.DeadlineExceeded), deadline.scope(0.2):
+        g.do("k", lambda: "never")
+    assert time.monotonic() - t0 < 1.0
+    release.set()
+    t.join()
+
+def test_leader_deadline_is_not_shared():
+    g = singleflight.Group("test-leader-deadline")
+    started = threading.Event()
+
+    def exhausted():
+        started.set()
+        time.sleep(0.1)
+        raise deadline.DeadlineExceeded("otro partido")
+
+    t, out = _leader(g, "k", exhausted)
+    started.wait(1)
+    with deadline.scope(5):
+        assert g.do("k", lambda: "mine") == "mine"
+    t.join()
+    assert isinstance(out["error"], deadline.DeadlineExceeded)
+
+def test_foreground_does_not_join_low_priority():
+    from utils import rate_limit
+    g = singleflight.Group("test-priority")
+    release = threading.Event()
+
+    def background():
+        with rate_limit.low_priority():
+            return g.do("k", lambda: release.wait(5) and "prefetch")
+
+    t = threading.Thread(target=background)
+    t.start()
+    time.sleep(0.05)
+    assert g.do("k", lambda: "foreground") == "foreground"
+    release.set()
+    t.join()
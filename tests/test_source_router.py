@@ -0,0 +1,50 @@
+# tests/test_source_router.py
+import time
+
+from utils import source_router
+from utils.source_router import SourceRouter
+
+def _sources(calls, a_result):
+    def a(debug=False):
+        calls.append("a")
+        if isinstance(a_result, Exception):
+            raise a_result
+        return a_result
+    def b(debug=False):
+        calls.append("b")
+        return ["b"]
+    return {"a": a, "b": b}
+
+def _trip(r, source):
+    for _ in range(source_router.BREAKER_THRESHOLD):
+        r._record(source, False, 0.1)
+    assert r.stats[source].is_open()
+
+def test_open_breaker_skips_source():
+    calls = []
+    r = SourceRouter("test-open", _sources(calls, ["a"]))
+    _trip(r, "a")
+    for _ in range(5):
+        assert r.call() == ["b"]
+    assert calls == ["b"] * 5
+
+def test_half_open_probe_after_cooldown(monkeypatch):
+    calls = []
+    r = SourceRouter("test-half-open", _sources(calls, RuntimeError("caída")))
+    monkeypatch.setattr(source_router, "BREAKER_COOLDOWN", 0.05)
+    _trip(r, "a")
+    r.stats["b"].latencies.extend([500.0] * 3)    # 'a' primero al cerrarse el cooldown
+    time.sleep(0.1)
+    calls.clear()
+    r.call()
+    assert calls.count("a") == 1            # una prueba; falla y se reabre
+    assert r.stats["a"].is_open()
+
+def test_empty_result_is_healthy():
+    calls = []
+    r = SourceRouter("test-empty", _sources(calls, []), is_healthy=lambda res: res is not None)
+    for _ in range(source_router.BREAKER_THRESHOLD + 2):
+        assert r.call() == ["b"]                 # 'a' responde [] al instante: se pasa a 'b'
+    assert calls.count("a") >= 1
+    assert not r.stats["a"].is_open()
+    assert r.stats["a"].consecutive_failures == 0
@@ -0,0 +1,12 @@
+# tests/test_team_data.py
+import os
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+def test_team_data_does_not_import_scrapers():
+    code = ("import sys; from utils.TeamData import TeamData; t = TeamData('Sevilla FC'); "
+            "assert 'utils.get_previews_matches' not in sys.modules and 'requests' not in sys.modules; "
+            "assert t.slug == 'sev' and 'utils.get_previews_matches' in sys.modules")
+    subprocess.run([sys.executable, "-c", code], check=True, cwd=ROOT)
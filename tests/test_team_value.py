@@ -0,0 +1,56 @@
+# tests/test_team_value.py
+import pytest
+
+from utils import get_team_value as tv
+from utils import transfermarkt
+
+PAGE = """<table class="items"><thead><tr><th>Club</th></tr></thead><tbody>
+<tr class="odd"><td class="hauptlink no-border-links"><a title="Real Madrid" href="/x">Real Madrid</a></td>
+    <td class="rechts">€41.99m</td><td class="rechts"><a>€1.34bn</a></td></tr>
+<tr class="even"><td class="hauptlink no-border-links"><a title="Sevilla FC" href="/y">Sevilla</a></td>
+    <td class="rechts">€6.01m</td><td class="rechts"><a>€180.50m</a></td></tr>
+<tr class="odd"><td class="hauptlink no-border-links"><a title="CD Numancia" href="/z">Numancia</a></td>
+    <td class="rechts">-</td><td class="rechts">-</td></tr>
+</tbody></table>"""
+
+@pytest.fixture(autouse=True)
+def store(monkeypatch):
+    # cada test carga su propio store; el global del módulo se restaura al acabar
+    monkeypatch.setattr(tv, "_STORE", None)
+
+def _load(tmp_path, rows, legacy="{}"):
+    values = tmp_path / "team_values.csv"
+    values.write_text("team,season,value_eur_m\n" + "".join(f"{t},{s},{v}\n" for t, s, v in rows),
+                      encoding="utf-8")
+    legacy_p = tmp_path / "value_cache.json"
+    legacy_p.write_text(legacy, encoding="utf-8")
+    return tv.load_team_values(str(values), str(tmp_path / "no_cpi.csv"), str(legacy_p))
+
+def test_names_and_slug_share_a_row(tmp_path):
+    _load(tmp_path, [("Sevilla FC", 2024, 180.5), ("Brentford", 2024, 400.0)])
+    assert tv.get_team_value("Sevilla", "01/10/24") == 180.5
+    assert tv.get_team_value("sev", "01/10/24") == 180.5
+    assert tv.get_team_value("Brentford", "01/10/24") == 400.0
+    assert tv.get_team_value("Brest", "01/10/24") is None
+
+def test_ambiguous_slug_is_refused(tmp_path):
+    st = _load(tmp_path, [("bre", 2024, 400.0)])
+    assert "bre" in st.refused
+    assert tv.get_team_value("bre", "01/10/24") is None
+    assert tv.get_team_value("Brentford", "01/10/24") is None
+
+def test_implausible_value_is_refused(tmp_path):
+    _load(tmp_path, [], legacy='{"sev|202510": "€5475.00m"}')
+    assert tv.get_team_value("Sevilla", "01/10/25") is None
+
+def test_parse_league_page():
+    assert transfermarkt.parse_league_page(PAGE) == [("Real Madrid", "€1.34bn"), ("Sevilla FC", "€180.50m")]
+
+def test_build_team_values(tmp_path, monkeypatch):
+    monkeypatch.setattr(transfermarkt, "league_values",
+                        lambda code, season, debug=False: transfermarkt.parse_league_page(PAGE) if code == "ES1" else [])
+    path = tmp_path / "team_values.csv"
+    assert tv.build_team_values(str(path), [2024], ["laliga"]) == 2
+    tv.load_team_values(str(path), str(tmp_path / "no_cpi.csv"), str(tmp_path / "none.json"))
+    assert tv.get_team_value("Sevilla", "01/10/24") == 180.5
+    assert tv.get_team_value("Real Madrid CF", "01/03/25") == 1340.0
@@ -0,0 +1,39 @@
+# tests/test_work_queue.py
+import pytest
+
+from utils import feature_cache, negative_cache, rate_limit, sqlite_journal, work_queue
+
+@pytest.fixture
+def fs(monkeypatch):
+    monkeypatch.delenv("CASANDRA_QUEUE_JOURNAL", raising=False)
+    monkeypatch.delenv("CASANDRA_SQLITE_JOURNAL", raising=False)
+    def use(kind):
+        monkeypatch.setattr(sqlite_journal, "_fs_type", lambda path: kind)
+    return use
+
+def _mode(c):
+    return c.execute("PRAGMA journal_mode").fetchone()[0]
+
+def test_network_mount_uses_rollback_journal(tmp_path, fs):
+    fs("nfs4")
+    q = work_queue.WorkQueue(str(tmp_path / "q.sqlite"))
+    assert _mode(q._conn()) == "delete"
+
+def test_local_disk_uses_wal(tmp_path, fs):
+    fs("ext4")
+    q = work_queue.WorkQueue(str(tmp_path / "q.sqlite"))
+    assert _mode(q._conn()) == "wal"
+
+def test_shared_stores_on_network_mount(tmp_path, fs, monkeypatch):
+    fs("cifs")
+    monkeypatch.setattr(rate_limit, "DB_PATH", str(tmp_path / "rate.sqlite"))
+    monkeypatch.setattr(negative_cache, "DB_PATH", str(tmp_path / "neg.sqlite"))
+    assert _mode(rate_limit._conn()) == "delete"
+    assert _mode(negative_cache._conn()) == "delete"
+    assert _mode(feature_cache.FeatureCache(str(tmp_path / "features.sqlite"))._conn()) == "delete"
+
+def test_queue_override(tmp_path, fs, monkeypatch):
+    fs("nfs")
+    monkeypatch.setenv("CASANDRA_QUEUE_JOURNAL", "wal")
+    assert work_queue.journal_mode(str(tmp_path / "q.sqlite")) == "WAL"
+    assert sqlite_journal.journal_mode(str(tmp_path / "neg.sqlite")) == "DELETE"
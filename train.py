@@ -0,0 +1,35 @@
+# train.py
+"""
+Entrenamiento de Casandra a partir de los shards minados (ver mine.py).
+
+    python train.py                                  # ambos modelos, SVM lineal sobre todo el dataset
+    python train.py --path kernel --subsample 20000  # SVC RBF sobre submuestra
+    python train.py --target result --jobs 4
+"""
+
+import argparse
+
+from utils import feature_store
+from utils.train_model import CACHE_DIR, MODELS_DIR, TARGETS, train
+
+def main():
+    ap = argparse.ArgumentParser(description="Entrenamiento de Casandra")
+    ap.add_argument("--features", default=feature_store.FEATURES_DIR)
+    ap.add_argument("--ligas", nargs="*", help="limitar a estas ligas")
+    ap.add_argument("--target", choices=list(TARGETS) + ["both"], default="both")
+    ap.add_argument("--path", choices=["sgd", "kernel"], default="sgd")
+    ap.add_argument("--subsample", type=int, default=20000, help="filas para el camino kernel")
+    ap.add_argument("--epochs", type=int, default=5, help="pasadas de partial_fit (camino sgd)")
+    ap.add_argument("--jobs", type=int, default=-1, help="núcleos para la búsqueda de hiperparámetros")
+    ap.add_argument("--cache", default=CACHE_DIR, help="caché del preprocesado codificado")
+    ap.add_argument("--out", default=MODELS_DIR)
+    ap.add_argument("--debug", action="store_true")
+    args = ap.parse_args()
+
+    targets = TARGETS if args.target == "both" else (args.target,)
+    for t in targets:
+        train(t, args.path, args.features, args.ligas, args.subsample, args.jobs,
+              args.epochs, args.cache, args.out, debug=args.debug)
+
+if __name__ == "__main__":
+    main()
@@ -1,3 +1,7 @@
 LOCAL = 0
 AWAY = 1
 PREVIUS_MATCHES_CONSIDERED = 5
+
+# Caché HTTP compartida (requests_cache, sqlite en cwd)
+HTTP_CACHE_NAME = "sports_http_cache"
+HTTP_CACHE_TTL = 86400  # 24h
@@ -1,11 +1,15 @@
-from utils.get_elo import get_team_elo
+import os
 from datetime import datetime
-from utils.get_match_result import get_match_result
-from utils.get_previews_matches import get_previus_matches
-from utils.get_team_value import get_team_value
+from utils import feature_cache
 from utils.CONSTANTS import LOCAL, AWAY, PREVIUS_MATCHES_CONSIDERED
 
-DEBUG = True
+# Los scrapers se importan dentro de cada set_*: importar Match (p.ej. desde el
+# CLI con predicciones cacheadas) no debe arrastrar requests/bs4/rapidfuzz.
+# Elo, forma y valor pasan por utils.feature_cache (equipo, fecha): al minar, el
+# mismo equipo/fecha se repite entre partidos.
+
+# CASANDRA_DEBUG=0 silencia las trazas de los scrapers
+DEBUG = os.environ.get("CASANDRA_DEBUG", "1") != "0"
 
 class Match:
     def __init__(self,slug, date,  comp, local_data, away_data) -> None:
@@ -13,27 +17,78 @@ class Match:
         self.date = date
         self.comp = comp
         self.teams_data = [local_data,away_data]
+        # etapas que no llegaron a completarse (deadline agotado)
+        self.missing_features = []
+    def mark_missing(self, stage):
+        """Descarta lo que una etapa interrumpida dejó a medias (queda como dato ausente)."""
+        if stage not in self.missing_features:
+            self.missing_features.append(stage)
+        for team in self.teams_data:
+            if stage == "performance":
+                team.previus_results = []
+                team.pgm = team.pge = team.pp = None
+            elif stage == "elo":
+                team.elo = None
+            elif stage == "value":
+                team.vmt = None
+            elif stage == "result":
+                team.scored_goals = None
     def set_teams_elo(self):
+        from utils.get_elo import get_team_elo
         for team in self.teams_data:
-            elo = get_team_elo(team.name, self.date, debug=DEBUG)
+            elo = feature_cache.get_or_compute(
+                "elo", team.name, self.date, lambda: get_team_elo(team.name, self.date, debug=DEBUG))
             print(f'{team.name} : {elo}')
             team.elo = elo
     def set_performance_data(self):
+        from utils.get_previews_matches import get_previus_matches
         for team in self.teams_data:
-            team.previus_results = get_previus_matches(team.name, self.date, PREVIUS_MATCHES_CONSIDERED, debug=DEBUG)
+            team.previus_results = feature_cache.get_or_compute(
+                "form", team.name, self.date,
+                lambda: get_previus_matches(team.name, self.date, PREVIUS_MATCHES_CONSIDERED, debug=DEBUG),
+                n=PREVIUS_MATCHES_CONSIDERED)
             print(f"Mostrando previus results de {team.name}")
             print(  team.previus_results)
             team.set_previus_performance()
     def set_resting_days(self):
         for team in self.teams_data:
-            team.dd = int((datetime.strptime(self.date, "%d/%m/%y") - team.previus_results[0].date).days)
+            if team.previus_results:
+                team.dd = int((datetime.strptime(self.date, "%d/%m/%y") - team.previus_results[0].date).days)
     def set_match_result(self):
-        if match_result:=get_match_result(self.match_slug, self.date, self.comp, debug=DEBUG):
+        from utils.get_match_result import get_match_result
+        if match_result:=get_match_result(tuple(t.name for t in self.teams_data), self.date, self.comp, debug=DEBUG):
             self.teams_data[LOCAL].scored_goals = match_result.local_goals
             self.teams_data[AWAY].scored_goals = match_result.away_goals
     def set_teams_value(self):
+        from utils.get_team_value import get_team_value
         for team in self.teams_data:
-            team.vmt = get_team_value(team.name, self.date, debug=DEBUG)
+            team.vmt = feature_cache.get_or_compute(
+                "value", team.name, self.date, lambda: get_team_value(team.name, self.date, debug=DEBUG))
+    def to_row(self, **extra):
+        """
+            Registro de entrenamiento plano (columnas de utils.feature_store.FEATURE_COLUMNS).
+            'extra' permite añadir contexto del minado (Temporada, Jornada).
+        """
+        local, away = self.teams_data[LOCAL], self.teams_data[AWAY]
+        def _elo(team, i):
+            return team.elo[i] if team.elo else None
+        row = {
+            "Fecha": self.date,
+            "Competición": self.comp,
+            "Local": local.name,
+            "Visitante": away.name,
+            "ELO_L": _elo(local, 1), "RANK_L": _elo(local, 0),
+            "ELO_V": _elo(away, 1), "RANK_V": _elo(away, 0),
+            "PGML": local.pgm, "PGEL": local.pge,
+            "PGMV": away.pgm, "PGEV": away.pge,
+            "PPL": local.pp, "PPV": away.pp,
+            "DD_L": local.dd, "DD_V": away.dd,
+            "VMTL": local.vmt, "VMTV": away.vmt,
+            "GL": local.scored_goals, "GV": away.scored_goals,
+            "Faltantes": ",".join(self.missing_features) or None,
+        }
+        row.update(extra)
+        return row
     def __str__(self):
         return f"""
 
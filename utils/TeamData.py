@@ -5,8 +5,9 @@ class TeamData:
     """
     def __init__(self, team_name):
         self.name = team_name
+        self._slug = None
         self.elo = None
-        self.previus_resuls = []
+        self.previus_results = []
 
         # resting days
         self.dd = None
@@ -26,6 +27,15 @@ class TeamData:
         # recent avg points (3 for win, 1 for draw, 0 for loss)
         self.pp = []
 
+    @property
+    def slug(self):
+        """Slug con el que get_previus_matches etiqueta los Result (se calcula al usarlo:
+        construir un TeamData no debe importar los scrapers)."""
+        if self._slug is None:
+            from utils.get_previews_matches import slugify_team
+            self._slug = slugify_team(self.name)
+        return self._slug
+
     def __str__(self):
         return f"""
             Name :  {self.slug}
@@ -38,16 +48,17 @@ class TeamData:
         """
 
     def set_previus_performance(self):
-        for r in self.previus_resuls:
-            self.pgm.append(r.local_goals if r.local == self.slug else r.away_goals)
-            self.pge.append(r.local_goals if r.local != self.slug else r.away_goals)
-            if (r.local_goals > r.away_goals and r.local == self.slug) or (r.local_goals < r.away_goals and r.away == self.slug):
+        for r in self.previus_results:
+            lg, ag = int(r.local_goals), int(r.away_goals)
+            self.pgm.append(lg if r.local == self.slug else ag)
+            self.pge.append(lg if r.local != self.slug else ag)
+            if (lg > ag and r.local == self.slug) or (lg < ag and r.away == self.slug):
                 self.pp.append(3)
-            elif (r.local_goals == r.away_goals):
+            elif (lg == ag):
                 self.pp.append(1)
             else:
                 self.pp.append(0)
-        self.pgm = np.mean(self.pgm)
-        self.pge = np.mean(self.pge)
-        self.pp = np.mean(self.pp)
+        self.pgm = np.mean(self.pgm) if self.pgm else None
+        self.pge = np.mean(self.pge) if self.pge else None
+        self.pp = np.mean(self.pp) if self.pp else None
 
@@ -0,0 +1,304 @@
+# utils/backtest.py
+"""
+Backtesting walk-forward por temporadas: para cada liga y cada temporada S
+(1999..2025 por defecto) se entrena con las temporadas < S y se evalúa en S.
+
+  1) encode   -> un dataset por liga con utils.train_model.encode (memmap en
+                 cache_dir/<clave>/, reutilizado entre ejecuciones).
+  2) stats    -> máscara de valores ausentes (missing.npy, misma fila que X) y
+                 una pasada por la parte numérica de X que acumula por temporada
+                 y columna (n, suma, suma de cuadrados) de los valores presentes;
+                 se guarda en fold_stats.npz junto a la memmap. El preprocesado
+                 de cada fold (media / desviación de sus temporadas de
+                 entrenamiento) sale de sumas prefijo de esa tabla, sin volver
+                 a leer X.
+  3) folds    -> en paralelo en procesos (joblib); cada worker abre las .npy con
+                 mmap_mode="r" (una vez por proceso) en vez de recibir copias, y
+                 reestandariza solo los chunks que lee.
+
+Por fold: n de entrenamiento / test, accuracy, log-loss, log-loss de la
+distribución de clases del entrenamiento (línea base) y segundos de
+preprocesado / ajuste / evaluación.
+
+Probabilidades calibradas: el softmax de los márgenes de la SVM no es una
+probabilidad (márgenes de decenas de unidades -> confianza 1.0), así que la
+log-loss no sería comparable con la línea base. Dentro de las temporadas < S
+se separa la última como calibración: el modelo se ajusta con las anteriores y
+una regresión logística multinomial sobre sus márgenes (Platt multiclase) se
+ajusta en la de calibración. Accuracy y log-loss salen de esas probabilidades.
+Con una sola temporada de entrenamiento se calibra con su último CAL_FRAC.
+
+Sin información de S ni de temporadas posteriores en el fold: la parte
+numérica se reestandariza con la estadística de las temporadas < S y los
+valores ausentes se imputan a la media de esas temporadas (0 tras
+estandarizar), no a la media global de encode. Las filas sin Temporada
+(season 0) no entran en ningún fold. Las columnas one-hot de equipos que aún
+no habían aparecido valen 0 en todo el entrenamiento del fold (peso nulo).
+
+    res = backtest("result", ligas=["laliga"], desde=1999, hasta=2025, n_jobs=8)
+"""
+
+from __future__ import annotations
+
+import json
+import math
+import os
+import time
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+from utils import feature_store
+from utils.train_model import (CACHE_DIR, CHUNK, EncodedDataset, _expand_scores, _fit_sgd, _num, encode,
+                               iter_batches, target_of)
+
+FIRST_SEASON = 1999
+LAST_SEASON = 2025
+OUT_DIR = "./data/backtests"
+STATS_FILE = "fold_stats.npz"
+MISSING_FILE = "missing.npy"
+
+CAL_FRAC = 0.2           # calibración por filas si solo hay una temporada de entrenamiento
+PROB_FLOOR = 1e-6        # clases sin ejemplos en la calibración
+
+SGD_PARAMS = {"loss": "modified_huber", "alpha": 1e-4}
+KERNEL_PARAMS = {"C": 1.0, "gamma": "scale"}
+
+# ---------- Estadística por temporada (caché del preprocesado) ----------
+def missing_mask(ds: EncodedDataset, paths: List[str], target: str) -> np.ndarray:
+    """Ausentes de la parte numérica (n x k, bool) en el orden de filas de encode (cacheado)."""
+    p = os.path.join(ds.cache_path, MISSING_FILE)
+    if not os.path.exists(p):
+        numeric = ds.encoder.numeric
+        tmp = os.path.join(ds.cache_path, "missing.tmp.npy")
+        M = np.lib.format.open_memmap(tmp, mode="w+", dtype=bool, shape=(len(ds), len(numeric)))
+        pos = 0
+        for batch in iter_batches(paths):
+            rows = [r for r in batch if target_of(r, target) is not None]
+            M[pos:pos + len(rows)] = [[np.isnan(_num(r.get(c))) for c in numeric] for r in rows]
+            pos += len(rows)
+        M.flush()
+        del M
+        os.replace(tmp, p)
+    return np.load(p, mmap_mode="r")
+
+def season_stats(ds: EncodedDataset, missing: np.ndarray) -> Dict[str, np.ndarray]:
+    """seasons, n, s, ss por temporada y columna numérica, solo valores presentes (cacheado)."""
+    p = os.path.join(ds.cache_path, STATS_FILE)
+    if os.path.exists(p):
+        with np.load(p) as z:
+            return {k: z[k] for k in z.files}
+    k = len(ds.encoder.numeric)
+    season = np.asarray(ds.season)
+    seasons = np.unique(season)
+    pos = np.searchsorted(seasons, season)
+    n = np.zeros((len(seasons), k))
+    s = np.zeros((len(seasons), k))
+    ss = np.zeros((len(seasons), k))
+    for i in range(0, len(ds), CHUNK):
+        x = np.asarray(ds.X[i:i + CHUNK, :k], dtype=np.float64)
+        ok = ~np.asarray(missing[i:i + CHUNK])
+        x = np.where(ok, x, 0.0)
+        g = pos[i:i + CHUNK]
+        np.add.at(n, g, ok)
+        np.add.at(s, g, x)
+        np.add.at(ss, g, x * x)
+    out = {"seasons": seasons, "n": n, "s": s, "ss": ss}
+    np.savez(p + ".tmp.npz", **out)
+    os.replace(p + ".tmp.npz", p)
+    return out
+
+def fold_scaler(stats: Dict[str, np.ndarray], season: int) -> Tuple[np.ndarray, np.ndarray]:
+    """(media, desviación) de los valores presentes en las temporadas 0 < t < season."""
+    m = (stats["seasons"] > 0) & (stats["seasons"] < season)
+    n = np.maximum(stats["n"][m].sum(axis=0), 1.0)
+    mean = stats["s"][m].sum(axis=0) / n
+    var = np.maximum(stats["ss"][m].sum(axis=0) / n - mean ** 2, 0.0)
+    return mean, np.where(var > 0, np.sqrt(var), 1.0)
+
+class FoldMatrix:
+    """
+    Vista de X que reestandariza la parte numérica al indexar (sin materializar
+    X entero); los ausentes quedan en 0 = media del fold.
+    """
+
+    def __init__(self, X: np.ndarray, missing: np.ndarray, mean: np.ndarray, std: np.ndarray) -> None:
+        self.X, self.missing, self.k = X, missing, len(mean)
+        self.mean, self.std = mean.astype(np.float32), std.astype(np.float32)
+
+    @property
+    def shape(self) -> Tuple[int, ...]:
+        return self.X.shape
+
+    def __getitem__(self, idx) -> np.ndarray:
+        x = np.array(self.X[idx], dtype=np.float32)
+        num = (x[:, :self.k] - self.mean) / self.std
+        x[:, :self.k] = np.where(self.missing[idx], 0.0, num)
+        return x
+
+# ---------- Worker ----------
+_OPEN: Dict[str, tuple] = {}     # por proceso: cache_path -> (X, missing, y, season, stats)
+
+def _open(cache_path: str) -> tuple:
+    if cache_path not in _OPEN:
+        load = lambda name: np.load(os.path.join(cache_path, name), mmap_mode="r")
+        with np.load(os.path.join(cache_path, STATS_FILE)) as z:
+            stats = {k: z[k] for k in z.files}
+        _OPEN[cache_path] = (load("X.npy"), load(MISSING_FILE), load("y.npy"), np.asarray(load("season.npy")),
+                             stats)
+    return _OPEN[cache_path]
+
+def _prior_log_loss(y_tr: np.ndarray, y_te: np.ndarray, n_classes: int) -> float:
+    p = (np.bincount(y_tr, minlength=n_classes) + 1.0) / (len(y_tr) + n_classes)
+    return float(-np.log(p[y_te]).mean())
+
+def calibration_split(tr: np.ndarray, seasons: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """(ajuste, calibración) dentro del entrenamiento: última temporada, o último CAL_FRAC de filas."""
+    s = seasons[tr]
+    last = s.max()
+    if (s < last).any():
+        return tr[s < last], tr[s == last]
+    cut = int(len(tr) * (1 - CAL_FRAC))
+    return tr[:cut], tr[cut:]
+
+class Calibrator:
+    """Regresión logística multinomial sobre los márgenes del modelo (Platt multiclase)."""
+
+    def __init__(self, model, n_classes: int) -> None:
+        self.model, self.n_classes = model, n_classes
+        self.lr = None
+        self.prior = np.full(n_classes, 1.0 / n_classes)
+
+    def _margins(self, X: np.ndarray) -> np.ndarray:
+        s = _expand_scores(self.model, X, self.n_classes)
+        s = np.where(s < -1e8, 0.0, s)                      # clases que el modelo no vio
+        return (s - self.mu) / self.sd if self.lr is not None else s
+
+    def fit(self, X: np.ndarray, y: np.ndarray) -> "Calibrator":
+        from sklearn.linear_model import LogisticRegression
+        self.prior = (np.bincount(y, minlength=self.n_classes) + 1.0) / (len(y) + self.n_classes)
+        if len(np.unique(y)) < 2:
+            return self                                     # nada que calibrar: distribución de clases
+        raw = self._margins(X)
+        self.mu, self.sd = raw.mean(axis=0), np.where(raw.std(axis=0) > 0, raw.std(axis=0), 1.0)
+        self.lr = LogisticRegression(max_iter=1000).fit((raw - self.mu) / self.sd, y)
+        return self
+
+    def predict_proba(self, X: np.ndarray) -> np.ndarray:
+        if self.lr is None:
+            return np.tile(self.prior, (len(X), 1))
+        p = np.full((len(X), self.n_classes), PROB_FLOOR)
+        p[:, self.lr.classes_] += self.lr.predict_proba(self._margins(X))
+        return p / p.sum(axis=1, keepdims=True)
+
+def _scores(p: np.ndarray, y: np.ndarray) -> Dict[str, float]:
+    if not len(y):
+        return {"accuracy": math.nan, "log_loss": math.nan, "n": 0}
+    return {"accuracy": float((p.argmax(axis=1) == y).mean()),
+            "log_loss": float(-np.log(np.clip(p[np.arange(len(y)), y], 1e-15, 1.0)).mean()),
+            "n": int(len(y))}
+
+def run_fold(cache_path: str, liga: str, season: int, n_classes: int, path_kind: str = "sgd",
+             params: Optional[dict] = None, epochs: int = 5, subsample: int = 20000, seed: int = 0) -> dict:
+    t0 = time.perf_counter()
+    X, missing, y, seasons, stats = _open(cache_path)
+    tr = np.flatnonzero((seasons > 0) & (seasons < season))     # season 0 = sin Temporada: fuera
+    te = np.flatnonzero(seasons == season)
+    fm = FoldMatrix(X, missing, *fold_scaler(stats, season))
+    fit, cal = calibration_split(tr, seasons)
+    t1 = time.perf_counter()
+    if path_kind == "sgd":
+        model = _fit_sgd(fm, y, fit, n_classes, dict(SGD_PARAMS, **(params or {})), epochs, seed)
+    elif path_kind == "kernel":
+        from sklearn.svm import SVC
+        if len(fit) > subsample:
+            fit = np.sort(np.random.default_rng(seed).choice(fit, subsample, replace=False))
+        model = SVC(kernel="rbf", decision_function_shape="ovr",
+                    **dict(KERNEL_PARAMS, **(params or {}))).fit(fm[fit], np.asarray(y[fit]))
+    else:
+        raise ValueError("path_kind debe ser 'sgd' o 'kernel'.")
+    calibrator = Calibrator(model, n_classes).fit(fm[cal], np.asarray(y[cal], dtype=np.int64))
+    t2 = time.perf_counter()
+    y_te = np.asarray(y[te], dtype=np.int64)
+    res = _scores(calibrator.predict_proba(fm[te]), y_te)
+    t3 = time.perf_counter()
+    res.update(league=liga, season=int(season), n_train=int(len(tr)), n_calibration=int(len(cal)),
+               base_log_loss=_prior_log_loss(np.asarray(y[tr], dtype=np.int64), y_te, n_classes),
+               seconds={"prep": round(t1 - t0, 3), "fit": round(t2 - t1, 3), "eval": round(t3 - t2, 3),
+                        "total": round(t3 - t0, 3)},
+               pid=os.getpid())
+    return res
+
+# ---------- Barrido ----------
+def plan_folds(ds: EncodedDataset, desde: int = FIRST_SEASON, hasta: int = LAST_SEASON) -> List[int]:
+    """Temporadas S del rango con datos en S y en alguna temporada anterior."""
+    seasons = np.unique(ds.season)
+    seasons = seasons[seasons > 0]
+    return [int(s) for s in seasons if desde <= s <= hasta and (seasons < s).any()]
+
+def summarize(folds: List[dict]) -> Dict[str, dict]:
+    """Por liga: accuracy media por fold y log-loss ponderada por partidos."""
+    out = {}
+    for liga in sorted({f["league"] for f in folds}):
+        fs = [f for f in folds if f["league"] == liga and f["n"]]
+        n = sum(f["n"] for f in fs)
+        out[liga] = {
+            "folds": len(fs), "n_test": n,
+            "accuracy": round(float(np.mean([f["accuracy"] for f in fs])), 4) if fs else None,
+            "log_loss": round(sum(f["log_loss"] * f["n"] for f in fs) / n, 4) if n else None,
+            "base_log_loss": round(sum(f["base_log_loss"] * f["n"] for f in fs) / n, 4) if n else None,
+            "fit_seconds": round(sum(f["seconds"]["total"] for f in fs), 2),
+        }
+    return out
+
+def _print_fold(f: dict) -> None:
+    print(f"[backtest] {f['league']:<10} {f['season']} train={f['n_train']:>6} test={f['n']:>5} "
+          f"acc={f['accuracy']:.3f} ll={f['log_loss']:.3f} (base {f['base_log_loss']:.3f}) "
+          f"{f['seconds']['total']:.2f}s")
+
+def backtest(target: str = "result", features_dir: str = feature_store.FEATURES_DIR,
+             ligas: Optional[Iterable[str]] = None, desde: int = FIRST_SEASON, hasta: int = LAST_SEASON,
+             path_kind: str = "sgd", params: Optional[dict] = None, epochs: int = 5, subsample: int = 20000,
+             n_jobs: int = -1, cache_dir: str = CACHE_DIR, out: Optional[str] = None,
+             debug: bool = False) -> dict:
+    from joblib import Parallel, delayed
+    from utils.train_model import classes_of
+    t0 = time.perf_counter()
+    ligas = list(ligas) if ligas else sorted({os.path.basename(os.path.dirname(p))
+                                             for p in feature_store.list_shards(features_dir)})
+    tasks = []
+    for liga in ligas:
+        paths = feature_store.list_shards(features_dir, [liga])
+        if not paths:
+            continue
+        ds = encode(paths, target, cache_dir, debug=debug)
+        season_stats(ds, missing_mask(ds, paths, target))
+        tasks += [(ds.cache_path, liga, s) for s in plan_folds(ds, desde, hasta)]
+    if not tasks:
+        raise ValueError(f"Sin folds: no hay temporadas {desde}..{hasta} con historia previa en {features_dir}")
+    t_prep = time.perf_counter() - t0
+
+    n_classes = len(classes_of(target))
+    folds = []
+    for f in Parallel(n_jobs=n_jobs, return_as="generator_unordered")(
+            delayed(run_fold)(p, liga, s, n_classes, path_kind, params, epochs, subsample)
+            for p, liga, s in tasks):
+        folds.append(f)
+        _print_fold(f)
+    folds.sort(key=lambda f: (f["league"], f["season"]))
+
+    res = {
+        "target": target, "path": path_kind, "params": params or {}, "epochs": epochs,
+        "seasons": [desde, hasta], "n_jobs": n_jobs,
+        "seconds": {"prep": round(t_prep, 2), "total": round(time.perf_counter() - t0, 2)},
+        "leagues": summarize(folds), "folds": folds,
+    }
+    out = out or os.path.join(OUT_DIR, f"{target}-{path_kind}.json")
+    os.makedirs(os.path.dirname(out) or ".", exist_ok=True)
+    with open(out, "w", encoding="utf-8") as fh:
+        json.dump(res, fh, indent=2, ensure_ascii=False)
+    for liga, s in res["leagues"].items():
+        print(f"[backtest] {liga}: {s['folds']} folds, acc={s['accuracy']} ll={s['log_loss']} "
+              f"(base {s['base_log_loss']})")
+    print(f"[backtest] {len(folds)} folds en {res['seconds']['total']:.1f}s -> {out}")
+    return res
@@ -0,0 +1,83 @@
+# utils/deadline.py
+"""
+Deadline de extremo a extremo para get_match_features y todo lo que llama.
+
+Un partido tiene un presupuesto de tiempo total; cada fetch (timeout HTTP,
+espera del rate limiter, backoff, hedging) usa como máximo lo que queda:
+
+    with deadline.scope(20):                      # 20 s para todo el partido
+        r = s.get(url, timeout=deadline.timeout(REQ_TIMEOUT))
+        deadline.sleep(backoff)                   # DeadlineExceeded si no cabe
+
+El deadline vive en un ContextVar (hereda a las tareas lanzadas con
+contextvars.copy_context(), como hace utils.source_router); los scopes anidados
+solo pueden acortarlo. Sin scope activo todo se comporta como antes.
+
+DeadlineExceeded hereda de BaseException (como asyncio.CancelledError): los
+"except Exception" de los scrapers, pensados para errores de red, no lo
+tragan, y sube hasta get_match_features, que marca la etapa como faltante y
+sigue con las demás.
+"""
+
+from __future__ import annotations
+
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Iterator, Optional
+
+from utils import metrics
+
+MIN_TIMEOUT = 0.5      # no lanzar requests con menos margen que esto
+
+_DEADLINE: ContextVar[Optional[float]] = ContextVar("casandra_deadline", default=None)
+
+class DeadlineExceeded(BaseException):
+    """Se agotó el tiempo total de la operación en curso."""
+
+@contextmanager
+def scope(seconds: Optional[float]) -> Iterator[None]:
+    """Fija un deadline de 'seconds' (None = sin cambio); nunca alarga uno exterior."""
+    if seconds is None:
+        yield
+        return
+    new = time.monotonic() + seconds
+    cur = _DEADLINE.get()
+    token = _DEADLINE.set(new if cur is None else min(cur, new))
+    try:
+        yield
+    finally:
+        _DEADLINE.reset(token)
+
+def remaining() -> Optional[float]:
+    """Segundos que quedan (None = sin deadline)."""
+    d = _DEADLINE.get()
+    return None if d is None else d - time.monotonic()
+
+def expired() -> bool:
+    r = remaining()
+    return r is not None and r <= 0
+
+def check(what: str = "") -> None:
+    r = remaining()
+    if r is not None and r <= 0:
+        metrics.inc("deadline_exceeded_total", at=what or "check")
+        raise DeadlineExceeded(what or "deadline")
+
+def timeout(default: float, what: str = "request") -> float:
+    """Timeout para un request: min(default, lo que queda); excepción si no queda margen."""
+    r = remaining()
+    if r is None:
+        return default
+    if r < MIN_TIMEOUT:
+        metrics.inc("deadline_exceeded_total", at=what)
+        raise DeadlineExceeded(what)
+    return min(default, r)
+
+def sleep(seconds: float, what: str = "sleep") -> None:
+    """time.sleep que no supera el deadline: si la espera no cabe, falla ya."""
+    r = remaining()
+    if r is not None and seconds >= r:
+        metrics.inc("deadline_exceeded_total", at=what)
+        raise DeadlineExceeded(what)
+    time.sleep(seconds)
@@ -0,0 +1,280 @@
+# utils/elo_engine.py
+"""
+Motor Elo propio, calculado sobre el histórico local (utils.match_store).
+
+Reemplazo offline de get_team_elo: en vez de descargar el CSV de ClubElo de cada
+fecha, se recorren los partidos día a día y se guardan los ratings y rankings
+de todos los equipos tras cada jornada de partidos:
+
+    hist = build(load_match_store())          # reconstrucción completa (segundos)
+    hist.ratings   # (n_días, n_equipos) float32, NaN = equipo aún sin partidos
+    hist.ranks     # (n_días, n_equipos) int32, 0 = sin ranking
+    get_team_elo_local("Sevilla", "05/10/25", hist)  -> (rank, elo) como get_team_elo
+
+Actualización por día (vectorizada sobre los partidos del día):
+    E  = 1 / (1 + 10^(-(R_local + HOME_ADV - R_visit) / 400))
+    Δ  = K · G(|dif. goles|) · (S - E)          S ∈ {1, 0.5, 0}
+    G  = 1 | 1.5 | (11 + dif) / 8               (escala de World Football Elo)
+
+hist.update(store) procesa solo los partidos nuevos del store: O(partidos nuevos)
+(se rehace, como mucho, el último día si llegaron más partidos de esa fecha).
+
+validate(hist, store) compara con los valores de ClubElo ya cacheados (modo
+offline: no hace requests).
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import random
+from dataclasses import asdict, dataclass
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from utils.match_store import MatchStore, load_match_store, normalize_team, to_day
+
+ELO_DIR = "./data/elo"
+
+@dataclass(frozen=True)
+class EloConfig:
+    k: float = 20.0
+    home_adv: float = 65.0
+    initial: float = 1500.0
+    gd_scaling: bool = True
+
+def _gd_multiplier(gd: np.ndarray) -> np.ndarray:
+    gd = np.abs(gd).astype(np.float64)
+    return np.where(gd <= 1, 1.0, np.where(gd == 2, 1.5, (11.0 + gd) / 8.0))
+
+def _rank_row(r: np.ndarray) -> np.ndarray:
+    """Posición por Elo descendente entre equipos con rating (0 = sin rating)."""
+    missing = np.isnan(r)
+    order = np.argsort(-np.where(missing, -np.inf, r), kind="stable")
+    ranks = np.empty(len(r), dtype=np.int32)
+    ranks[order] = np.arange(1, len(r) + 1, dtype=np.int32)
+    ranks[missing] = 0
+    return ranks
+
+class EloHistory:
+    """Ratings tras cada día con partidos; se amplía con update()."""
+
+    def __init__(self, config: EloConfig = EloConfig()) -> None:
+        self.config = config
+        self.teams: List[str] = []
+        self.team_idx: Dict[str, int] = {}
+        self.n_matches = 0
+        self._days: List[np.datetime64] = []
+        self._rows: List[np.ndarray] = []      # rating tras cada día (NaN = sin partidos)
+        self._rank_rows: List[np.ndarray] = []
+        self._current = np.empty(0)
+        self._arrays: Optional[Tuple[np.ndarray, np.ndarray, np.ndarray]] = None
+
+    # ---------- cálculo ----------
+    def _sync_teams(self, store: MatchStore) -> None:
+        n_new = store.n_teams - len(self._current)
+        if n_new > 0:
+            self._current = np.concatenate([self._current, np.full(n_new, np.nan)])
+        self.teams = list(store.teams)
+        self.team_idx = dict(store.team_idx)
+
+    def _apply_day(self, h: np.ndarray, a: np.ndarray, hg: np.ndarray, ag: np.ndarray) -> None:
+        cfg = self.config
+        r = self._current
+        for idx in (h, a):
+            unseen = np.isnan(r[idx])
+            r[idx[unseen]] = cfg.initial
+        diff = r[h] + cfg.home_adv - r[a]
+        expected = 1.0 / (1.0 + 10.0 ** (-diff / 400.0))
+        gd = hg.astype(np.int32) - ag
+        score = np.where(gd > 0, 1.0, np.where(gd == 0, 0.5, 0.0))
+        k = cfg.k * (_gd_multiplier(gd) if cfg.gd_scaling else 1.0)
+        delta = k * (score - expected)
+        np.add.at(r, h, delta)       # add.at: un equipo con dos partidos el mismo día
+        np.add.at(r, a, -delta)
+
+    def update(self, store: MatchStore, start: Optional[int] = None) -> int:
+        """
+        Procesa los partidos del store a partir de 'start' (por defecto, los no vistos).
+        Si el primer día a procesar ya estaba calculado, se rehace desde ese día.
+        Devuelve el número de partidos procesados.
+        """
+        self._sync_teams(store)
+        start = self.n_matches if start is None else start
+        if start >= len(store):
+            return 0
+        first_day = store.dates[start]
+        # retroceder al estado anterior a first_day
+        keep = int(np.searchsorted(np.asarray(self._days, dtype="datetime64[D]"), first_day, side="left"))
+        if keep < len(self._days):
+            self._days, self._rows, self._rank_rows = self._days[:keep], self._rows[:keep], self._rank_rows[:keep]
+            self._current = self._rows[-1].astype(np.float64) if self._rows else np.empty(0)
+            self._sync_teams(store)
+            start = int(np.searchsorted(store.dates, first_day, side="left"))
+
+        days, starts = store.match_days(start)
+        ends = np.append(starts[1:], len(store))
+        for day, s, e in zip(days, starts, ends):
+            self._apply_day(store.home[s:e], store.away[s:e], store.hg[s:e], store.ag[s:e])
+            self._days.append(day)
+            self._rows.append(self._current.astype(np.float32))
+            self._rank_rows.append(_rank_row(self._rows[-1]))
+        self.n_matches = len(store)
+        self._arrays = None
+        return len(store) - start
+
+    # ---------- arrays ----------
+    def arrays(self) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """(días, ratings (n_días, n_equipos), ranks (n_días, n_equipos))."""
+        if self._arrays is None:
+            n = len(self.teams)
+            days = np.asarray(self._days, dtype="datetime64[D]")
+            ratings = np.full((len(self._rows), n), np.nan, dtype=np.float32)
+            ranks = np.zeros((len(self._rows), n), dtype=np.int32)
+            for i, (row, rk) in enumerate(zip(self._rows, self._rank_rows)):
+                ratings[i, :len(row)] = row
+                ranks[i, :len(rk)] = rk
+            self._arrays = (days, ratings, ranks)
+        return self._arrays
+
+    @property
+    def days(self) -> np.ndarray:
+        return self.arrays()[0]
+
+    @property
+    def ratings(self) -> np.ndarray:
+        return self.arrays()[1]
+
+    @property
+    def ranks(self) -> np.ndarray:
+        return self.arrays()[2]
+
+    def row_before(self, fecha) -> int:
+        """Fila con el estado previo a 'fecha' (último día con partidos < fecha); -1 si no hay."""
+        return int(np.searchsorted(self.days, to_day(fecha), side="left")) - 1
+
+    def rating(self, team_name: str, fecha) -> Optional[Tuple[int, int]]:
+        i = self.team_idx.get(normalize_team(team_name))
+        row = self.row_before(fecha)
+        if i is None or row < 0:
+            return None
+        days, ratings, ranks = self.arrays()
+        elo = ratings[row, i]
+        if np.isnan(elo):
+            return None
+        return int(ranks[row, i]), int(round(float(elo)))
+
+    # ---------- persistencia ----------
+    def save(self, path: str = os.path.join(ELO_DIR, "elo_history.npz")) -> str:
+        d = os.path.dirname(path)
+        if d:
+            os.makedirs(d, exist_ok=True)
+        days, ratings, ranks = self.arrays()
+        tmp = path + ".tmp.npz"
+        np.savez(tmp, days=days, ratings=ratings, ranks=ranks, teams=np.asarray(self.teams, dtype=object),
+                 n_matches=np.int64(self.n_matches), config=json.dumps(asdict(self.config)))
+        os.replace(tmp, path)
+        return path
+
+    @classmethod
+    def load(cls, path: str = os.path.join(ELO_DIR, "elo_history.npz")) -> "EloHistory":
+        z = np.load(path, allow_pickle=True)
+        h = cls(EloConfig(**json.loads(str(z["config"]))))
+        h.teams = list(z["teams"])
+        h.team_idx = {normalize_team(t): i for i, t in enumerate(h.teams)}
+        h.n_matches = int(z["n_matches"])
+        days, ratings, ranks = z["days"], z["ratings"], z["ranks"]
+        h._days = list(days)
+        h._rows = list(ratings)
+        h._rank_rows = list(ranks)
+        h._current = ratings[-1].astype(np.float64) if len(ratings) else np.full(len(h.teams), np.nan)
+        h._arrays = (days, ratings, ranks)
+        return h
+
+def build(store: MatchStore, config: EloConfig = EloConfig()) -> EloHistory:
+    """Reconstrucción completa del histórico."""
+    h = EloHistory(config)
+    h.update(store, start=0)
+    return h
+
+# ---------- API compatible con get_team_elo ----------
+_DEFAULT: Optional[EloHistory] = None
+
+def default_history(refresh: bool = False) -> EloHistory:
+    """Histórico a partir de los shards; se actualiza incrementalmente si hay partidos nuevos."""
+    global _DEFAULT
+    if _DEFAULT is None or refresh:
+        store = load_match_store()
+        path = os.path.join(ELO_DIR, "elo_history.npz")
+        hist = None
+        if os.path.exists(path) and not refresh:
+            hist = EloHistory.load(path)
+            n = hist.n_matches
+            if (hist.teams != store.teams[:len(hist.teams)] or n > len(store)
+                    or (n and store.dates[n - 1] != hist.days[-1])):
+                hist = None  # store reordenado / distinto: reconstruir
+        if hist is None:
+            hist = build(store)
+            hist.save(path)
+        elif hist.update(store):
+            hist.save(path)
+        _DEFAULT = hist
+    return _DEFAULT
+
+def get_team_elo_local(team_name: str, fecha: str, history: Optional[EloHistory] = None) -> Optional[Tuple[int, int]]:
+    """(ranking, elo) del equipo antes de la fecha 'dd/mm/aa', sin red (mismo formato que get_team_elo)."""
+    return (history or default_history()).rating(team_name, fecha)
+
+# ---------- Validación contra ClubElo ----------
+def _spearman(x: np.ndarray, y: np.ndarray) -> float:
+    rx = np.argsort(np.argsort(x)).astype(np.float64)
+    ry = np.argsort(np.argsort(y)).astype(np.float64)
+    return float(np.corrcoef(rx, ry)[0, 1])
+
+def validate(history: EloHistory, store: MatchStore, sample: int = 200, seed: int = 0,
+             debug: bool = False) -> dict:
+    """
+    Compara el Elo local con ClubElo para una muestra de (equipo, fecha) del store,
+    usando solo respuestas ya cacheadas (utils.offline). Devuelve correlaciones
+    de Elo y de ranking relativo, sesgo medio y error absoluto medio sin sesgo.
+    """
+    from utils import offline
+    from utils.get_elo import get_team_elo
+
+    rng = random.Random(seed)
+    idx = list(range(len(store)))
+    rng.shuffle(idx)
+    pairs = []
+    was_offline = offline.is_enabled()
+    offline.enable(True)
+    try:
+        for i in idx:
+            if len(pairs) >= sample:
+                break
+            team = store.teams[int(store.home[i])]
+            fecha = str(store.dates[i].astype("datetime64[D]").item().strftime("%d/%m/%y"))
+            local = history.rating(team, fecha)
+            if local is None:
+                continue
+            ref = get_team_elo(team, fecha, back_days=0)
+            if ref is None:
+                continue
+            pairs.append((local[1], ref[1], local[0], ref[0]))
+            if debug:
+                print(f"[elo-val] {team} {fecha}: local={local} clubelo={ref}")
+    finally:
+        offline.enable(was_offline)
+
+    out = {"sample": sample, "compared": len(pairs)}
+    if len(pairs) < 3:
+        return out
+    a = np.asarray(pairs, dtype=np.float64)
+    bias = float((a[:, 0] - a[:, 1]).mean())
+    out.update({
+        "elo_pearson": round(float(np.corrcoef(a[:, 0], a[:, 1])[0, 1]), 4),
+        "rank_spearman": round(_spearman(a[:, 2], a[:, 3]), 4),
+        "elo_bias": round(bias, 1),
+        "elo_mae_unbiased": round(float(np.abs(a[:, 0] - a[:, 1] - bias).mean()), 1),
+    })
+    return out
@@ -0,0 +1,222 @@
+# utils/feature_cache.py
+"""
+Caché point-in-time de features por (equipo canónico, fecha, versión de feature).
+
+Un equipo juega ~1 vez por semana y, al minar, la misma ventana de partidos
+previos / el mismo Elo / el mismo valor de mercado se piden una y otra vez
+(el equipo aparece como local, como visitante y en varias jornadas/ligas).
+Match consulta esta caché antes de llamar a los scrapers:
+
+    previus = feature_cache.get_or_compute("form", team.name, fecha, fn, n=5)
+
+Claves: (feature, FEATURE_VERSIONS[feature], equipo canónico, periodo, extra).
+El equipo pasa por unslug_team.canonical_team ('Sevilla FC', 'Sevilla' y el slug
+'sev' comparten entradas). El periodo es la fecha ISO salvo en las features de
+PERIODS: el valor de mercado es por temporada y se guarda una vez por
+(equipo, temporada) en vez de una por día de partido. Subir la versión de una feature en FEATURE_VERSIONS invalida sus entradas (en
+memoria y en disco). Los resultados vacíos (None / []) no se cachean: pueden
+deberse a un fallo transitorio de red.
+
+Persistencia opcional en SQLite (CASANDRA_FEATURE_CACHE=<ruta> o
+FeatureCache(path); journal según utils.sqlite_journal); por defecto solo
+memoria del proceso. En memoria se guardan como mucho MEM_MAX entradas
+(CASANDRA_FEATURE_CACHE_MEM); al pasarse se descartan las más antiguas, que al
+minar en orden son fechas ya superadas.
+Estadísticas: stats() y metrics 'feature_cache_total{feature,result=hit|miss}'.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import sqlite3
+import threading
+from datetime import datetime
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from utils import metrics, singleflight, sqlite_journal
+
+# Versión de la definición de cada feature: subirla al cambiar cómo se calcula.
+FEATURE_VERSIONS: Dict[str, int] = {
+    "elo": 1,
+    "form": 1,
+    "value": 3,
+}
+
+# Features que no cambian dentro de una temporada: la clave usa el año de inicio.
+PERIODS: Dict[str, str] = {
+    "value": "season",
+}
+
+MEM_MAX = int(os.environ.get("CASANDRA_FEATURE_CACHE_MEM", "50000"))
+
+# ---------- (de)serialización para disco ----------
+def _encode_form(results) -> list:
+    return [[r.local, r.away, r.local_goals, r.away_goals, r.date.isoformat()] for r in results]
+
+def _decode_form(raw: list):
+    from utils.Result import Result
+    return [Result(l, a, lg, ag, datetime.fromisoformat(d)) for l, a, lg, ag, d in raw]
+
+_CODECS: Dict[str, Tuple[Callable[[Any], Any], Callable[[Any], Any]]] = {
+    "elo": (list, tuple),
+    "form": (_encode_form, _decode_form),
+    "value": (float, float),
+}
+
+def _date_key(fecha, period: Optional[str] = None) -> str:
+    if isinstance(fecha, str):
+        fecha = datetime.strptime(fecha, "%d/%m/%y")
+    if period == "season":
+        return str(fecha.year if fecha.month >= 7 else fecha.year - 1)
+    return fecha.strftime("%Y-%m-%d")
+
+def _team_key(team_name: str) -> str:
+    from utils.unslug_team import canonical_team, club_key
+    # slug ambiguo (None): se queda con su propia clave
+    return canonical_team(team_name) or club_key(team_name)
+
+class FeatureCache:
+    def __init__(self, path: Optional[str] = None, mem_max: Optional[int] = None) -> None:
+        self.path = path
+        self.mem_max = MEM_MAX if mem_max is None else mem_max
+        self._mem: Dict[tuple, Any] = {}
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self.hits: Dict[str, int] = {}
+        self.misses: Dict[str, int] = {}
+        if path:
+            self._purge_old_versions()
+
+    # ---------- disco ----------
+    def _conn(self) -> sqlite3.Connection:
+        c = getattr(self._local, "conn", None)
+        if c is None:
+            d = os.path.dirname(self.path)
+            if d:
+                os.makedirs(d, exist_ok=True)
+            c = sqlite3.connect(self.path, timeout=30)
+            c.execute(f"PRAGMA journal_mode={sqlite_journal.journal_mode(self.path)}")
+            c.execute("""CREATE TABLE IF NOT EXISTS features (
+                             feature TEXT, version INTEGER, team TEXT, fecha TEXT, extra TEXT,
+                             value TEXT, PRIMARY KEY (feature, version, team, fecha, extra))""")
+            self._local.conn = c
+        return c
+
+    def _purge_old_versions(self) -> None:
+        c = self._conn()
+        with c:
+            for feature, version in FEATURE_VERSIONS.items():
+                c.execute("DELETE FROM features WHERE feature=? AND version<>?", (feature, version))
+
+    def _disk_get(self, key: tuple) -> Tuple[bool, Any]:
+        row = self._conn().execute(
+            "SELECT value FROM features WHERE feature=? AND version=? AND team=? AND fecha=? AND extra=?",
+            key).fetchone()
+        if row is None:
+            return False, None
+        return True, _CODECS[key[0]][1](json.loads(row[0]))
+
+    def _disk_put(self, key: tuple, value: Any) -> None:
+        c = self._conn()
+        with c:
+            c.execute("INSERT OR REPLACE INTO features VALUES (?,?,?,?,?,?)",
+                      (*key, json.dumps(_CODECS[key[0]][0](value))))
+
+    # ---------- API ----------
+    def key(self, feature: str, team_name: str, fecha, **extra) -> tuple:
+        return (feature, FEATURE_VERSIONS.get(feature, 0), _team_key(team_name),
+                _date_key(fecha, PERIODS.get(feature)), json.dumps(extra, sort_keys=True) if extra else "")
+
+    def _count(self, feature: str, hit: bool) -> None:
+        with self._lock:
+            d = self.hits if hit else self.misses
+            d[feature] = d.get(feature, 0) + 1
+        metrics.inc("feature_cache_total", feature=feature, result="hit" if hit else "miss")
+
+    def _remember(self, k: tuple, value: Any) -> None:
+        with self._lock:
+            self._mem[k] = value
+            while len(self._mem) > self.mem_max:
+                del self._mem[next(iter(self._mem))]     # orden de inserción: la más antigua
+
+    def get_or_compute(self, feature: str, team_name: str, fecha, compute: Callable[[], Any], **extra) -> Any:
+        k = self.key(feature, team_name, fecha, **extra)
+        with self._lock:
+            found = k in self._mem
+            value = self._mem.get(k)
+        if not found and self.path:
+            found, value = self._disk_get(k)
+            if found:
+                self._remember(k, value)
+        if found:
+            self._count(feature, True)
+            return value
+
+        self._count(feature, False)
+        # dos hilos con la misma clave (local y visitante de partidos distintos) calculan una vez
+        value = singleflight.group("feature_cache").do(k, compute)
+        if value is None or (isinstance(value, list) and not value):
+            return value
+        self._remember(k, value)
+        if self.path:
+            self._disk_put(k, value)
+        return value
+
+    def invalidate(self, feature: Optional[str] = None) -> None:
+        """Vacía la caché (de una feature o entera), en memoria y en disco."""
+        with self._lock:
+            self._mem = {k: v for k, v in self._mem.items() if feature and k[0] != feature}
+        if self.path:
+            c = self._conn()
+            with c:
+                if feature:
+                    c.execute("DELETE FROM features WHERE feature=?", (feature,))
+                else:
+                    c.execute("DELETE FROM features")
+
+    def invalidate_team(self, team_name: str, feature: Optional[str] = None) -> int:
+        """Borra las entradas de un equipo (p.ej. su forma tras un resultado nuevo). Devuelve cuántas."""
+        team = _team_key(team_name)
+        hit = lambda k: k[2] == team and (not feature or k[0] == feature)
+        with self._lock:
+            n = sum(1 for k in self._mem if hit(k))
+            self._mem = {k: v for k, v in self._mem.items() if not hit(k)}
+        if self.path:
+            c = self._conn()
+            with c:
+                sql, args = "DELETE FROM features WHERE team=?", [team]
+                if feature:
+                    sql += " AND feature=?"
+                    args.append(feature)
+                n = max(n, c.execute(sql, args).rowcount)
+        return n
+
+    def stats(self) -> Dict[str, dict]:
+        with self._lock:
+            feats = set(self.hits) | set(self.misses)
+            out = {}
+            for f in sorted(feats):
+                h, m = self.hits.get(f, 0), self.misses.get(f, 0)
+                out[f] = {"hits": h, "misses": m, "hit_rate": round(h / (h + m), 3) if h + m else 0.0}
+            out["_entries"] = len(self._mem)
+            return out
+
+_DEFAULT: Optional[FeatureCache] = None
+_DEFAULT_LOCK = threading.Lock()
+
+def default_cache() -> FeatureCache:
+    global _DEFAULT
+    with _DEFAULT_LOCK:
+        if _DEFAULT is None:
+            _DEFAULT = FeatureCache(os.environ.get("CASANDRA_FEATURE_CACHE") or None)
+        return _DEFAULT
+
+def get_or_compute(feature: str, team_name: str, fecha, compute: Callable[[], Any], **extra) -> Any:
+    return default_cache().get_or_compute(feature, team_name, fecha, compute, **extra)
+
+def stats() -> Dict[str, dict]:
+    return default_cache().stats()
+
+def invalidate_team(team_name: str, feature: Optional[str] = None) -> int:
+    return default_cache().invalidate_team(team_name, feature)
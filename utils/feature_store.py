@@ -0,0 +1,120 @@
+# utils/feature_store.py
+"""
+Shards de features minadas (CSV, uno por liga y temporada):
+
+    data/features/<liga>/<temporada>.csv
+
+Cada fila es Match.to_row() + contexto del minado (Temporada, Jornada).
+La escritura es incremental (append + flush por fila) y la lectura es un
+generador, de modo que ni el minado ni el entrenamiento cargan todo en memoria.
+"""
+
+from __future__ import annotations
+
+import csv
+import glob
+import os
+from typing import Dict, Iterable, Iterator, List, Optional
+
+FEATURES_DIR = "./data/features"
+
+FEATURE_COLUMNS: List[str] = [
+    "Fecha", "Competición", "Temporada", "Jornada", "Local", "Visitante",
+    "ELO_L", "RANK_L", "ELO_V", "RANK_V",
+    "PGML", "PGEL", "PGMV", "PGEV",
+    "PPL", "PPV",
+    "DD_L", "DD_V",
+    "VMTL", "VMTV",
+    "GL", "GV",
+    "Faltantes",          # etapas sin datos por deadline (utils.deadline), separadas por ','
+]
+
+def shard_path(liga: str, temporada: int, root: str = FEATURES_DIR) -> str:
+    return os.path.join(root, liga, f"{temporada}.csv")
+
+def list_shards(root: str = FEATURES_DIR, ligas: Optional[Iterable[str]] = None) -> List[str]:
+    """Shards ordenados por (liga, temporada)."""
+    ligas = set(ligas) if ligas else None
+    out = []
+    for p in glob.glob(os.path.join(root, "*", "*.csv")):
+        liga = os.path.basename(os.path.dirname(p))
+        if ligas and liga not in ligas:
+            continue
+        out.append(p)
+    return sorted(out, key=lambda p: (os.path.basename(os.path.dirname(p)), os.path.basename(p)))
+
+def _fmt(v) -> str:
+    if v is None:
+        return ""
+    if isinstance(v, float):
+        return f"{v:.6g}"
+    return str(v)
+
+def _header(path: str) -> Optional[List[str]]:
+    with open(path, "r", encoding="utf-8", newline="") as f:
+        return next(csv.reader(f), None)
+
+def _migrate(path: str, header: List[str]) -> List[str]:
+    """
+    Reescribe un shard cuya cabecera no es FEATURE_COLUMNS (shard anterior a una
+    columna nueva, p.ej. Faltantes): las columnas nuevas quedan vacías en las
+    filas viejas y las que ya no existen se conservan al final. Devuelve la
+    cabecera resultante.
+    """
+    columns = FEATURE_COLUMNS + [c for c in header if c not in FEATURE_COLUMNS]
+    if header == columns:
+        return columns
+    tmp = path + ".tmp"
+    with open(path, "r", encoding="utf-8", newline="") as src, open(tmp, "w", encoding="utf-8", newline="") as dst:
+        w = csv.DictWriter(dst, fieldnames=columns, restval="")
+        w.writeheader()
+        for row in csv.DictReader(src):
+            w.writerow(row)
+    os.replace(tmp, path)
+    return columns
+
+class ShardWriter:
+    """
+    Escritor append-only de un shard; escribe cabecera si el fichero es nuevo.
+    Un shard existente con otra cabecera se migra antes de añadir filas (ver
+    _migrate): ninguna columna de las filas nuevas se pierde.
+    """
+
+    def __init__(self, path: str) -> None:
+        d = os.path.dirname(path)
+        if d:
+            os.makedirs(d, exist_ok=True)
+        new = not os.path.exists(path) or os.path.getsize(path) == 0
+        self.path = path
+        self.columns = FEATURE_COLUMNS if new else _migrate(path, _header(path) or FEATURE_COLUMNS)
+        self._f = open(path, "a", encoding="utf-8", newline="")
+        self._w = csv.DictWriter(self._f, fieldnames=self.columns, extrasaction="ignore")
+        if new:
+            self._w.writeheader()
+            self._f.flush()
+
+    def write(self, row: Dict) -> None:
+        self._w.writerow({k: _fmt(row.get(k)) for k in self.columns})
+        self._f.flush()
+
+    def close(self) -> None:
+        self._f.close()
+
+    def __enter__(self) -> "ShardWriter":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+def iter_rows(paths: Iterable[str]) -> Iterator[Dict[str, str]]:
+    """Filas (dict de strings; '' = ausente) de los shards, en orden."""
+    for p in paths:
+        with open(p, "r", encoding="utf-8", newline="") as f:
+            for row in csv.DictReader(f):
+                yield row
+
+def done_keys(path: str) -> set:
+    """(Fecha, Local, Visitante) ya presentes en un shard (para reanudar minados)."""
+    if not os.path.exists(path):
+        return set()
+    return {(r["Fecha"], r["Local"], r["Visitante"]) for r in iter_rows([path])}
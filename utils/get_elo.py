@@ -9,6 +9,8 @@ from typing import List, Tuple, Optional, Iterable, Dict, Set
 import unicodedata
 import requests
 
+from utils import deadline, http_cache, metrics, negative_cache, offline, rate_limit, singleflight
+
 # ---------- Config ----------
 UA = [
     "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/124.0 Safari/537.36",
@@ -20,10 +22,17 @@ def _headers():
         "User-Agent": random.choice(UA),
         "Accept-Language": "en-US,en;q=0.9,es;q=0.8",
         "Referer": "https://clubelo.com/",
-        "Cache-Control": "no-cache",
-        "Pragma": "no-cache",
     }
 
+# días distintos sin fila (en una misma temporada) a partir de los cuales el equipo
+# cuenta como ausente esa temporada (más que una ventana back_days por defecto:
+# hacen falta al menos dos fechas consultadas)
+TEAM_MISS_DAYS = 8
+
+def _season(d: datetime) -> int:
+    """Año de inicio de la temporada (julio en adelante = temporada nueva)."""
+    return d.year if d.month >= 7 else d.year - 1
+
 # ---------- Normalización ----------
 _WORDS_TO_DROP: Set[str] = {
     # genéricos multi-idioma
@@ -138,24 +147,38 @@ def _alias_variants_from_name(team_name: str) -> List[str]:
 
 # ---------- HTTP robusto con backoff ----------
 def _robust_get(url: str, max_retries=5, base_delay=1.2, debug=False) -> requests.Response:
+    if offline.is_enabled():
+        return offline.cached_get(url, "clubelo", _headers())
+    http_cache.ensure_installed()
     s = requests.Session()
     for i in range(max_retries):
-        r = s.get(url, headers=_headers(), timeout=25)
+        rate_limit.acquire(url)
+        t0 = time.perf_counter()
+        try:
+            r = s.get(url, headers=_headers(), timeout=deadline.timeout(25))
+        except Exception:
+            metrics.record_request("clubelo", url, "error", time.perf_counter() - t0)
+            raise
+        from_cache = http_cache.from_cache(r, "clubelo")
+        metrics.record_request("clubelo", url, r.status_code, time.perf_counter() - t0, from_cache=from_cache)
+        rate_limit.feedback(url, r.status_code, r.headers, from_cache=from_cache)
         if debug:
             print(f"[ClubElo] GET {r.status_code} {url}")
         if r.status_code == 429:
-            ra = r.headers.get("Retry-After")
-            if ra and ra.isdigit():
-                wait = int(ra)
-            else:
+            wait = rate_limit.retry_after(r.headers)
+            if wait is None:
                 wait = base_delay * (2 ** i) + random.uniform(0, 0.8)
             if debug: print(f"[backoff] 429 -> sleep {wait:.1f}s")
-            time.sleep(wait)
+            metrics.record_retry("clubelo", url, 429, wait)
+            deadline.sleep(wait)
             continue
         if 500 <= r.status_code < 600:
-            wait = base_delay * (2 ** i) + random.uniform(0, 0.8)
+            wait = rate_limit.retry_after(r.headers)
+            if wait is None:
+                wait = base_delay * (2 ** i) + random.uniform(0, 0.8)
             if debug: print(f"[backoff] {r.status_code} -> sleep {wait:.1f}s")
-            time.sleep(wait)
+            metrics.record_retry("clubelo", url, r.status_code, wait)
+            deadline.sleep(wait)
             continue
         r.raise_for_status()
         return r
@@ -185,6 +208,45 @@ def _row_club_name(row: dict) -> Optional[str]:
             return row[k]
     return None
 
+# ---------- Tabla diaria (compartida entre llamantes concurrentes) ----------
+_DAYS = singleflight.group("clubelo_day")
+
+def _fetch_day_table(url: str, debug: bool=False) -> Optional[Tuple[List[dict], Dict[str, int]]]:
+    """CSV del día -> (filas con Elo válido ordenadas por Elo desc, {club normalizado: ranking})."""
+    resp = _robust_get(url, debug=debug)
+    # el CSV de hoy se re-descarga al caducar la caché; si no cambió, no se re-parsea
+    return http_cache.parsed("clubelo_day", resp.content, lambda: _day_table_from_csv(resp.text))
+
+def _day_table_from_csv(text: str) -> Optional[Tuple[List[dict], Dict[str, int]]]:
+    rows = _parse_csv(text)
+    if not rows:
+        return None
+
+    # conservar solo filas con Elo válido
+    scored = []
+    for r in rows:
+        elo = _extract_elo(r)
+        if elo is None:
+            continue
+        scored.append((elo, r))
+    if not scored:
+        return None
+
+    # ranking por Elo descendente
+    scored.sort(key=lambda t: t[0], reverse=True)
+    rank_map: Dict[str, int] = {}
+    flat_rows: List[dict] = []
+    for idx, (elo_val, r) in enumerate(scored, start=1):
+        club = _row_club_name(r)
+        if club:
+            rank_map[_norm(club)] = idx
+        flat_rows.append(r)
+    return flat_rows, rank_map
+
+def _day_table(url: str, debug: bool=False) -> Optional[Tuple[List[dict], Dict[str, int]]]:
+    # local y visitante piden el mismo día a la vez: un solo GET + parse
+    return _DAYS.do(url, lambda: _fetch_day_table(url, debug=debug))
+
 # ---------- Matching ----------
 def _best_row_for_team(rows: List[dict], name_variants: List[str], debug: bool=False) -> Optional[dict]:
     """
@@ -260,6 +322,12 @@ def get_team_elo(team_name: str, fecha: str, back_days: int = 3, debug: bool=Fal
     """
     Devuelve (ranking, elo) del equipo (por NOMBRE) en la fecha dada 'dd/mm/aa'.
     Usa matching estricto para no confundir equipos diferentes que comparten una palabra.
+    Los (equipo, día) sin fila se recuerdan en utils.negative_cache: la ventana de
+    back_days no vuelve a pasar por el matching difuso de días ya descartados.
+    Con TEAM_MISS_DAYS días distintos sin fila en una temporada se anota el
+    equipo en esa temporada ("clubelo_team", clave equipo|temporada), y sus
+    consultas en otras fechas de la misma temporada salen sin descargar; las
+    demás temporadas siguen consultándose.
     """
     # 1) Fecha -> YYYY-MM-DD
     try:
@@ -273,42 +341,30 @@ def get_team_elo(team_name: str, fecha: str, back_days: int = 3, debug: bool=Fal
         print(f"[ELO] Variantes '{team_name}': {variants[:6]}{' ...' if len(variants)>6 else ''}")
     if not variants:
         return None
+    team_key = _norm(team_name)
+    if negative_cache.lookup("clubelo_team", f"{team_key}|{_season(d)}"):
+        if debug: print(f"[miss] '{team_name}' en caché negativa (ningún día de {_season(d)} lo lista)")
+        return None
 
     # 3) Buscar día exacto y hacia atrás
     for delta in range(0, back_days + 1):
         day = d - timedelta(days=delta)
         day_str = day.strftime("%Y-%m-%d")
         url = f"http://api.clubelo.com/{day_str}"
+        season_key = f"{team_key}|{_season(day)}"
+        neg_key = f"{season_key}|{day_str}"
+        if negative_cache.lookup("clubelo_team_day", neg_key):
+            if debug: print(f"[miss] '{team_name}' @ {day_str} en caché negativa")
+            continue
 
         try:
-            resp = _robust_get(url, debug=debug)
+            table = _day_table(url, debug=debug)
         except Exception as e:
             if debug: print(f"[error] {e}")
             continue
-
-        rows = _parse_csv(resp.text)
-        if not rows:
+        if not table:
             continue
-
-        # conservar solo filas con Elo válido
-        scored = []
-        for r in rows:
-            elo = _extract_elo(r)
-            if elo is None:
-                continue
-            scored.append((elo, r))
-        if not scored:
-            continue
-
-        # ranking por Elo descendente
-        scored.sort(key=lambda t: t[0], reverse=True)
-        rank_map: Dict[str, int] = {}
-        flat_rows: List[dict] = []
-        for idx, (elo_val, r) in enumerate(scored, start=1):
-            club = _row_club_name(r)
-            if club:
-                rank_map[_norm(club)] = idx
-            flat_rows.append(r)
+        flat_rows, rank_map = table
 
         # matching robusto (estricto)
         row = _best_row_for_team(flat_rows, variants, debug=debug)
@@ -320,6 +376,12 @@ def get_team_elo(team_name: str, fecha: str, back_days: int = 3, debug: bool=Fal
                 if debug:
                     print(f"[FOUND] {club_name} @ {day_str} -> rank={rank}, elo={int(round(elo_val))}")
                 return (rank, int(round(elo_val)))
+        elif not offline.is_enabled():
+            # la tabla del día llegó y el equipo no está: no va a aparecer en ese día
+            ttl = negative_cache.ttl_for_date(negative_cache.NOT_FOUND, day)
+            negative_cache.record("clubelo_team_day", neg_key, negative_cache.NOT_FOUND, ttl=ttl)
+            if negative_cache.count("clubelo_team_day", f"{season_key}|") >= TEAM_MISS_DAYS:
+                negative_cache.record("clubelo_team", season_key, negative_cache.NOT_FOUND, ttl=ttl)
 
         if debug:
             print(f"[miss] '{team_name}' no encontrado en {day_str}, sigo {delta+1}/{back_days}…")
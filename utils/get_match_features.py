@@ -1,32 +1,63 @@
+import os
 from datetime import datetime
+from utils import deadline, metrics, profiling
 from utils.Match import Match
 from utils.TeamData import TeamData
 from utils.unslug_team import unslug_team
-def get_match_features(match_slug, date, ligue):
+
+# segundos para todas las etapas de un partido (None = sin límite)
+MATCH_DEADLINE = float(os.environ["CASANDRA_MATCH_DEADLINE"]) if os.environ.get("CASANDRA_MATCH_DEADLINE") else None
+
+# (etapa, mensaje, método de Match)
+STAGES = [
+    ("performance", "Buscando data de performance", "set_performance_data"),
+    ("elo", "Buscando elos de equipos", "set_teams_elo"),
+    ("result", "Buscando resultado del encuentro", "set_match_result"),
+    ("value", "Buscando valores de equipos", "set_teams_value"),
+]
+
+def get_match_features(teams, date, ligue, deadline_s=MATCH_DEADLINE):
     '''
-        El match slug contendra el nombre completo de los equipos
+        teams: (local, visitante) con el nombre completo de los equipos
+
+        ('Barcelona', 'Real Madrid')
+
+        También se acepta 'barcelona-real madrid' si ningún nombre lleva guion
+        ('Paris Saint-Germain', 'Saint-Etienne' sí lo llevan: pasar la tupla).
+
+        Cada etapa se cronometra en metrics ('match_stage_seconds{stage=...}') y,
+        con --profile, en utils.profiling (reloj, CPU y pico de memoria).
 
-        'barcelona-real madrid'
+        deadline_s: tiempo total del partido, propagado a cada fetch (utils.deadline).
+        Si se agota, las etapas pendientes quedan vacías y anotadas en
+        match.missing_features (columna 'Faltantes' del shard).
     '''
-    local_team, away_team = match_slug.split("-")
-    match = Match(match_slug, date, ligue, 
+    if isinstance(teams, str):
+        parts = teams.split("-")
+        if len(parts) != 2:
+            raise ValueError(f"'{teams}' no se puede partir en local-visitante; pasa (local, visitante)")
+        teams = parts
+    local_team, away_team = teams
+    match = Match(f"{local_team}-{away_team}", date, ligue, 
                   TeamData(local_team),
                   TeamData(away_team),
         )
-    print("Buscando data de performance")
-    match.set_performance_data()
-    print("Buscando elos de equipos")
-    match.set_teams_elo()
-    print("Buscando resultado del encuentro")
-    match.set_match_result()
-    print("Buscando valores de equipos")
-    match.set_teams_value()
-#    print("Calculando dias de descanso")
-#    match.set_resting_days()
+    with deadline.scope(deadline_s), metrics.timer("match_features_seconds"), profiling.stage("match"):
+        for stage, msg, method in STAGES:
+            print(msg)
+            if deadline.expired():
+                match.mark_missing(stage)
+                continue
+            try:
+                with metrics.timer("match_stage_seconds", stage=stage), profiling.stage(stage):
+                    getattr(match, method)()
+            except deadline.DeadlineExceeded:
+                print(f"[deadline] etapa '{stage}' sin completar")
+                match.mark_missing(stage)
+        print("Calculando dias de descanso")
+        with profiling.stage("resting"):
+            match.set_resting_days()
+    for stage in match.missing_features:
+        metrics.inc("match_features_missing_total", league=ligue, stage=stage)
+    metrics.inc("matches_processed_total", league=ligue)
     return match
-
-
-
-
-
-    
@@ -5,12 +5,17 @@ import time
 import random
 import unicodedata
 from datetime import datetime
-from typing import Optional, Dict, List, Iterable, Set
+from typing import Optional, Dict, List, Iterable, Set, Tuple, Union
 import requests
 
+from utils import deadline, http_cache, metrics, negative_cache, offline, query_planner, rate_limit, singleflight
+
 API_KEY = "123"
 BASE = f"https://www.thesportsdb.com/api/v1/json/{API_KEY}"
 
+# requests reales (no cacheados) que puede gastar un partido en buscar su evento
+MATCH_REQUEST_BUDGET = 6
+
 # -----------------------
 # Utilidades locales
 # -----------------------
@@ -24,8 +29,6 @@ def _headers():
         "User-Agent": random.choice(UA),
         "Accept-Language": "en-US,en;q=0.9,es;q=0.8",
         "Referer": "https://www.thesportsdb.com/",
-        "Cache-Control": "no-cache",
-        "Pragma": "no-cache",
     }
 
 def _strip_accents(s: str) -> str:
@@ -128,17 +131,37 @@ def slugify_team(name: str) -> str:
 # -----------------------
 # HTTP helper con backoff
 # -----------------------
-def _robust_get_json(url: str, max_retries=3, base_delay=1.1, debug=False) -> Optional[dict]:
+def _robust_get_json(url: str, max_retries=3, base_delay=1.1, debug=False,
+                     budget: Optional[query_planner.RequestBudget] = None, fresh: bool = False) -> Optional[dict]:
+    if offline.is_enabled():
+        try:
+            return offline.cached_get(url, "tsdb", _headers()).json()
+        except Exception as e:
+            if debug: print(f"[TSDB][offline] {e}")
+            return None
+    http_cache.ensure_installed()
     s = requests.Session()
     for i in range(max_retries):
+        if budget is not None and not budget.take(url):
+            if debug: print(f"[TSDB] sin presupuesto de requests: {url}")
+            return None
+        rate_limit.acquire(url, force=fresh)
+        t0 = time.perf_counter()
         try:
-            r = s.get(url, headers=_headers(), timeout=20)
+            r = s.get(url, headers=_headers(), timeout=deadline.timeout(20),
+                      **(http_cache.refresh_kwargs(s, url) if fresh else {}))
+            from_cache = http_cache.from_cache(r, "tsdb")
+            metrics.record_request("tsdb", url, r.status_code, time.perf_counter() - t0, from_cache=from_cache)
+            rate_limit.feedback(url, r.status_code, r.headers, from_cache=from_cache)
             if debug:
                 print(f"[TSDB] {r.status_code:3d}  {url}")
             if r.status_code in (429,) or (500 <= r.status_code < 600):
-                wait = base_delay * (2**i) + random.uniform(0, 0.8)
+                wait = rate_limit.retry_after(r.headers)
+                if wait is None:
+                    wait = base_delay * (2**i) + random.uniform(0, 0.8)
                 if debug: print(f"[backoff] {r.status_code} -> sleep {wait:.1f}s")
-                time.sleep(wait)
+                metrics.record_retry("tsdb", url, r.status_code, wait)
+                deadline.sleep(wait)
                 continue
             r.raise_for_status()
             return r.json()
@@ -148,7 +171,8 @@ def _robust_get_json(url: str, max_retries=3, base_delay=1.1, debug=False) -> Op
             else:
                 wait = base_delay * (2**i) + random.uniform(0, 0.6)
                 if debug: print(f"[retry] {e} -> sleep {wait:.1f}s")
-                time.sleep(wait)
+                metrics.record_retry("tsdb", url, "error", wait)
+                deadline.sleep(wait)
                 continue
     return None
 
@@ -158,13 +182,23 @@ def _robust_get_json(url: str, max_retries=3, base_delay=1.1, debug=False) -> Op
 def _resolve_team_id_by_name(name: str, debug=False) -> Optional[str]:
     """
     Resuelve idTeam intentando varias variantes del nombre.
-    Retorna idTeam (string) o None.
+    Retorna idTeam (string) o None. Los "no encontrado" se recuerdan en
+    utils.negative_cache para no repetir todas las variantes en cada partido.
     """
+    neg_key = _norm(name)
+    reason = negative_cache.lookup("tsdb_team", neg_key)
+    if reason:
+        if debug: print(f"[TSDB] Team '{name}' en caché negativa ({reason})")
+        return None
+    failed = False
     variants = _alias_variants_from_name(name)
     for v in variants:
         url = f"{BASE}/searchteams.php?t={requests.utils.quote(v)}"
         data = _robust_get_json(url, debug=debug)
-        if not data or not data.get("teams"):
+        if data is None:
+            failed = True
+            continue
+        if not data.get("teams"):
             continue
         # Preferimos Soccer
         best = None
@@ -184,11 +218,19 @@ def _resolve_team_id_by_name(name: str, debug=False) -> Optional[str]:
         if idt:
             if debug: print(f"[TSDB] Team: {best.get('strTeam')} -> id={idt}")
             return idt
+    if variants and not offline.is_enabled():
+        negative_cache.record("tsdb_team", neg_key, negative_cache.FETCH_FAILED if failed else negative_cache.NOT_FOUND)
     return None
 
-def _events_by_day(date_iso: str, debug=False) -> List[dict]:
-    url = f"{BASE}/eventsday.php?d={date_iso}&s=Soccer"
-    data = _robust_get_json(url, debug=debug)
+_EVENTS_DAY = singleflight.group("tsdb_eventsday")
+
+def _day_url(date_iso: str) -> str:
+    return f"{BASE}/eventsday.php?d={date_iso}&s=Soccer"
+
+def _events_by_day(date_iso: str, debug=False, budget: Optional[query_planner.RequestBudget] = None) -> List[dict]:
+    url = _day_url(date_iso)
+    # varios partidos del mismo día consultan la misma URL a la vez
+    data = _EVENTS_DAY.do(url, lambda: _robust_get_json(url, debug=debug, budget=budget))
     if not data or not data.get("events"):
         return []
     return data["events"]
@@ -210,38 +252,139 @@ def _match_event_by_names(home_name: str, away_name: str, events: List[dict]) ->
             return ev
     return None
 
-def _search_event_candidates(home_names: List[str], away_names: List[str], date_iso: str, debug=False):
-    tried = set()
-    for h in home_names:
-        for a in away_names:
+def _season_str(d: datetime) -> str:
+    # mismo formato (y URL) que get_previews_matches: comparten caché HTTP
+    year = d.year if d.month >= 7 else d.year - 1
+    return f"{year}-{year+1}"
+
+def _team_season_url(id_team: str, d: datetime) -> str:
+    return f"{BASE}/eventsseason.php?id={id_team}&s={requests.utils.quote(_season_str(d))}"
+
+# aciertos por forma de query "A vs B": espacio propio, no compiten con las estrategias
+_SHAPES = query_planner.Planner("tsdb_search_shapes", [])
+
+def _query_prior(shape: str) -> float:
+    # 'search:1x0:vs' -> variantes más completas (índices bajos) y "vs" primero
+    i, j = shape.split(":")[1].split("x")
+    return 0.5 / (1 + int(i) + int(j)) * (1.0 if shape.endswith(":vs") else 0.8)
+
+def _search_queries(home_names: List[str], away_names: List[str], scope: str) -> Tuple[List[str], Dict[str, str]]:
+    """
+    Queries "A vs B" ordenadas: primero las formas (índice de variante local x
+    visitante x conector) que más acertaron antes; sin historial, las variantes
+    más completas (índices bajos) y "vs" antes que "v".
+    """
+    shapes = {}
+    for i, h in enumerate(home_names):
+        for j, a in enumerate(away_names):
             for conj in ("vs", "v"):
                 q = f"{h} {conj} {a}"
-                if q in tried: 
-                    continue
-                tried.add(q)
-                url = f"{BASE}/searchevents.php?e={requests.utils.quote(q)}"
-                data = _robust_get_json(url, debug=debug)
-                if not data or not data.get("event"):
-                    continue
-                for ev in data["event"]:
-                    if (ev.get("strSport") or "").lower() != "soccer":
-                        continue
-                    if (ev.get("dateEvent") or "") != date_iso:
-                        continue
-                    yield ev
+                shapes.setdefault(q, f"search:{min(i, 3)}x{min(j, 3)}:{conj}")
+    rank = {k: r for r, k in enumerate(_SHAPES.rank(scope, sorted(set(shapes.values())), _query_prior))}
+    return sorted(shapes, key=lambda q: rank[shapes[q]]), shapes
+
+def _search_event_candidates(home_names: List[str], away_names: List[str], date_iso: str, debug=False,
+                             budget: Optional[query_planner.RequestBudget] = None, scope: str = "*"):
+    queries, shapes = _search_queries(home_names, away_names, scope)
+    for q in queries:
+        if budget is not None and budget.exhausted:
+            return
+        url = f"{BASE}/searchevents.php?e={requests.utils.quote(q)}"
+        data = _robust_get_json(url, debug=debug, budget=budget)
+        found = False
+        for ev in (data or {}).get("event") or []:
+            if (ev.get("strSport") or "").lower() != "soccer":
+                continue
+            if (ev.get("dateEvent") or "") != date_iso:
+                continue
+            found = True
+            _SHAPES.record(scope, shapes[q], True, 0)
+            yield ev
+        if data is not None and not found:
+            _SHAPES.record(scope, shapes[q], False, 0)
+
+# -----------------------
+# Planificador de estrategias (utils.query_planner)
+# -----------------------
+class _MatchQuery:
+    __slots__ = ("home_name", "away_name", "d", "date_iso", "id_home", "id_away", "scope", "debug")
+
+    def __init__(self, home_name, away_name, d, id_home, id_away, scope, debug):
+        self.home_name, self.away_name, self.d = home_name, away_name, d
+        self.date_iso = d.strftime("%Y-%m-%d")
+        self.id_home, self.id_away = id_home, id_away
+        self.scope, self.debug = scope, debug
+
+def _find_in(events: List[dict], q: _MatchQuery) -> Optional[dict]:
+    events = [ev for ev in events if (ev.get("dateEvent") or q.date_iso) == q.date_iso]
+    ev = None
+    if q.id_home and q.id_away:
+        ev = _match_event_by_ids(q.id_home, q.id_away, events)
+    if not ev:
+        ev = _match_event_by_names(q.home_name, q.away_name, events)
+    return ev
+
+def _cost_team_season(q: _MatchQuery) -> Optional[float]:
+    ids = [i for i in (q.id_home, q.id_away) if i]
+    if not ids:
+        return float("inf")
+    # solo compensa si get_previus_matches ya las dejó frescas en caché; si no, el
+    # día (una request) cubre el partido igual
+    return 0.0 if any(http_cache.is_fresh(_team_season_url(i, q.d)) for i in ids) else float("inf")
+
+def _by_team_season(q: _MatchQuery, budget: query_planner.RequestBudget) -> Optional[dict]:
+    ids = [i for i in (q.id_home, q.id_away) if i]
+    for id_team in [i for i in ids if http_cache.is_fresh(_team_season_url(i, q.d))]:
+        data = _robust_get_json(_team_season_url(id_team, q.d), debug=q.debug, budget=budget)
+        ev = _find_in((data or {}).get("events") or [], q)
+        if ev:
+            return ev
+    return None
+
+def _cost_day(q: _MatchQuery) -> Optional[float]:
+    return 0.0 if http_cache.is_fresh(_day_url(q.date_iso)) else 1.0
+
+def _by_day(q: _MatchQuery, budget: query_planner.RequestBudget) -> Optional[dict]:
+    return _find_in(_events_by_day(q.date_iso, debug=q.debug, budget=budget), q)
+
+def _by_search(q: _MatchQuery, budget: query_planner.RequestBudget) -> Optional[dict]:
+    # hasta 2·|variantes|² requests: un fallo completo se recuerda en la caché negativa
+    neg_key = f"{_norm(q.home_name)}|{_norm(q.away_name)}|{q.date_iso}"
+    reason = negative_cache.lookup("tsdb_search", neg_key)
+    if reason:
+        if q.debug: print(f"[TSDB] searchevents en caché negativa ({reason})")
+        return None
+    home_vars = _alias_variants_from_name(q.home_name)
+    away_vars = _alias_variants_from_name(q.away_name)
+    for cand in _search_event_candidates(home_vars, away_vars, q.date_iso, debug=q.debug,
+                                         budget=budget, scope=q.scope):
+        return cand
+    if not budget.exhausted and not offline.is_enabled():
+        negative_cache.record("tsdb_search", neg_key, negative_cache.NOT_FOUND,
+                              ttl=negative_cache.ttl_for_date(negative_cache.NOT_FOUND, q.d))
+    return None
+
+_PLANNER = query_planner.Planner("tsdb_result", [
+    query_planner.Strategy("team_season", _by_team_season, prior=0.7, cost=_cost_team_season),
+    query_planner.Strategy("day", _by_day, prior=0.8, cost=_cost_day),
+    query_planner.Strategy("search", _by_search, prior=0.3),
+])
 
 # -----------------------
 # API pública
 # -----------------------
-def get_match_result(teams_str: str, fecha: str, liga_hint: Optional[str] = None,
+def get_match_result(teams_str: Union[str, Tuple[str, str]], fecha: str, liga_hint: Optional[str] = None,
                      search_window_days: int = 0, proxies: Optional[Dict] = None,
-                     debug: bool = False) -> Optional[Result]:
+                     debug: bool = False, request_budget: int = MATCH_REQUEST_BUDGET) -> Optional[Result]:
     """
     Obtiene el resultado 'gH-gA' de un partido usando TheSportsDB.
     ENTRADA (cambiado): teams_str es 'NombreLocal-NombreVisitante' (no slugs).
       Ej: 'Sevilla-Barcelona', 'Real Madrid-Barcelona', 'PSG-Marseille'
+      o la tupla (local, visitante), obligatoria si algún nombre tiene guiones
+      o espacios: ('Paris Saint-Germain', 'Saint-Etienne').
     fecha: 'dd/mm/aa' (fecha del partido)
     Retorna utils.Result con slugs derivados automáticamente de los nombres.
+    request_budget: máximo de requests no cacheados para buscar el evento.
     """
     # 1) Parseo fecha
     try:
@@ -251,33 +394,29 @@ def get_match_result(teams_str: str, fecha: str, liga_hint: Optional[str] = None
     date_iso = d.strftime("%Y-%m-%d")
 
     # 2) Parseo equipos (nombres)
-    parts = [p for p in re.split(r"[-–—_\s]+", (teams_str or "").strip()) if p]
-    if len(parts) < 2:
-        raise ValueError("Formato inválido. Usa 'Local-Visitante', p.ej. 'Sevilla-Barcelona'.")
+    if isinstance(teams_str, (tuple, list)):
+        home_name, away_name = (t.strip() for t in teams_str)
+    else:
+        parts = [p for p in re.split(r"[-–—_\s]+", (teams_str or "").strip()) if p]
+        if len(parts) < 2:
+            raise ValueError("Formato inválido. Usa 'Local-Visitante', p.ej. 'Sevilla-Barcelona'.")
 
-    home_name = parts[0].strip()
-    away_name = parts[1].strip()
+        home_name = parts[0].strip()
+        away_name = parts[1].strip()
 
     # 3) Resolver idTeam de ambos (esto reduce ambigüedad y llamadas posteriores)
     id_home = _resolve_team_id_by_name(home_name, debug=debug)
     id_away = _resolve_team_id_by_name(away_name, debug=debug)
 
-    # 4) Obtener eventos del día y filtrar
-    ev = None
-    events = _events_by_day(date_iso, debug=debug)
-    if events:
-        if id_home and id_away:
-            ev = _match_event_by_ids(id_home, id_away, events)
-        if not ev:
-            ev = _match_event_by_names(home_name, away_name, events)
-
-    # 5) Fallback a búsqueda por "Home vs Away" si aún no se encontró
-    if not ev:
-        home_vars = _alias_variants_from_name(home_name)
-        away_vars = _alias_variants_from_name(away_name)
-        for cand in _search_event_candidates(home_vars, away_vars, date_iso, debug=debug):
-            ev = cand
-            break
+    # 4) Estrategias ordenadas por aciertos esperados por request (team-season en
+    #    caché, eventos del día, búsquedas "A vs B" mejor rankeadas) con un
+    #    presupuesto de requests por partido; la que acierta queda registrada
+    #    por liga para empezar por ella la próxima vez.
+    q = _MatchQuery(home_name, away_name, d, id_home, id_away, (liga_hint or "*").lower(), debug)
+    budget = query_planner.RequestBudget(request_budget)
+    ev, strategy = _PLANNER.run(q, budget, scope=q.scope, debug=debug)
+    if ev and debug:
+        print(f"[TSDB] evento encontrado vía '{strategy}' ({budget.spent} requests)")
 
     if not ev:
         if debug:
@@ -1,10 +1,14 @@
 import re
+import time
 import unicodedata
 from datetime import datetime
-from typing import List, Tuple
+from typing import List, Optional, Tuple
 import requests
 from bs4 import BeautifulSoup, Comment
 
+from utils import deadline, http_cache, metrics, offline, rate_limit, singleflight
+from utils.source_router import SourceRouter
+
 # ---------- Utils ----------
 def _slugify_team(name: str) -> str:
     norm = unicodedata.normalize("NFKD", name or "")
@@ -38,8 +42,6 @@ def _headers():
         "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64)",
         "Accept-Language": "en-US,en;q=0.9,es;q=0.8",
         "Referer": "https://google.com",
-        "Cache-Control": "no-cache",
-        "Pragma": "no-cache",
     }
 
 # ---------- Fuente 1: FBref ----------
@@ -54,13 +56,34 @@ def _from_fbref(liga: str, temporada: int, jornada: int, debug=False) -> List[Tu
     comp_id, comp_slug = comp_id_map[liga]
     season_slug = f"{temporada}-{temporada+1}"
     url = f"https://fbref.com/en/comps/{comp_id}/{season_slug}/schedule/{season_slug}-{comp_slug}-Scores-and-Fixtures"
+    # todas las jornadas salen de la misma página: peticiones concurrentes comparten GET + parse
+    schedule = _FBREF_SCHEDULES.do(url, lambda: _fbref_schedule(url, debug=debug))
+    out = [(slug, fecha) for mw, slug, fecha in schedule if mw == jornada]
+    if debug: print(f"[FBref] Found {len(out)} matches for MW {jornada}")
+    return out
 
-    resp = requests.get(url, headers=_headers(), timeout=30)
+_FBREF_SCHEDULES = singleflight.group("fbref_schedule")
+
+def _fbref_schedule(url: str, debug=False) -> List[Tuple[Optional[int], str, str]]:
+    """Calendario completo de la temporada: (jornada, 'home-away', 'dd/mm/aa') por fila con fecha."""
+    if offline.is_enabled():
+        resp = offline.cached_get(url, "fbref", _headers())
+    else:
+        http_cache.ensure_installed()
+        rate_limit.acquire(url)
+        t0 = time.perf_counter()
+        resp = requests.get(url, headers=_headers(), timeout=deadline.timeout(30))
+        from_cache = http_cache.from_cache(resp, "fbref")
+        metrics.record_request("fbref", url, resp.status_code, time.perf_counter() - t0, from_cache=from_cache)
+        rate_limit.feedback(url, resp.status_code, resp.headers, from_cache=from_cache)
     if debug: print(f"[FBref] GET {resp.status_code} {url}")
     resp.raise_for_status()
+    # la página de la temporada en curso cambia poco: mismo cuerpo -> mismo calendario, sin BeautifulSoup
+    return http_cache.parsed("fbref_schedule", resp.content, lambda: _parse_fbref_schedule(resp.text, debug=debug))
 
+def _parse_fbref_schedule(html: str, debug=False) -> List[Tuple[Optional[int], str, str]]:
     parser = _pick_parser()
-    soup = BeautifulSoup(resp.text, parser)
+    soup = BeautifulSoup(html, parser)
 
     def _find_rows(s: BeautifulSoup):
         rows = []
@@ -108,11 +131,9 @@ def _from_fbref(liga: str, temporada: int, jornada: int, debug=False) -> List[Tu
                 return int(m.group(1))
         return None
 
-    out: List[Tuple[str, str]] = []
+    out: List[Tuple[Optional[int], str, str]] = []
     for tr in rows:
         mw = _extract_matchweek(tr)
-        if mw != jornada:
-            continue
 
         home_td = tr.find(attrs={"data-stat": "home_team"})
         away_td = tr.find(attrs={"data-stat": "away_team"})
@@ -135,13 +156,12 @@ def _from_fbref(liga: str, temporada: int, jornada: int, debug=False) -> List[Tu
         if not dt:
             continue
 
-        out.append((f"{_slugify_team(home_name)}-{_slugify_team(away_name)}", dt.strftime("%d/%m/%y")))
+        out.append((mw, f"{_slugify_team(home_name)}-{_slugify_team(away_name)}", dt.strftime("%d/%m/%y")))
 
-    if debug: print(f"[FBref] Found {len(out)} matches for MW {jornada}")
     return out
 
 # ---------- Fuente 2: worldfootball (respaldo) ----------
-def _from_worldfootball(liga: str, temporada: int, jornada: int, debug=False) -> List[Tuple[str, str]]:
+def _from_worldfootball(liga: str, temporada: int, jornada: int, debug=False) -> Optional[List[Tuple[str, str]]]:
     comp_map = {
         "laliga": "esp-primera-division",
         "premier": "eng-premier-league",
@@ -160,11 +180,20 @@ def _from_worldfootball(liga: str, temporada: int, jornada: int, debug=False) ->
         "Upgrade-Insecure-Requests": "1",
     })
 
-    resp = requests.get(url, headers=headers, timeout=30)
+    if offline.is_enabled():
+        resp = offline.cached_get(url, "worldfootball", headers)
+    else:
+        http_cache.ensure_installed()
+        rate_limit.acquire(url)
+        t0 = time.perf_counter()
+        resp = requests.get(url, headers=headers, timeout=deadline.timeout(30))
+        from_cache = http_cache.from_cache(resp, "worldfootball")
+        metrics.record_request("worldfootball", url, resp.status_code, time.perf_counter() - t0, from_cache=from_cache)
+        rate_limit.feedback(url, resp.status_code, resp.headers, from_cache=from_cache)
     if debug: print(f"[WFootball] GET {resp.status_code} {url}")
     if resp.status_code == 403:
         if debug: print("[WFootball] 403 Forbidden (bloqueo).")
-        return []
+        return None
     resp.raise_for_status()
 
     parser = _pick_parser()
@@ -176,7 +205,6 @@ def _from_worldfootball(liga: str, temporada: int, jornada: int, debug=False) ->
 
     out: List[Tuple[str, str]] = []
     for table in tables:
-        print(tables)
         for tr in table.select("tr"):
             tds = tr.find_all("td")
             if len(tds) < 3:
@@ -220,12 +248,23 @@ def _from_worldfootball(liga: str, temporada: int, jornada: int, debug=False) ->
     return out
 
 # ---------- API pública ----------
+# Lista vacía = no gana: se intenta la otra fuente; si ninguna trae partidos se devuelve [].
+# Para el breaker, una lista vacía es un request correcto (jornada sin partidos);
+# solo cuentan como fallo las excepciones y None (bloqueo).
+_ROUTER = SourceRouter("fixtures", {"fbref": _from_fbref, "worldfootball": _from_worldfootball},
+                       is_healthy=lambda r: r is not None)
+
 def get_matches_list(liga: str, temporada: int, jornada: int, debug: bool=False) -> List[Tuple[str, str]]:
     """
     Devuelve [(slug_partido, 'dd/mm/aa'), ...] para:
       liga: 'laliga'|'premier'|'seriea'|'bundesliga'|'ligue1'
       temporada: año de inicio (1994..2025)
       jornada: número de jornada (>=1)
+    Las fuentes se eligen por latencia/éxito recientes; si la primaria no responde a
+    tiempo se lanza la otra en paralelo y gana la primera lista no vacía (utils.source_router).
+    Devuelve [] si ninguna fuente tiene partidos para esa jornada y None si
+    las fuentes que respondieron estaban bloqueadas.
+    En modo offline (utils.offline) un fallo de caché en ambas fuentes propaga OfflineMiss.
     """
     key = (liga or "").strip().lower()
     if key not in {"laliga","premier","seriea","bundesliga","ligue1"}:
@@ -235,11 +274,5 @@ def get_matches_list(liga: str, temporada: int, jornada: int, debug: bool=False)
     if not isinstance(jornada, int) or jornada < 1:
         raise ValueError("La jornada debe ser un entero >= 1.")
 
-    # 1) FBref (primario)
-    try:
-        res = _from_fbref(key, temporada, jornada, debug=debug)
-        if res:
-            return res
-    except:
-        # 2) worldfootball (respaldo; puede devolver [] si hay 403)
-        return _from_worldfootball(key, temporada, jornada, debug=debug)
+    # FBref (primario) y worldfootball (respaldo) vía router con hedging
+    return _ROUTER.call(key, temporada, jornada, debug=debug)
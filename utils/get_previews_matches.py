@@ -36,9 +36,9 @@ from datetime import datetime
 from typing import Optional, List, Dict, Tuple, Iterable
 
 import requests
-import requests_cache
 from bs4 import BeautifulSoup, Comment
 
+from utils import deadline, http_cache, metrics, offline, rate_limit, singleflight
 from utils.Result import Result
 from utils.unslug_team import unslug_team
 
@@ -51,11 +51,8 @@ TSDB_BASE = f"https://www.thesportsdb.com/api/v1/json/{TSDB_API_KEY}"
 
 # HTTP
 REQ_TIMEOUT = 15
-HTTP_CACHE_NAME = "sports_http_cache"
-HTTP_CACHE_TTL = 86400  # 24h
 
-# TSDB: límites conservadores para evitar 429
-RATE_MIN_INTERVAL = 0.45   # seg entre requests
+# Límites por host: utils.rate_limit (token bucket AIMD compartido entre procesos)
 TSDB_MAX_SEASONS = 2       # temporada de corte + 1 anterior
 EVENTSLAST_ENABLE = True   # usar eventslast como complemento (1 request)
 
@@ -65,12 +62,10 @@ FBREF_ROOT = "https://fbref.com"
 
 # Cachés persistentes pequeñas
 DATA_DIR = "./data"
-os.makedirs(DATA_DIR, exist_ok=True)
 TSDB_TEAM_CACHE = os.path.join(DATA_DIR, "tsdb_teams_cache.json")
 FBREF_TEAM_CACHE = os.path.join(DATA_DIR, "fbref_teams_cache.json")
 
-# Inicializa caché HTTP (GET) 24h
-requests_cache.install_cache(HTTP_CACHE_NAME, expire_after=HTTP_CACHE_TTL)
+# La caché HTTP (GET, 24h) se instala en el primer request: utils.http_cache
 
 # -------------------------------------------------------------------
 # Utilidades de normalización / slugs
@@ -127,46 +122,56 @@ def _headers():
     return {
         "User-Agent": random.choice(_UA),
         "Accept-Language": "en-US,en;q=0.9,es;q=0.8",
-        "Cache-Control": "no-cache",
-        "Pragma": "no-cache",
         "Referer": "https://google.com",
     }
 
-_LAST_TS = 0.0
-def _polite_pause():
-    global _LAST_TS
-    now = time.monotonic()
-    delta = RATE_MIN_INTERVAL - (now - _LAST_TS)
-    if delta > 0:
-        time.sleep(delta + random.uniform(0, 0.12))
-    _LAST_TS = time.monotonic()
+# Llamadas concurrentes a la misma URL comparten un único request (ver utils.singleflight)
+_TSDB_INFLIGHT = singleflight.group("tsdb_json")
+_HTML_INFLIGHT = singleflight.group("fbref_html")
 
 def _get_json(url: str, debug=False, max_retries=2, total_budget=6.0) -> Optional[dict]:
     """
     GET JSON con rate-limit local y backoff breve ante 429/5xx.
     Nunca excede 'total_budget' por llamada.
     """
+    return _TSDB_INFLIGHT.do(url, lambda: _get_json_once(url, debug, max_retries, total_budget))
+
+def _get_json_once(url: str, debug: bool, max_retries: int, total_budget: float) -> Optional[dict]:
+    if offline.is_enabled():
+        try:
+            return offline.cached_get(url, "tsdb", _headers()).json()
+        except Exception as e:
+            if debug: print(f"[TSDB][offline] {e}")
+            return None
+    http_cache.ensure_installed()
     start = time.monotonic()
     attempt = 0
     while True:
-        _polite_pause()
+        rate_limit.acquire(url)
+        t0 = time.perf_counter()
         try:
-            r = requests.get(url, headers=_headers(), timeout=REQ_TIMEOUT)
+            r = requests.get(url, headers=_headers(), timeout=deadline.timeout(REQ_TIMEOUT))
+            from_cache = http_cache.from_cache(r, "tsdb")
+            metrics.record_request("tsdb", url, r.status_code, time.perf_counter() - t0, from_cache=from_cache)
+            rate_limit.feedback(url, r.status_code, r.headers, from_cache=from_cache)
             if debug:
                 code = r.status_code
-                from_cache = getattr(r, "from_cache", False)
                 print(f"[TSDB] {code} {'(cache)' if from_cache else ''} {url}")
             r.raise_for_status()
             return r.json()
         except requests.HTTPError as he:
             status = getattr(he.response, "status_code", None)
             if status in (429, 500, 502, 503, 504) and attempt < max_retries:
-                wait = 1.1 + 0.9 * random.random()
+                wait = rate_limit.retry_after(getattr(he.response, "headers", None))
+                if wait is None:
+                    wait = 1.1 + 0.9 * random.random()
                 if time.monotonic() - start + wait > total_budget:
                     if debug: print("[TSDB] presupuesto excedido; abort.")
+                    metrics.inc("http_budget_exhausted_total", source="tsdb")
                     return None
                 if debug: print(f"[TSDB] backoff {wait:.1f}s")
-                time.sleep(wait)
+                metrics.record_retry("tsdb", url, status, wait)
+                deadline.sleep(wait)
                 attempt += 1
                 continue
             if debug:
@@ -181,28 +186,48 @@ def _robust_get(url: str, debug=False, max_retries=2, base_delay=1.2, total_budg
     """
     GET HTML plano con backoff y rate-limit.
     """
+    return _HTML_INFLIGHT.do(url, lambda: _robust_get_once(url, debug, max_retries, base_delay, total_budget))
+
+def _robust_get_once(url: str, debug: bool, max_retries: int, base_delay: float,
+                     total_budget: float) -> Optional[requests.Response]:
+    if offline.is_enabled():
+        try:
+            return offline.cached_get(url, "fbref", _headers())
+        except Exception as e:
+            if debug: print(f"[GET][offline] {e}")
+            return None
+    http_cache.ensure_installed()
     start = time.monotonic()
     for i in range(max_retries + 1):
-        _polite_pause()
+        rate_limit.acquire(url)
+        t0 = time.perf_counter()
         try:
-            r = requests.get(url, headers=_headers(), timeout=REQ_TIMEOUT, allow_redirects=True)
+            r = requests.get(url, headers=_headers(), timeout=deadline.timeout(REQ_TIMEOUT), allow_redirects=True)
+            from_cache = http_cache.from_cache(r, "fbref")
+            metrics.record_request("fbref", url, r.status_code, time.perf_counter() - t0, from_cache=from_cache)
+            rate_limit.feedback(url, r.status_code, r.headers, from_cache=from_cache)
             if debug:
                 code = r.status_code
-                from_cache = getattr(r, "from_cache", False)
                 print(f"[GET] {code} {'(cache)' if from_cache else ''} {url}")
             if r.status_code in (429,) or (500 <= r.status_code < 600):
-                wait = min(base_delay * (2 ** i) + random.uniform(0, 0.6), 6.0)
+                wait = rate_limit.retry_after(r.headers)
+                if wait is None:
+                    wait = min(base_delay * (2 ** i) + random.uniform(0, 0.6), 6.0)
                 if time.monotonic() - start + wait > total_budget:
                     if debug: print("[GET] presupuesto excedido; abort.")
+                    metrics.inc("http_budget_exhausted_total", source="fbref")
                     return None
                 if debug: print(f"[backoff] {r.status_code} -> sleep {wait:.1f}s")
-                time.sleep(wait)
+                metrics.record_retry("fbref", url, r.status_code, wait)
+                deadline.sleep(wait)
                 continue
             r.raise_for_status()
             return r
         except Exception as e:
             if debug: print(f"[GET-err] {e} @ {url}")
-            time.sleep(min(base_delay * (2 ** i) + random.uniform(0, 0.5), 4.0))
+            wait = min(base_delay * (2 ** i) + random.uniform(0, 0.5), 4.0)
+            metrics.record_retry("fbref", url, "error", wait)
+            deadline.sleep(wait)
     return None
 
 def _pick_parser() -> str:
@@ -226,6 +251,7 @@ def _load_json(path: str) -> dict:
 
 def _save_json(path: str, data: dict) -> None:
     try:
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
         with open(path, "w", encoding="utf-8") as f:
             json.dump(data, f, ensure_ascii=False, indent=2)
     except Exception:
@@ -358,6 +384,20 @@ def _tsdb_collect_previous(id_team: str, cutoff: datetime, need: int, debug=Fals
     out = sorted(pool.values(), key=lambda t: t[0], reverse=True)[:need]
     return out
 
+def tsdb_form_urls(slug_equipo: str, fecha: str, debug=False) -> List[str]:
+    """
+    URLs de TSDB que cambian cuando el equipo juega un partido nuevo (temporada
+    en curso + eventslast). Modo en vivo: se borran de la caché HTTP para que la
+    forma siguiente incluya el resultado recién terminado.
+    """
+    team = _tsdb_resolve_team((slug_equipo or "").strip().lower(), debug=debug)
+    if not team:
+        return []
+    cutoff = datetime.strptime(fecha, "%d/%m/%y")
+    s = _season_str_for_date(cutoff)
+    return [f"{TSDB_BASE}/eventsseason.php?id={team[0]}&s={requests.utils.quote(s)}",
+            f"{TSDB_BASE}/eventslast.php?id={team[0]}"]
+
 # -------------------------------------------------------------------
 # FBref fallback (solo páginas del equipo)
 # -------------------------------------------------------------------
@@ -437,12 +477,17 @@ def _fbref_parse_scores_fixtures(url: str, cutoff: datetime, debug=False) -> Lis
     Parse de la tabla de 'Scores & Fixtures' de una temporada concreta.
     Devuelve lista de (fecha, 'home-away', 'gH-gA') solo con partidos < cutoff con score.
     """
-    out: List[Tuple[datetime, str, str]] = []
-    parser = _pick_parser()
     r = _robust_get(url, debug=debug)
     if not r:
-        return out
-    soup = BeautifulSoup(r.text, parser)
+        return []
+    # el parseo (todas las filas con marcador) se memoiza por contenido; el corte se aplica aquí
+    rows = http_cache.parsed("fbref_scores_fixtures", r.content, lambda: _fbref_scores_rows(r.text))
+    return [row for row in rows if row[0] < cutoff]
+
+def _fbref_scores_rows(html: str) -> List[Tuple[datetime, str, str]]:
+    out: List[Tuple[datetime, str, str]] = []
+    parser = _pick_parser()
+    soup = BeautifulSoup(html, parser)
 
     def _iter_rows(s):
         for tr in s.select("table tbody tr"):
@@ -470,8 +515,6 @@ def _fbref_parse_scores_fixtures(url: str, cutoff: datetime, debug=False) -> Lis
             mdate = datetime.strptime(raw, "%Y-%m-%d")
         except Exception:
             continue
-        if not (mdate < cutoff):
-            continue
 
         h = slugify_team(home_td.get_text(strip=True))
         a = slugify_team(away_td.get_text(strip=True))
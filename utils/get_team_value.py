@@ -0,0 +1,270 @@
+# utils/get_team_value.py
+"""
+Valor de mercado total de la plantilla de un equipo en una fecha (millones de €).
+
+Store numérico indexado por (club, temporada) para 1994..2025:
+  - data/team_values.csv   -> team,season,value_eur_m (no versionado; lo genera
+                              `python team_values.py` desde Transfermarkt, ver
+                              build_team_values; team = nombre del club o slug no ambiguo)
+  - value_cache.json       -> caché legado {"sev|202510": "€5475.00m"} (solo rellena huecos)
+  - data/euro_cpi.csv      -> year,hicp (HICP zona euro, media anual, 2015=100)
+
+Las filas se indexan por nombre canónico de club (utils.unslug_team.canonical_team:
+'Sevilla', 'Sevilla FC' y el slug 'sev' son la misma fila). Un slug que
+team_aliases.json reparte entre varios clubes ('bre' = Brentford / Brest /
+Brescia) no identifica a ninguno: sus filas se descartan y buscarlo da None.
+Valores por encima de MAX_VALUE_EUR_M se descartan por inverosímiles.
+
+La carga es masiva y única (lazy, primera llamada). El ajuste por inflación se
+aplica como un join vectorizado temporada -> factor HICP sobre toda la matriz,
+de modo que get_team_value() es una búsqueda O(1) en memoria.
+"""
+
+from __future__ import annotations
+
+import csv
+import json
+import os
+import re
+import threading
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+# ---------- Config ----------
+TEAM_VALUES_CSV = "./data/team_values.csv"
+CPI_CSV = "./data/euro_cpi.csv"
+LEGACY_CACHE = "./value_cache.json"
+ALIASES_JSON = "./data/team_aliases.json"
+
+FIRST_SEASON = 1994
+LAST_SEASON = 2025
+N_SEASONS = LAST_SEASON - FIRST_SEASON + 1
+MAX_VALUE_EUR_M = 2500.0     # ninguna plantilla ha valido más; por encima es un error de scraping
+
+# ---------- Normalización ----------
+def _team_key(name: str, aliases_path: str = ALIASES_JSON) -> Optional[str]:
+    from utils.unslug_team import canonical_team
+    return canonical_team(name, aliases_path)
+
+def _season_for_date(d: datetime) -> int:
+    """Año de inicio de la temporada (julio en adelante = temporada nueva)."""
+    return d.year if d.month >= 7 else d.year - 1
+
+_RE_MONEY = re.compile(r"([\d.,]+)\s*(bn|b|m|k|th\.?)?", re.I)
+
+def _parse_money(raw: str) -> Optional[float]:
+    """'€5475.00m' | '€850k' | '€1.2bn' -> millones (float)."""
+    m = _RE_MONEY.search((raw or "").replace("€", ""))
+    if not m:
+        return None
+    try:
+        num = float(m.group(1).replace(",", ""))
+    except ValueError:
+        return None
+    unit = (m.group(2) or "m").lower()
+    if unit in ("bn", "b"):
+        return num * 1000.0
+    if unit.startswith("k") or unit.startswith("th"):
+        return num / 1000.0
+    return num
+
+# ---------- Store ----------
+class _ValueStore:
+    def __init__(self) -> None:
+        self.team_idx: Dict[str, int] = {}
+        self.nominal = np.full((0, N_SEASONS), np.nan)
+        self.real = np.full((0, N_SEASONS), np.nan)
+        self.cpi_factor = np.ones(N_SEASONS)
+        self.refused: List[str] = []      # equipos con slug ambiguo / valores inverosímiles descartados
+
+_STORE: Optional[_ValueStore] = None
+_LOCK = threading.Lock()
+
+def _load_cpi_factor(path: str) -> np.ndarray:
+    """
+    Factor por temporada = HICP(último año) / HICP(año de inicio de temporada).
+    Join vectorizado: searchsorted de los años de temporada sobre la tabla HICP
+    (años fuera de tabla toman el extremo más cercano).
+    """
+    seasons = np.arange(FIRST_SEASON, LAST_SEASON + 1)
+    if not os.path.exists(path):
+        return np.ones(N_SEASONS)
+    years, idx = [], []
+    with open(path, "r", encoding="utf-8") as f:
+        for row in csv.DictReader(f):
+            try:
+                years.append(int(row["year"]))
+                idx.append(float(row["hicp"]))
+            except (KeyError, ValueError):
+                continue
+    if not years:
+        return np.ones(N_SEASONS)
+    order = np.argsort(years)
+    cpi_years = np.asarray(years)[order]
+    cpi_vals = np.asarray(idx)[order]
+    pos = np.clip(np.searchsorted(cpi_years, seasons), 0, len(cpi_years) - 1)
+    return cpi_vals[-1] / cpi_vals[pos]
+
+def load_team_values(values_path: str = TEAM_VALUES_CSV, cpi_path: str = CPI_CSV,
+                     legacy_path: str = LEGACY_CACHE, aliases_path: str = ALIASES_JSON) -> _ValueStore:
+    """
+    Carga masiva del store (reemplaza al actual). Devuelve el store cargado.
+    """
+    global _STORE
+    teams, seasons, values = [], [], []
+    refused = set()
+
+    def _add(team: str, season: int, value: float) -> None:
+        key = _team_key(team, aliases_path)
+        if key is None:
+            refused.add(team)
+            return
+        if not 0 <= value <= MAX_VALUE_EUR_M:
+            refused.add(f"{team}={value}")
+            return
+        teams.append(key)
+        seasons.append(season)
+        values.append(value)
+
+    if not os.path.exists(values_path):
+        print(f"[VALUE] falta {values_path}: genéralo con 'python team_values.py' (sin él no hay valores de mercado)")
+    else:
+        with open(values_path, "r", encoding="utf-8") as f:
+            for row in csv.DictReader(f):
+                try:
+                    team, season, value = (row["team"] or "").strip(), int(row["season"]), float(row["value_eur_m"])
+                except (KeyError, TypeError, ValueError):
+                    continue
+                _add(team, season, value)
+    n_csv = len(teams)
+
+    if os.path.exists(legacy_path):
+        try:
+            with open(legacy_path, "r", encoding="utf-8") as f:
+                legacy = json.load(f)
+        except Exception:
+            legacy = {}
+        for key, raw in legacy.items():
+            slug, _, yyyymm = key.partition("|")
+            v = _parse_money(raw)
+            if v is None or len(yyyymm) < 6:
+                continue
+            try:
+                d = datetime(int(yyyymm[:4]), int(yyyymm[4:6]), 1)
+            except ValueError:
+                continue
+            _add(slug.strip(), _season_for_date(d), v)
+
+    store = _ValueStore()
+    store.refused = sorted(refused)
+    for t in teams:
+        store.team_idx.setdefault(t, len(store.team_idx))
+    store.nominal = np.full((len(store.team_idx), N_SEASONS), np.nan)
+
+    if teams:
+        rows = np.fromiter((store.team_idx[t] for t in teams), dtype=np.int64, count=len(teams))
+        cols = np.asarray(seasons, dtype=np.int64) - FIRST_SEASON
+        vals = np.asarray(values, dtype=np.float64)
+        ok = (cols >= 0) & (cols < N_SEASONS)
+        # el legado solo rellena huecos: se escribe primero y el CSV lo pisa
+        legacy_mask = ok & (np.arange(len(teams)) >= n_csv)
+        csv_mask = ok & (np.arange(len(teams)) < n_csv)
+        store.nominal[rows[legacy_mask], cols[legacy_mask]] = vals[legacy_mask]
+        store.nominal[rows[csv_mask], cols[csv_mask]] = vals[csv_mask]
+
+    store.cpi_factor = _load_cpi_factor(cpi_path)
+    store.real = store.nominal * store.cpi_factor[np.newaxis, :]
+
+    _STORE = store
+    return store
+
+def build_team_values(path: str = TEAM_VALUES_CSV, seasons=range(FIRST_SEASON, LAST_SEASON + 1),
+                      ligas: Optional[List[str]] = None, debug: bool = False) -> int:
+    """
+    Descarga de Transfermarkt el valor de plantilla de cada club de las ligas
+    (1ª y 2ª división) y temporadas pedidas y lo fusiona en 'path' (una fila
+    por club y temporada; lo descargado pisa lo que hubiera). Devuelve las filas
+    nuevas o actualizadas. Las páginas pasan por la caché HTTP: relanzarlo solo
+    pide lo que falta o caducó.
+    """
+    from utils import transfermarkt
+    rows: Dict[Tuple[str, int], float] = {}
+    if os.path.exists(path):
+        with open(path, "r", encoding="utf-8") as f:
+            for row in csv.DictReader(f):
+                try:
+                    rows[(row["team"], int(row["season"]))] = float(row["value_eur_m"])
+                except (KeyError, TypeError, ValueError):
+                    continue
+    n = 0
+    for liga in ligas or list(transfermarkt.COMPETITIONS):
+        for code in transfermarkt.COMPETITIONS[liga]:
+            for season in seasons:
+                try:
+                    found = transfermarkt.league_values(code, season, debug=debug)
+                except Exception as e:
+                    print(f"[VALUE][err] {code} {season}: {e}")
+                    continue
+                for club, raw in found:
+                    v = _parse_money(raw)
+                    if v is not None:
+                        rows[(club, season)] = round(v, 2)
+                        n += 1
+                print(f"[VALUE] {liga} {code} {season}: {len(found)} clubes")
+    d = os.path.dirname(path)
+    if d:
+        os.makedirs(d, exist_ok=True)
+    tmp = path + ".tmp"
+    with open(tmp, "w", encoding="utf-8", newline="") as f:
+        w = csv.writer(f)
+        w.writerow(["team", "season", "value_eur_m"])
+        for (team, season), v in sorted(rows.items()):
+            w.writerow([team, season, f"{v:.2f}"])
+    os.replace(tmp, path)
+    return n
+
+def _store() -> _ValueStore:
+    if _STORE is None:
+        with _LOCK:
+            if _STORE is None:
+                load_team_values()
+    return _STORE
+
+def team_value_matrix(adjusted: bool = True) -> Tuple[Dict[str, int], np.ndarray]:
+    """(índice club canónico->fila, matriz equipos x temporadas 1994..2025) para uso vectorizado."""
+    st = _store()
+    return st.team_idx, (st.real if adjusted else st.nominal)
+
+# ---------- API principal ----------
+def get_team_value(team_name: str, fecha: str, debug: bool = False, adjusted: bool = True) -> Optional[float]:
+    """
+    Valor de mercado total (millones de €) del equipo en la temporada de 'fecha' (dd/mm/aa).
+    adjusted=True lo expresa en euros del último año de la tabla HICP.
+    Retorna None si no hay dato para ese (equipo, temporada).
+    """
+    try:
+        d = datetime.strptime(fecha, "%d/%m/%y")
+    except ValueError:
+        raise ValueError("La fecha debe ser dd/mm/aa, ej. '28/09/25'.")
+    col = _season_for_date(d) - FIRST_SEASON
+    if not 0 <= col < N_SEASONS:
+        if debug: print(f"[VALUE] temporada fuera de rango {FIRST_SEASON}..{LAST_SEASON}: {fecha}")
+        return None
+
+    st = _store()
+    key = _team_key(team_name)
+    row = st.team_idx.get(key) if key else None
+    if key is None:
+        if debug: print(f"[VALUE] slug ambiguo (varios clubes en team_aliases): '{team_name}'")
+        return None
+    if row is None:
+        if debug: print(f"[VALUE] equipo sin datos: '{team_name}'")
+        return None
+    v = (st.real if adjusted else st.nominal)[row, col]
+    if np.isnan(v):
+        if debug: print(f"[VALUE] sin valor para '{team_name}' en {FIRST_SEASON + col}")
+        return None
+    if debug: print(f"[VALUE] {team_name} {FIRST_SEASON + col}: {v:.2f}m€{' (ajustado)' if adjusted else ''}")
+    return round(float(v), 2)
@@ -0,0 +1,158 @@
+# utils/h2h.py
+"""
+Índice de enfrentamientos directos sobre el histórico local (utils.match_store).
+
+PairIndex agrupa los partidos por pareja NO ordenada de equipos; dentro de cada
+pareja los índices quedan ordenados por fecha (el store ya lo está), así que los
+últimos N enfrentamientos antes de una fecha son un bisect + slice, sin requests.
+
+    idx = PairIndex(store)
+    idx.last_meetings("Sevilla", "Barcelona", "05/10/25", n=5)   -> List[Result]
+    h2h_features(store, idx, n=5)    # features ED_* de todos los partidos, vectorizado
+
+Features (desde el punto de vista del local del partido a predecir; NaN sin historial):
+    ED_N       enfrentamientos considerados
+    ED_PPGL    % de partidos ganados por el local
+    ED_PPGV    % de partidos ganados por el visitante
+    ED_PE      % de empates
+    ED_PGL     promedio de goles del local
+    ED_PGV     promedio de goles del visitante
+    ED_PGT     promedio de goles totales
+    ED_PPL     promedio de puntos del local
+    ED_PPV     promedio de puntos del visitante
+    ED_PPGLCL  % ganados por el local cuando fue local en el enfrentamiento
+    ED_PPGVCV  % ganados por el visitante cuando fue visitante en el enfrentamiento
+"""
+
+from __future__ import annotations
+
+from datetime import datetime
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from utils.match_store import MatchStore, normalize_team, to_day
+from utils.Result import Result
+
+H2H_COLUMNS: List[str] = ["ED_N", "ED_PPGL", "ED_PPGV", "ED_PE", "ED_PGL", "ED_PGV", "ED_PGT",
+                          "ED_PPL", "ED_PPV", "ED_PPGLCL", "ED_PPGVCV"]
+
+class PairIndex:
+    def __init__(self, store: MatchStore) -> None:
+        self.store = store
+        n = max(store.n_teams, 1)
+        lo = np.minimum(store.home, store.away).astype(np.int64)
+        hi = np.maximum(store.home, store.away).astype(np.int64)
+        self.pair_key = lo * n + hi
+        self._n = n
+        order = np.argsort(self.pair_key, kind="stable")     # estable: conserva el orden por fecha
+        keys, starts = np.unique(self.pair_key[order], return_index=True)
+        ends = np.append(starts[1:], len(order))
+        self.pairs: Dict[int, np.ndarray] = {int(k): order[s:e] for k, s, e in zip(keys, starts, ends)}
+        self.dates_i8 = store.dates.astype(np.int64)
+
+    def _key(self, a: int, b: int) -> int:
+        lo, hi = (a, b) if a <= b else (b, a)
+        return lo * self._n + hi
+
+    def window(self, a: int, b: int, before, n: int) -> np.ndarray:
+        """Índices (store) de los últimos n enfrentamientos a-b anteriores a 'before'."""
+        idx = self.pairs.get(self._key(a, b))
+        if idx is None:
+            return np.empty(0, dtype=np.int64)
+        day = int(to_day(before).astype(np.int64)) if not isinstance(before, (int, np.integer)) else int(before)
+        cut = int(np.searchsorted(self.dates_i8[idx], day, side="left"))
+        return idx[max(0, cut - n):cut]
+
+    def last_meetings(self, home: str, away: str, fecha, n: int = 5) -> List[Result]:
+        """Últimos n enfrentamientos antes de 'fecha', del más reciente al más antiguo."""
+        st = self.store
+        a, b = st.team_idx.get(normalize_team(home)), st.team_idx.get(normalize_team(away))
+        if a is None or b is None:
+            return []
+        out = []
+        for i in self.window(a, b, fecha, n)[::-1]:
+            d = st.dates[i].item()
+            out.append(Result(st.teams[int(st.home[i])], st.teams[int(st.away[i])],
+                              int(st.hg[i]), int(st.ag[i]), datetime(d.year, d.month, d.day)))
+        return out
+
+def _summary(store: MatchStore, idx: np.ndarray, home: int) -> Dict[str, float]:
+    if len(idx) == 0:
+        return {c: (0.0 if c == "ED_N" else np.nan) for c in H2H_COLUMNS}
+    is_home = store.home[idx] == home
+    gf = np.where(is_home, store.hg[idx], store.ag[idx]).astype(np.float64)   # goles del local actual
+    ga = np.where(is_home, store.ag[idx], store.hg[idx]).astype(np.float64)
+    win, draw, loss = gf > ga, gf == ga, gf < ga
+    pts_l = np.where(win, 3, np.where(draw, 1, 0))
+    pts_v = np.where(loss, 3, np.where(draw, 1, 0))
+    n_home = int(is_home.sum())
+    return {
+        "ED_N": float(len(idx)),
+        "ED_PPGL": float(win.mean()), "ED_PPGV": float(loss.mean()), "ED_PE": float(draw.mean()),
+        "ED_PGL": float(gf.mean()), "ED_PGV": float(ga.mean()), "ED_PGT": float((gf + ga).mean()),
+        "ED_PPL": float(pts_l.mean()), "ED_PPV": float(pts_v.mean()),
+        # el local actual ganando en casa / el visitante actual ganando fuera
+        "ED_PPGLCL": float(win[is_home].mean()) if n_home else np.nan,
+        "ED_PPGVCV": float(loss[is_home].mean()) if n_home else np.nan,
+    }
+
+def h2h_for(index: PairIndex, home: str, away: str, fecha, n: int = 5) -> Optional[Dict[str, float]]:
+    st = index.store
+    a, b = st.team_idx.get(normalize_team(home)), st.team_idx.get(normalize_team(away))
+    if a is None or b is None:
+        return None
+    return _summary(st, index.window(a, b, fecha, n), a)
+
+def h2h_features(store: MatchStore, index: Optional[PairIndex] = None, n: int = 5) -> Dict[str, np.ndarray]:
+    """
+    Features ED_* de todos los partidos del store (estado previo al día del partido).
+    Vectorizado: partidos ordenados por (pareja, fecha), sumas acumuladas desde el
+    punto de vista del equipo de menor índice de cada pareja y ventanas de n como
+    diferencia de prefijos; después se gira la perspectiva según quién sea local.
+    """
+    index = index or PairIndex(store)
+    m = len(store)
+    out = {c: np.full(m, np.nan, dtype=np.float32) for c in H2H_COLUMNS}
+    if m == 0:
+        return out
+    order = np.argsort(index.pair_key, kind="stable")
+    key = index.pair_key[order]
+    day = index.dates_i8[order]
+    home, hg, ag = store.home[order], store.hg[order].astype(np.int64), store.ag[order].astype(np.int64)
+    lo = np.minimum(store.home, store.away)[order]
+
+    lo_home = home == lo
+    gf = np.where(lo_home, hg, ag)              # goles del equipo 'lo'
+    ga = np.where(lo_home, ag, hg)
+    w, d, l = gf > ga, gf == ga, gf < ga
+    cols = np.stack([np.ones(m), w, d, l, gf, ga, lo_home, lo_home & w, lo_home & l,
+                     ~lo_home, ~lo_home & l, ~lo_home & w], axis=1).astype(np.float64)
+    C = np.vstack([np.zeros((1, cols.shape[1])), np.cumsum(cols, axis=0)])
+
+    pos = np.arange(m)
+    new_group = np.r_[True, key[1:] != key[:-1]]
+    g0 = np.maximum.accumulate(np.where(new_group, pos, 0))
+    # mismo día y pareja (partido repetido): ambos ven el estado previo a ese día
+    new_day = new_group | np.r_[True, day[1:] != day[:-1]]
+    cut = np.maximum.accumulate(np.where(new_day, pos, 0))
+    start = np.maximum(g0, cut - n)
+    S = C[cut] - C[start]
+    N, W, D, L, GF, GA, LH, LHW, LHL, HH, HHW, HHL = S.T
+
+    hl = lo_home                                   # el local del partido es 'lo'
+    with np.errstate(invalid="ignore", divide="ignore"):
+        res = {
+            "ED_N": N,
+            "ED_PPGL": np.where(hl, W, L) / N, "ED_PPGV": np.where(hl, L, W) / N, "ED_PE": D / N,
+            "ED_PGL": np.where(hl, GF, GA) / N, "ED_PGV": np.where(hl, GA, GF) / N, "ED_PGT": (GF + GA) / N,
+            "ED_PPL": (3 * np.where(hl, W, L) + D) / N, "ED_PPV": (3 * np.where(hl, L, W) + D) / N,
+            "ED_PPGLCL": np.where(hl, LHW / LH, HHW / HH),
+            "ED_PPGVCV": np.where(hl, LHL / LH, HHL / HH),
+        }
+    for c in H2H_COLUMNS:
+        v = res[c].astype(np.float32)
+        if c != "ED_N":
+            v[N == 0] = np.nan
+        out[c][order] = v
+    return out
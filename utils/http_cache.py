@@ -0,0 +1,130 @@
+# utils/http_cache.py
+"""
+Caché HTTP global (requests_cache, sqlite en cwd) instalada bajo demanda.
+
+Antes se instalaba al importar get_previews_matches; ahora cada helper HTTP llama
+a ensure_installed() antes de su primer request, de modo que importar los
+scrapers (o el CLI) no abre la base de datos ni toca el disco.
+
+Revalidación condicional: requests_cache guarda ETag / Last-Modified con cada
+respuesta y, cuando la entrada caduca (HTTP_CACHE_TTL), manda If-None-Match /
+If-Modified-Since; un 304 solo renueva la caducidad, sin volver a bajar el
+cuerpo. Para eso los scrapers NO deben mandar "Cache-Control: no-cache" (con esa
+cabecera requests_cache no lee la caché: cada request iba a la red entero).
+from_cache(r) distingue la respuesta servida de caché del 304 (que sí fue un
+request real: cuenta para métricas y rate limit).
+
+Fuentes sin validadores: el cuerpo se vuelve a descargar, pero parsed() memoiza
+el parseo por hash del contenido, así que una página igual no se re-parsea.
+Métricas: http_revalidated_total{source}, http_parse_total{kind, result=hit|miss}.
+"""
+
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Tuple
+
+from utils import metrics
+from utils.CONSTANTS import HTTP_CACHE_NAME, HTTP_CACHE_TTL
+
+PARSED_MAX = 128       # resultados de parseo retenidos (LRU)
+
+_INSTALLED = False
+_LOCK = threading.Lock()
+_PARSED: "OrderedDict[Tuple[str, str], Any]" = OrderedDict()
+_PARSED_LOCK = threading.Lock()
+
+def ensure_installed() -> None:
+    global _INSTALLED
+    if _INSTALLED:
+        return
+    with _LOCK:
+        if not _INSTALLED:
+            import requests_cache
+            requests_cache.install_cache(HTTP_CACHE_NAME, expire_after=HTTP_CACHE_TTL)
+            _INSTALLED = True
+
+def disable() -> None:
+    """No instalar la caché (benchmarks / replay: cada request debe llegar al adapter)."""
+    global _INSTALLED
+    with _LOCK:
+        _INSTALLED = True
+
+def _cached_response(url: str):
+    import requests
+    import requests_cache
+    cache = requests_cache.get_cache()
+    if not cache:
+        return None
+    return cache.get_response(cache.create_key(requests.Request("GET", url).prepare()))
+
+def is_fresh(url: str) -> bool:
+    """
+    True si la URL tiene respuesta en la caché instalada y aún no caducó (se
+    sirve sin tocar la red). Una entrada caducada se revalida contra el
+    servidor: eso es un request real.
+    """
+    if not _INSTALLED:
+        return False
+    try:
+        cached = _cached_response(url)
+        return cached is not None and not cached.is_expired
+    except Exception:
+        return False
+
+def from_cache(r, source: str = "") -> bool:
+    """True si 'r' salió de la caché sin tocar la red (un 304 revalidado cuenta como request)."""
+    if getattr(r, "revalidated", False):
+        metrics.inc("http_revalidated_total", source=source or "unknown")
+        return False
+    return bool(getattr(r, "from_cache", False))
+
+def refresh_kwargs(session, url: str = "") -> dict:
+    """
+    kwargs de session.get() para obtener la versión actual (datos en vivo): con
+    validadores en la entrada cacheada, revalidación condicional (304 = sin
+    cuerpo); sin ellos, request completo.
+    """
+    cache = getattr(session, "cache", None)
+    if cache is None:
+        return {}
+    try:
+        import requests
+        cached = cache.get_response(cache.create_key(requests.Request("GET", url).prepare())) if url else None
+    except Exception:
+        cached = None
+    if cached is not None and ("ETag" in cached.headers or "Last-Modified" in cached.headers):
+        return {"refresh": True}
+    return {"force_refresh": True}
+
+def parsed(kind: str, body: bytes, parse: Callable[[], Any]) -> Any:
+    """parse() memoizado por (kind, sha1 del cuerpo): un cuerpo sin cambios no se re-parsea."""
+    key = (kind, hashlib.sha1(body or b"").hexdigest())
+    with _PARSED_LOCK:
+        if key in _PARSED:
+            _PARSED.move_to_end(key)
+            metrics.inc("http_parse_total", kind=kind, result="hit")
+            return _PARSED[key]
+    metrics.inc("http_parse_total", kind=kind, result="miss")
+    value = parse()
+    with _PARSED_LOCK:
+        _PARSED[key] = value
+        while len(_PARSED) > PARSED_MAX:
+            _PARSED.popitem(last=False)
+    return value
+
+def forget(urls) -> int:
+    """Borra de la caché las respuestas de estas URLs (GET). Devuelve cuántas había."""
+    if not _INSTALLED:
+        return 0
+    try:
+        import requests_cache
+        cache = requests_cache.get_cache()
+        if not cache:
+            return 0
+        present = [u for u in urls if cache.contains(url=u)]
+        if present:
+            cache.delete(urls=present)
+        return len(present)
+    except Exception:
+        return 0
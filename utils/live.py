@@ -0,0 +1,203 @@
+# utils/live.py
+"""
+Modo en vivo para días de partido.
+
+Sigue los resultados de la jornada en curso y, a medida que terminan partidos,
+actualiza la forma de los equipos implicados y las predicciones de la jornada
+siguiente, sin recalcular get_match_features para todos los partidos:
+
+  1) cada 'interval' segundos consulta eventsday.php SOLO para las fechas de la
+     jornada con partidos sin terminar dentro de la ventana [hoy - RECENT_DAYS, hoy]
+     (es la única consulta que tiene que ser fresca: revalidación condicional si
+     la respuesta cacheada tiene ETag / Last-Modified, si no request completo),
+  2) empareja los eventos con el calendario de la jornada (ids de TSDB, o nombres)
+     y detecta cambios por idEvent + marcador + estado,
+  3) con un partido terminado: borra de la caché HTTP las URLs de forma de sus
+     dos equipos (utils.get_previews_matches.tsdb_form_urls), invalida su
+     "form" en utils.feature_cache y recalcula solo los partidos de la jornada
+     siguiente en los que juegan (PredictionEngine.update_matches; sin modelos,
+     solo la forma).
+
+    live = LiveMatchday("laliga", 2025, 9, engine=PredictionEngine())
+    live.run(interval=60)                 # hasta que termine la jornada (o Ctrl+C)
+
+Métricas: live_polls_total{league}, live_changes_total{league, finished}.
+"""
+
+from __future__ import annotations
+
+import time
+from datetime import datetime, timedelta
+from typing import Callable, Dict, List, NamedTuple, Optional, Set, Tuple
+
+from utils import feature_cache, http_cache, metrics
+from utils.CONSTANTS import PREVIUS_MATCHES_CONSIDERED
+
+POLL_INTERVAL = 60.0
+RECENT_DAYS = 1          # además de hoy: partidos de anoche cuyo resultado llega tarde
+FINISHED = {"match finished", "ft", "aet", "pen", "after extra time", "after penalties"}
+
+class Fixture(NamedTuple):
+    slug: str
+    fecha: str           # dd/mm/aa
+    home: str
+    away: str
+
+    @property
+    def day(self) -> str:
+        return datetime.strptime(self.fecha, "%d/%m/%y").strftime("%Y-%m-%d")
+
+class Change(NamedTuple):
+    fixture: Fixture
+    event_id: str
+    home_goals: Optional[str]
+    away_goals: Optional[str]
+    status: str
+    finished: bool
+
+def is_finished(ev: dict) -> bool:
+    return (ev.get("strStatus") or "").strip().lower() in FINISHED
+
+def _fixtures(liga: str, temporada: int, jornada: int, debug: bool = False) -> List[Fixture]:
+    from utils.get_matches import get_matches_list
+    from utils.unslug_team import unslug_team
+    out = []
+    for slug, fecha in get_matches_list(liga, temporada, jornada, debug=debug) or []:
+        h, a = slug.split("-", 1)
+        out.append(Fixture(slug, fecha, unslug_team(h) or h, unslug_team(a) or a))
+    return out
+
+class LiveMatchday:
+    def __init__(self, liga: str, temporada: int, jornada: int, engine=None, debug: bool = False) -> None:
+        self.liga, self.temporada, self.jornada = liga, temporada, jornada
+        self.engine = engine
+        self.debug = debug
+        self.fixtures = _fixtures(liga, temporada, jornada, debug=debug)
+        self.state: Dict[str, Tuple[Optional[str], Optional[str], str]] = {}   # idEvent -> (gl, gv, estado)
+        self.finished: Set[str] = set()                                        # slugs terminados
+        self._team_ids: Dict[str, Optional[str]] = {}
+        self._next: Optional[List[Fixture]] = None
+
+    # ---------- sondeo ----------
+    def stranded(self, today: Optional[datetime] = None) -> List[Fixture]:
+        """
+        Partidos sin terminar que ya no se van a sondear: fecha anterior a la
+        ventana (aplazados, minado que arrancó tarde, estado fuera de FINISHED).
+        Vacía mientras quede algún partido pendiente en la ventana o en el futuro.
+        """
+        today = (today or datetime.now()).replace(hour=0, minute=0, second=0, microsecond=0)
+        hi = today.strftime("%Y-%m-%d")
+        pending = [f for f in self.fixtures if f.slug not in self.finished]
+        if self.due_dates(today) or any(f.day > hi for f in pending):
+            return []
+        return pending
+
+    def due_dates(self, today: Optional[datetime] = None) -> List[str]:
+        """Fechas (ISO) a consultar: las de partidos sin terminar dentro de la ventana."""
+        today = (today or datetime.now()).replace(hour=0, minute=0, second=0, microsecond=0)
+        lo = (today - timedelta(days=RECENT_DAYS)).strftime("%Y-%m-%d")
+        hi = today.strftime("%Y-%m-%d")
+        return sorted({f.day for f in self.fixtures if f.slug not in self.finished and lo <= f.day <= hi})
+
+    def _team_id(self, name: str) -> Optional[str]:
+        from utils.get_match_result import _resolve_team_id_by_name
+        if name not in self._team_ids:
+            self._team_ids[name] = _resolve_team_id_by_name(name, debug=self.debug)
+        return self._team_ids[name]
+
+    def _event_for(self, fx: Fixture, events: List[dict]) -> Optional[dict]:
+        from utils.get_match_result import _match_event_by_ids, _match_event_by_names
+        ih, ia = self._team_id(fx.home), self._team_id(fx.away)
+        ev = _match_event_by_ids(ih, ia, events) if ih and ia else None
+        return ev or _match_event_by_names(fx.home, fx.away, events)
+
+    def poll(self, today: Optional[datetime] = None) -> List[Change]:
+        """Una pasada: consulta las fechas pendientes y devuelve los eventos que cambiaron."""
+        from utils.get_match_result import _day_url, _robust_get_json
+        changes = []
+        for day in self.due_dates(today):
+            data = _robust_get_json(_day_url(day), debug=self.debug, fresh=True)
+            metrics.inc("live_polls_total", league=self.liga)
+            events = (data or {}).get("events") or []
+            for fx in self.fixtures:
+                if fx.day != day or fx.slug in self.finished:
+                    continue
+                ev = self._event_for(fx, events)
+                if ev is None or not ev.get("idEvent"):
+                    continue
+                snap = (ev.get("intHomeScore"), ev.get("intAwayScore"), ev.get("strStatus") or "")
+                if self.state.get(ev["idEvent"]) == snap:
+                    continue
+                self.state[ev["idEvent"]] = snap
+                done = is_finished(ev)
+                if done:
+                    self.finished.add(fx.slug)
+                changes.append(Change(fx, ev["idEvent"], snap[0], snap[1], snap[2], done))
+                metrics.inc("live_changes_total", league=self.liga, finished=str(done).lower())
+        return changes
+
+    # ---------- recálculo ----------
+    def next_fixtures(self) -> List[Fixture]:
+        if self._next is None:
+            self._next = _fixtures(self.liga, self.temporada, self.jornada + 1, debug=self.debug)
+        return self._next
+
+    def refresh_teams(self, teams: Set[str]) -> Optional[dict]:
+        """
+        Forma nueva para 'teams' y recálculo de los partidos de la jornada
+        siguiente donde juegan. Devuelve la entrada de predicciones actualizada
+        (o None sin motor de predicción / sin partidos afectados).
+        """
+        from utils.get_previews_matches import get_previus_matches, tsdb_form_urls
+        affected = [f for f in self.next_fixtures() if f.home in teams or f.away in teams]
+        for team in teams:
+            fecha = next((f.fecha for f in affected if team in (f.home, f.away)), datetime.now().strftime("%d/%m/%y"))
+            forgotten = http_cache.forget(tsdb_form_urls(team, fecha, debug=self.debug))
+            dropped = feature_cache.invalidate_team(team, "form")
+            if self.debug:
+                print(f"[live] {team}: {forgotten} URLs y {dropped} features invalidadas")
+        if not affected:
+            return None
+        if self.engine is not None:
+            return self.engine.update_matches(self.liga, self.temporada, self.jornada + 1,
+                                              [f.slug for f in affected], debug=self.debug)
+        # sin modelos: al menos dejar calculada la forma nueva (mismas claves que Match)
+        for f in affected:
+            for team in {f.home, f.away} & teams:
+                feature_cache.get_or_compute(
+                    "form", team, f.fecha,
+                    lambda: get_previus_matches(team, f.fecha, PREVIUS_MATCHES_CONSIDERED, debug=self.debug),
+                    n=PREVIUS_MATCHES_CONSIDERED)
+        return None
+
+    # ---------- bucle ----------
+    def run(self, interval: float = POLL_INTERVAL, on_update: Optional[Callable[[dict], None]] = None,
+            max_polls: Optional[int] = None) -> None:
+        """
+        Sondea hasta que terminen todos los partidos de la jornada (o max_polls
+        pasadas). Si los que faltan ya no caen en ninguna ventana de sondeo
+        (stranded), avisa y termina en vez de dormir para siempre.
+        """
+        polls = 0
+        while len(self.finished) < len(self.fixtures):
+            if max_polls is not None and polls >= max_polls:
+                break
+            stranded = self.stranded()
+            if stranded:
+                print(f"[live] sin fechas que sondear; {len(stranded)} partidos sin resultado "
+                      f"(¿aplazados?): " + ", ".join(f"{f.home}-{f.away} {f.fecha}" for f in stranded))
+                break
+            polls += 1
+            changes = self.poll()
+            for c in changes:
+                estado = "final" if c.finished else (c.status or "en juego")
+                print(f"[live] {c.fixture.home} {c.home_goals or '-'}-{c.away_goals or '-'} {c.fixture.away} ({estado})")
+            teams = {t for c in changes if c.finished for t in (c.fixture.home, c.fixture.away)}
+            if teams:
+                entry = self.refresh_teams(teams)
+                if entry is not None and on_update:
+                    on_update(entry)
+            if len(self.finished) < len(self.fixtures):
+                time.sleep(interval)
+        print(f"[live] {self.liga} {self.temporada} J{self.jornada}: "
+              f"{len(self.finished)}/{len(self.fixtures)} partidos terminados")
@@ -0,0 +1,145 @@
+# utils/match_store.py
+"""
+Histórico local de resultados en arrays numpy (base de los motores offline:
+Elo, clasificación, head-to-head).
+
+Se construye a partir de los shards minados (utils.feature_store): cada fila con
+GL/GV conocidos es un partido jugado. Los partidos quedan ordenados por fecha y
+los equipos se identifican por su nombre normalizado (sin acentos ni signos),
+que es estable porque el minado escribe siempre el mismo nombre por equipo.
+
+    store = load_match_store()                    # todos los shards
+    store.dates   # datetime64[D], orden ascendente
+    store.home, store.away   # índices en store.teams
+    store.hg, store.ag       # goles
+    days, starts = store.match_days()             # agrupación por día
+"""
+
+from __future__ import annotations
+
+import re
+import unicodedata
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+from utils import feature_store
+
+DATE_FMT = "%d/%m/%y"
+
+def normalize_team(name: str) -> str:
+    s = unicodedata.normalize("NFKD", name or "")
+    s = "".join(c for c in s if not unicodedata.combining(c)).lower()
+    return re.sub(r"[^a-z0-9]+", "", s)
+
+def to_day(fecha) -> np.datetime64:
+    """'dd/mm/aa' | datetime | datetime64 -> datetime64[D]."""
+    if isinstance(fecha, str):
+        fecha = datetime.strptime(fecha, DATE_FMT)
+    return np.datetime64(fecha, "D")
+
+class MatchStore:
+    """Partidos jugados ordenados por fecha (arrays paralelos)."""
+
+    def __init__(self) -> None:
+        self.teams: List[str] = []
+        self.team_idx: Dict[str, int] = {}
+        self.dates = np.empty(0, dtype="datetime64[D]")
+        self.home = np.empty(0, dtype=np.int32)
+        self.away = np.empty(0, dtype=np.int32)
+        self.hg = np.empty(0, dtype=np.int16)
+        self.ag = np.empty(0, dtype=np.int16)
+        self.comp = np.empty(0, dtype=object)
+        self.season = np.empty(0, dtype=np.int16)
+        self._keys: set = set()
+
+    def __len__(self) -> int:
+        return len(self.dates)
+
+    @property
+    def n_teams(self) -> int:
+        return len(self.teams)
+
+    def index_of(self, name: str) -> Optional[int]:
+        return self.team_idx.get(normalize_team(name))
+
+    def _team(self, name: str) -> int:
+        key = normalize_team(name)
+        i = self.team_idx.get(key)
+        if i is None:
+            i = self.team_idx[key] = len(self.teams)
+            self.teams.append(name)
+        return i
+
+    def extend(self, records: Iterable[Tuple]) -> int:
+        """
+        Añade partidos (fecha, local, visitante, gl, gv, competición, temporada).
+        Ignora duplicados (misma fecha y equipos). Devuelve la posición del primer
+        partido del día más antiguo añadido: desde ahí los índices pueden cambiar.
+        """
+        new = []
+        day_of: Dict[object, np.datetime64] = {}   # las fechas se repiten mucho: parsear una vez
+        for fecha, home, away, gl, gv, comp, season in records:
+            d = day_of.get(fecha)
+            if d is None:
+                d = day_of[fecha] = to_day(fecha)
+            h, a = self._team(home), self._team(away)
+            key = (int(d.astype(np.int64)), h, a)
+            if key in self._keys:
+                continue
+            self._keys.add(key)
+            new.append((d, h, a, int(gl), int(gv), comp, int(season or 0)))
+        if not new:
+            return len(self)
+        new.sort(key=lambda r: r[0])
+        d, h, a, gl, gv, comp, season = zip(*new)
+        first_new = np.datetime64(d[0], "D")
+        pos = int(np.searchsorted(self.dates, first_new, side="left"))        # primer partido de ese día
+        needs_sort = int(np.searchsorted(self.dates, first_new, side="right")) < len(self)
+        self.dates = np.concatenate([self.dates, np.asarray(d, dtype="datetime64[D]")])
+        self.home = np.concatenate([self.home, np.asarray(h, dtype=np.int32)])
+        self.away = np.concatenate([self.away, np.asarray(a, dtype=np.int32)])
+        self.hg = np.concatenate([self.hg, np.asarray(gl, dtype=np.int16)])
+        self.ag = np.concatenate([self.ag, np.asarray(gv, dtype=np.int16)])
+        self.comp = np.concatenate([self.comp, np.asarray(comp, dtype=object)])
+        self.season = np.concatenate([self.season, np.asarray(season, dtype=np.int16)])
+        if needs_sort:
+            # llegaron partidos anteriores al final: reordenar (estable)
+            order = np.argsort(self.dates, kind="stable")
+            for name in ("dates", "home", "away", "hg", "ag", "comp", "season"):
+                setattr(self, name, getattr(self, name)[order])
+        return pos
+
+    def match_days(self, start: int = 0) -> Tuple[np.ndarray, np.ndarray]:
+        """(días únicos, índice del primer partido de cada día) desde 'start'."""
+        days, starts = np.unique(self.dates[start:], return_index=True)
+        return days, starts + start
+
+    def points(self) -> Tuple[np.ndarray, np.ndarray]:
+        """Puntos (3/1/0) de local y visitante por partido."""
+        diff = self.hg.astype(np.int32) - self.ag
+        ph = np.where(diff > 0, 3, np.where(diff == 0, 1, 0)).astype(np.int8)
+        pa = np.where(diff < 0, 3, np.where(diff == 0, 1, 0)).astype(np.int8)
+        return ph, pa
+
+def _int_or_none(v: str) -> Optional[int]:
+    try:
+        return int(float(v))
+    except (TypeError, ValueError):
+        return None
+
+def records_from_shards(paths: Iterable[str]):
+    """Filas de shards con marcador -> tuplas para MatchStore.extend."""
+    for row in feature_store.iter_rows(paths):
+        gl, gv = _int_or_none(row.get("GL")), _int_or_none(row.get("GV"))
+        if gl is None or gv is None or not row.get("Fecha"):
+            continue
+        yield (row["Fecha"], row["Local"], row["Visitante"], gl, gv,
+               row.get("Competición", ""), _int_or_none(row.get("Temporada")))
+
+def load_match_store(root: str = feature_store.FEATURES_DIR, ligas: Optional[Iterable[str]] = None,
+                     paths: Optional[List[str]] = None) -> MatchStore:
+    store = MatchStore()
+    store.extend(records_from_shards(paths if paths is not None else feature_store.list_shards(root, ligas)))
+    return store
@@ -0,0 +1,214 @@
+# utils/metrics.py
+"""
+Métricas de ejecución para el minado / predicción.
+
+Contadores e histogramas de latencia en memoria, etiquetados por fuente, host,
+endpoint, estado HTTP, cache hit/miss y etapa de get_match_features.
+
+Uso típico:
+    from utils import metrics
+    metrics.record_request("tsdb", url, 200, 0.31, from_cache=False)
+    with metrics.timer("match_stage_seconds", stage="elo"):
+        ...
+    metrics.dump("metrics.prom")          # texto Prometheus
+    metrics.dump("metrics.json")          # JSON
+
+Si la variable de entorno CASANDRA_METRICS apunta a un fichero, las métricas se
+vuelcan automáticamente al terminar el proceso (formato según extensión).
+"""
+
+from __future__ import annotations
+
+import atexit
+import json
+import os
+import re
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Optional, Tuple
+from urllib.parse import urlsplit
+
+# -------------------------------------------------------------------
+# Configuración
+# -------------------------------------------------------------------
+PREFIX = "casandra_"
+# Buckets (segundos) pensados para latencias HTTP, backoffs y etapas completas
+BUCKETS: Tuple[float, ...] = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+LabelKey = Tuple[Tuple[str, str], ...]
+
+class _Histogram:
+    __slots__ = ("counts", "total", "count", "min", "max")
+
+    def __init__(self) -> None:
+        self.counts = [0] * (len(BUCKETS) + 1)  # último = +Inf
+        self.total = 0.0
+        self.count = 0
+        self.min: Optional[float] = None
+        self.max: Optional[float] = None
+
+    def observe(self, v: float) -> None:
+        i = 0
+        while i < len(BUCKETS) and v > BUCKETS[i]:
+            i += 1
+        self.counts[i] += 1
+        self.total += v
+        self.count += 1
+        self.min = v if self.min is None else min(self.min, v)
+        self.max = v if self.max is None else max(self.max, v)
+
+_LOCK = threading.Lock()
+_COUNTERS: Dict[str, Dict[LabelKey, float]] = {}
+_HISTOGRAMS: Dict[str, Dict[LabelKey, _Histogram]] = {}
+
+def _key(labels: Dict[str, object]) -> LabelKey:
+    return tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+# -------------------------------------------------------------------
+# API de registro
+# -------------------------------------------------------------------
+def inc(name: str, value: float = 1.0, **labels) -> None:
+    k = _key(labels)
+    with _LOCK:
+        series = _COUNTERS.setdefault(name, {})
+        series[k] = series.get(k, 0.0) + value
+
+def observe(name: str, seconds: float, **labels) -> None:
+    k = _key(labels)
+    with _LOCK:
+        series = _HISTOGRAMS.setdefault(name, {})
+        h = series.get(k)
+        if h is None:
+            h = series[k] = _Histogram()
+        h.observe(seconds)
+
+@contextmanager
+def timer(name: str, **labels) -> Iterator[None]:
+    t0 = time.perf_counter()
+    try:
+        yield
+    finally:
+        observe(name, time.perf_counter() - t0, **labels)
+
+def get_counter(name: str, **labels) -> float:
+    """Valor de un contador; sin etiquetas suma todas las series."""
+    with _LOCK:
+        series = _COUNTERS.get(name, {})
+        if not labels:
+            return sum(series.values())
+        want = set(_key(labels))
+        return sum(v for k, v in series.items() if want.issubset(k))
+
+def reset() -> None:
+    with _LOCK:
+        _COUNTERS.clear()
+        _HISTOGRAMS.clear()
+
+# -------------------------------------------------------------------
+# Helpers HTTP (cardinalidad acotada de endpoints)
+# -------------------------------------------------------------------
+_RE_DATE = re.compile(r"\d{4}-\d{2}-\d{2}")
+_RE_SEASON = re.compile(r"\d{4}-\d{4}")
+_RE_HEXID = re.compile(r"\b[0-9a-f]{8}\b")
+_RE_NUM = re.compile(r"\d+")
+
+def endpoint_of(url: str) -> Tuple[str, str]:
+    """
+    (host, endpoint) con fechas, temporadas e ids colapsados:
+      https://www.thesportsdb.com/api/v1/json/123/eventsday.php?d=... -> eventsday.php
+      http://api.clubelo.com/2025-10-05                              -> /{date}
+      https://fbref.com/en/squads/206d90db/Barcelona-Stats           -> /en/squads/{id}/...
+    """
+    parts = urlsplit(url or "")
+    host = parts.netloc.lower()
+    path = parts.path or "/"
+    last = path.rsplit("/", 1)[-1]
+    if last.endswith(".php") or last.endswith(".fcgi"):
+        return host, last
+    p = _RE_SEASON.sub("{season}", path)
+    p = _RE_DATE.sub("{date}", p)
+    p = _RE_HEXID.sub("{id}", p)
+    p = _RE_NUM.sub("{n}", p)
+    segs = [s for s in p.split("/") if s]
+    if len(segs) > 3:
+        segs = segs[:3] + ["..."]
+    return host, "/" + "/".join(segs)
+
+def record_request(source: str, url: str, status, elapsed: float, from_cache: bool = False) -> None:
+    host, endpoint = endpoint_of(url)
+    inc("http_requests_total", source=source, host=host, endpoint=endpoint, status=status)
+    inc("http_cache_total", source=source, host=host, result="hit" if from_cache else "miss")
+    observe("http_request_seconds", elapsed, source=source, host=host, endpoint=endpoint)
+
+def record_retry(source: str, url: str, reason, wait: float) -> None:
+    host, endpoint = endpoint_of(url)
+    inc("http_retries_total", source=source, host=host, endpoint=endpoint, reason=reason)
+    observe("http_backoff_seconds", wait, source=source, host=host)
+
+# -------------------------------------------------------------------
+# Exportación
+# -------------------------------------------------------------------
+def snapshot() -> dict:
+    with _LOCK:
+        counters = {
+            name: [{"labels": dict(k), "value": v} for k, v in sorted(series.items())]
+            for name, series in sorted(_COUNTERS.items())
+        }
+        hists = {}
+        for name, series in sorted(_HISTOGRAMS.items()):
+            hists[name] = [{
+                "labels": dict(k),
+                "count": h.count,
+                "sum": round(h.total, 6),
+                "min": h.min,
+                "max": h.max,
+                "buckets": {str(b): c for b, c in zip(list(BUCKETS) + ["+Inf"], h.counts)},
+            } for k, h in sorted(series.items())]
+    return {"generated_at": time.time(), "counters": counters, "histograms": hists}
+
+def export_json(indent: int = 2) -> str:
+    return json.dumps(snapshot(), ensure_ascii=False, indent=indent)
+
+def _fmt_labels(k: LabelKey, extra: Optional[Tuple[str, str]] = None) -> str:
+    items = list(k) + ([extra] if extra else [])
+    if not items:
+        return ""
+    esc = lambda v: v.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+    return "{" + ",".join(f'{n}="{esc(v)}"' for n, v in items) + "}"
+
+def export_prometheus() -> str:
+    lines: List[str] = []
+    with _LOCK:
+        for name, series in sorted(_COUNTERS.items()):
+            full = PREFIX + name
+            lines.append(f"# TYPE {full} counter")
+            for k, v in sorted(series.items()):
+                lines.append(f"{full}{_fmt_labels(k)} {v:g}")
+        for name, series in sorted(_HISTOGRAMS.items()):
+            full = PREFIX + name
+            lines.append(f"# TYPE {full} histogram")
+            for k, h in sorted(series.items()):
+                acc = 0
+                for b, c in zip(BUCKETS, h.counts):
+                    acc += c
+                    lines.append(f"{full}_bucket{_fmt_labels(k, ('le', f'{b:g}'))} {acc}")
+                lines.append(f"{full}_bucket{_fmt_labels(k, ('le', '+Inf'))} {h.count}")
+                lines.append(f"{full}_sum{_fmt_labels(k)} {h.total:.6f}")
+                lines.append(f"{full}_count{_fmt_labels(k)} {h.count}")
+    return "\n".join(lines) + "\n"
+
+def dump(path: str, fmt: Optional[str] = None) -> None:
+    """Vuelca métricas a 'path'. fmt: 'json'|'prometheus' (por defecto según extensión)."""
+    if fmt is None:
+        fmt = "json" if path.lower().endswith(".json") else "prometheus"
+    text = export_json() if fmt == "json" else export_prometheus()
+    d = os.path.dirname(path)
+    if d:
+        os.makedirs(d, exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(text)
+
+_ENV_OUT = os.environ.get("CASANDRA_METRICS")
+if _ENV_OUT:
+    atexit.register(dump, _ENV_OUT)
@@ -0,0 +1,124 @@
+# utils/model_artifact.py
+"""
+Artefactos de modelo memory-mappables (arranque rápido del CLI).
+
+Un modelo entrenado se guarda como directorio:
+
+    models/<target>/
+        meta.json        tipo ('linear' | 'rbf'), clases, encoder, hiperparámetros
+        *.npy            arrays del modelo (coef / support vectors / dual coef ...)
+
+load_artifact() abre los .npy con mmap_mode="r" (sin copiar ni deserializar) y
+devuelve un ArtifactModel que implementa decision_function solo con numpy,
+así que predecir no importa sklearn ni joblib.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+from typing import Dict, List
+
+import numpy as np
+
+META = "meta.json"
+
+# ---------- Exportación (desde sklearn) ----------
+def save_artifact(model, out_dir: str, meta: Dict) -> str:
+    """
+    Guarda un SGDClassifier/LinearSVC (lineal) o un SVC con kernel RBF.
+    'meta' debe incluir encoder (dict), classes, target, path y validation.
+    """
+    os.makedirs(out_dir, exist_ok=True)
+    arrays: Dict[str, np.ndarray] = {"model_classes": np.asarray(model.classes_, dtype=np.int64)}
+    if hasattr(model, "coef_") and getattr(model, "kernel", "linear") == "linear":
+        kind = "linear"
+        arrays["coef"] = np.ascontiguousarray(model.coef_, dtype=np.float32)
+        arrays["intercept"] = np.asarray(model.intercept_, dtype=np.float32)
+        params = {}
+    elif getattr(model, "kernel", None) == "rbf":
+        kind = "rbf"
+        arrays["support_vectors"] = np.ascontiguousarray(model.support_vectors_, dtype=np.float32)
+        arrays["dual_coef"] = np.asarray(model.dual_coef_, dtype=np.float64)
+        arrays["intercept"] = np.asarray(model.intercept_, dtype=np.float64)
+        arrays["n_support"] = np.asarray(model.n_support_, dtype=np.int64)
+        params = {"gamma": float(model._gamma)}
+    else:
+        raise ValueError(f"Modelo no soportado para artefacto: {type(model).__name__}")
+
+    for name, arr in arrays.items():
+        np.save(os.path.join(out_dir, f"{name}.npy"), arr)
+    meta = dict(meta, kind=kind, params=params, arrays=sorted(arrays))
+    tmp = os.path.join(out_dir, META + ".tmp")
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(meta, f, ensure_ascii=False)
+    os.replace(tmp, os.path.join(out_dir, META))  # meta al final: el artefacto es válido o no existe
+    return out_dir
+
+# ---------- Carga + inferencia numpy ----------
+def _ovr_from_ovo(dec: np.ndarray, n_classes: int) -> np.ndarray:
+    """Misma transformación ovo->ovr que sklearn (votos + confianza acotada)."""
+    votes = np.zeros((dec.shape[0], n_classes))
+    conf = np.zeros((dec.shape[0], n_classes))
+    k = 0
+    for i in range(n_classes):
+        for j in range(i + 1, n_classes):
+            conf[:, i] += dec[:, k]
+            conf[:, j] -= dec[:, k]
+            votes[dec[:, k] > 0, i] += 1
+            votes[dec[:, k] <= 0, j] += 1
+            k += 1
+    return votes + conf / (3 * (np.abs(conf) + 1))
+
+class ArtifactModel:
+    """Modelo cargado por mmap; expone classes_ y decision_function como sklearn."""
+
+    def __init__(self, path: str, meta: Dict, arrays: Dict[str, np.ndarray]) -> None:
+        self.path = path
+        self.meta = meta
+        self.kind = meta["kind"]
+        self.arrays = arrays
+        self.classes_ = np.asarray(arrays["model_classes"])
+
+    def decision_function(self, X: np.ndarray) -> np.ndarray:
+        X = np.asarray(X, dtype=np.float32)
+        a = self.arrays
+        if self.kind == "linear":
+            s = X @ a["coef"].T + a["intercept"]
+            return s[:, 0] if s.shape[1] == 1 else s
+        # RBF: K(x, sv) = exp(-gamma * ||x - sv||^2)
+        sv = a["support_vectors"]
+        sq = (X * X).sum(axis=1)[:, None] + (sv * sv).sum(axis=1)[None, :] - 2.0 * (X @ sv.T)
+        K = np.exp(-self.meta["params"]["gamma"] * np.maximum(sq, 0.0)).astype(np.float64)
+        n_sup = np.asarray(a["n_support"])
+        starts = np.concatenate([[0], np.cumsum(n_sup)])
+        dual, b = a["dual_coef"], a["intercept"]
+        n_cls = len(n_sup)
+        dec = np.empty((X.shape[0], n_cls * (n_cls - 1) // 2))
+        p = 0
+        for i in range(n_cls):
+            for j in range(i + 1, n_cls):
+                si, sj = slice(starts[i], starts[i + 1]), slice(starts[j], starts[j + 1])
+                dec[:, p] = K[:, si] @ dual[j - 1, si] + K[:, sj] @ dual[i, sj] + b[p]
+                p += 1
+        if n_cls == 2:
+            return dec[:, 0]
+        return _ovr_from_ovo(dec, n_cls)
+
+def read_meta(path: str) -> Dict:
+    with open(os.path.join(path, META), "r", encoding="utf-8") as f:
+        return json.load(f)
+
+def load_artifact(path: str) -> ArtifactModel:
+    meta = read_meta(path)
+    arrays = {n: np.load(os.path.join(path, f"{n}.npy"), mmap_mode="r") for n in meta["arrays"]}
+    return ArtifactModel(path, meta, arrays)
+
+def artifact_id(path: str) -> str:
+    st = os.stat(os.path.join(path, META))
+    return f"{os.path.basename(path)}:{st.st_size}:{st.st_mtime_ns}"
+
+def list_artifacts(models_dir: str) -> List[str]:
+    if not os.path.isdir(models_dir):
+        return []
+    return sorted(d for d in os.listdir(models_dir) if os.path.exists(os.path.join(models_dir, d, META)))
@@ -0,0 +1,134 @@
+# utils/negative_cache.py
+"""
+Caché de resultados negativos ("esto no existe") con TTL y motivo.
+
+La caché HTTP guarda respuestas, pero no evita el trabajo de volver a
+preguntar: probar todas las variantes de nombre en searchteams.php, lanzar las
+búsquedas "A vs B" de searchevents.php o recorrer back_days tablas de ClubElo
+con el matching difuso para un equipo que no está. Aquí se anota la ausencia:
+
+    reason = negative_cache.lookup("tsdb_team", name_key)   # None = no hay negativo vigente
+    negative_cache.record("tsdb_team", name_key, negative_cache.NOT_FOUND)
+
+El TTL sale del motivo (ver TTLS): un "no encontrado" definitivo dura semanas,
+un fallo de red minutos. ttl_for_date() acorta los TTL de partidos recientes
+(el evento o la tabla del día pueden aparecer en las próximas horas).
+
+Tras cambiar alias o reglas de matching, purge(kind, expired_only=False) borra
+los negativos que ya no valen.
+
+Estado compartido entre procesos en SQLite (./data/negative_cache.sqlite o
+CASANDRA_NEGATIVE_DB; en un montaje de red, sin WAL: utils.sqlite_journal).
+CASANDRA_NEGATIVE_CACHE=0 (o disable()) lo desactiva.
+Métricas: negative_cache_total{kind, result=hit|store}.
+"""
+
+from __future__ import annotations
+
+import os
+import sqlite3
+import threading
+import time
+from datetime import datetime
+from typing import Dict, Optional
+
+from utils import metrics, sqlite_journal
+
+DB_PATH = os.environ.get("CASANDRA_NEGATIVE_DB", "./data/negative_cache.sqlite")
+
+# motivos
+NOT_FOUND = "not_found"          # la fuente respondió y el equipo/evento no está
+FETCH_FAILED = "fetch_failed"    # la fuente no respondió (reintentar pronto)
+
+DAY = 86400.0
+TTLS: Dict[str, float] = {
+    NOT_FOUND: 30 * DAY,
+    FETCH_FAILED: 15 * 60.0,
+}
+RECENT_DAYS = 7                  # partidos más recientes que esto: TTL corto
+RECENT_TTL = 3 * 3600.0
+
+_ENABLED = os.environ.get("CASANDRA_NEGATIVE_CACHE", "1") != "0"
+_LOCAL = threading.local()
+
+def disable() -> None:
+    global _ENABLED
+    _ENABLED = False
+
+def enable() -> None:
+    global _ENABLED
+    _ENABLED = True
+
+def ttl_for_date(reason: str, fecha: datetime) -> float:
+    """TTL del motivo, acotado a RECENT_TTL si el partido/día es reciente o futuro."""
+    ttl = TTLS.get(reason, TTLS[FETCH_FAILED])
+    if (datetime.now() - fecha).days < RECENT_DAYS:
+        ttl = min(ttl, RECENT_TTL)
+    return ttl
+
+def _conn() -> sqlite3.Connection:
+    c = getattr(_LOCAL, "conn", None)
+    if c is None or getattr(_LOCAL, "path", None) != DB_PATH:
+        d = os.path.dirname(DB_PATH)
+        if d:
+            os.makedirs(d, exist_ok=True)
+        c = sqlite3.connect(DB_PATH, timeout=30, isolation_level=None)
+        c.execute(f"PRAGMA journal_mode={sqlite_journal.journal_mode(DB_PATH)}")
+        c.execute("""CREATE TABLE IF NOT EXISTS negatives (
+                         kind TEXT NOT NULL,
+                         key TEXT NOT NULL,
+                         reason TEXT NOT NULL,
+                         created REAL NOT NULL,
+                         expires REAL NOT NULL,
+                         PRIMARY KEY (kind, key))""")
+        _LOCAL.conn, _LOCAL.path = c, DB_PATH
+    return c
+
+def lookup(kind: str, key: str) -> Optional[str]:
+    """Motivo del negativo vigente para (kind, key), o None."""
+    if not _ENABLED:
+        return None
+    row = _conn().execute("SELECT reason FROM negatives WHERE kind=? AND key=? AND expires>?",
+                          (kind, key, time.time())).fetchone()
+    if row is None:
+        return None
+    metrics.inc("negative_cache_total", kind=kind, result="hit")
+    return row[0]
+
+def record(kind: str, key: str, reason: str, ttl: Optional[float] = None) -> None:
+    if not _ENABLED:
+        return
+    now = time.time()
+    ttl = TTLS.get(reason, TTLS[FETCH_FAILED]) if ttl is None else ttl
+    _conn().execute("INSERT OR REPLACE INTO negatives VALUES (?,?,?,?,?)", (kind, key, reason, now, now + ttl))
+    metrics.inc("negative_cache_total", kind=kind, result="store")
+
+def count(kind: str, prefix: str = "") -> int:
+    """Negativos vigentes de 'kind' cuya clave empieza por 'prefix'."""
+    if not _ENABLED:
+        return 0
+    return _conn().execute("SELECT COUNT(*) FROM negatives WHERE kind=? AND substr(key, 1, ?)=? AND expires>?",
+                           (kind, len(prefix), prefix, time.time())).fetchone()[0]
+
+def forget(kind: str, key: str) -> None:
+    if _ENABLED:
+        _conn().execute("DELETE FROM negatives WHERE kind=? AND key=?", (kind, key))
+
+def purge(kind: Optional[str] = None, expired_only: bool = True) -> int:
+    """Borra entradas (caducadas por defecto). Devuelve cuántas."""
+    sql, args = "DELETE FROM negatives WHERE 1=1", []
+    if kind:
+        sql += " AND kind=?"
+        args.append(kind)
+    if expired_only:
+        sql += " AND expires<=?"
+        args.append(time.time())
+    return _conn().execute(sql, args).rowcount
+
+def stats() -> Dict[str, Dict[str, int]]:
+    """{kind: {reason: entradas vigentes}}."""
+    out: Dict[str, Dict[str, int]] = {}
+    for kind, reason, n in _conn().execute(
+            "SELECT kind, reason, COUNT(*) FROM negatives WHERE expires>? GROUP BY kind, reason", (time.time(),)):
+        out.setdefault(kind, {})[reason] = n
+    return out
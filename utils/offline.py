@@ -0,0 +1,111 @@
+# utils/offline.py
+"""
+Modo offline estricto.
+
+Con el modo activo, todos los scrapers sirven SOLO desde la caché HTTP local
+(sports_http_cache.sqlite, incluidas entradas caducadas) y los stores en ./data.
+Un fallo de caché no va a la red: lanza OfflineMiss (los helpers lo tratan como
+un error de red y siguen) y queda anotado como (fuente, clave) para el reporte.
+Sin red tampoco hay pausas de cortesía, rate limit ni backoff.
+
+Activación:
+    CASANDRA_OFFLINE=1                 # variable de entorno
+    offline.enable()                   # desde código
+Reporte:
+    CASANDRA_OFFLINE_REPORT=miss.json  # se escribe al terminar el proceso
+    offline.write_report("miss.json")
+"""
+
+from __future__ import annotations
+
+import atexit
+import json
+import os
+import threading
+import time
+from typing import Dict, Optional, Set
+
+from utils import metrics
+from utils.CONSTANTS import HTTP_CACHE_NAME, HTTP_CACHE_TTL
+
+_ENABLED = os.environ.get("CASANDRA_OFFLINE", "0") == "1"
+_LOCK = threading.Lock()
+_MISSES: Dict[str, Set[str]] = {}
+_HITS: Dict[str, int] = {}
+_SESSION = None
+
+class OfflineMiss(RuntimeError):
+    """Entrada ausente en caché local estando en modo offline."""
+
+    def __init__(self, source: str, key: str) -> None:
+        super().__init__(f"[offline] sin caché para {source}: {key}")
+        self.source = source
+        self.key = key
+
+def enable(flag: bool = True) -> None:
+    global _ENABLED
+    _ENABLED = bool(flag)
+
+def is_enabled() -> bool:
+    return _ENABLED
+
+def record_miss(source: str, key: str) -> OfflineMiss:
+    """Anota el fallo y devuelve la excepción para que el llamador la lance."""
+    with _LOCK:
+        _MISSES.setdefault(source, set()).add(key)
+    metrics.inc("offline_miss_total", source=source)
+    return OfflineMiss(source, key)
+
+def record_hit(source: str) -> None:
+    with _LOCK:
+        _HITS[source] = _HITS.get(source, 0) + 1
+
+def _session():
+    global _SESSION
+    if _SESSION is None:
+        with _LOCK:
+            if _SESSION is None:
+                import requests_cache
+                # stale_if_error: una entrada caducada sigue valiendo para builds reproducibles
+                _SESSION = requests_cache.CachedSession(HTTP_CACHE_NAME, expire_after=HTTP_CACHE_TTL,
+                                                        stale_if_error=True)
+    return _SESSION
+
+def cached_get(url: str, source: str, headers: Optional[dict] = None):
+    """
+    GET servido únicamente desde la caché HTTP. Lanza OfflineMiss si no está.
+    """
+    t0 = time.perf_counter()
+    r = _session().get(url, headers=headers, only_if_cached=True)
+    if r.status_code == 504:  # requests_cache: "Not Cached" (solo se cachean 200)
+        raise record_miss(source, url)
+    metrics.record_request(source, url, r.status_code, time.perf_counter() - t0, from_cache=True)
+    record_hit(source)
+    return r
+
+def report() -> dict:
+    with _LOCK:
+        missing = {s: sorted(keys) for s, keys in sorted(_MISSES.items())}
+        hits = dict(sorted(_HITS.items()))
+    return {
+        "offline": _ENABLED,
+        "hits": hits,
+        "missing": missing,
+        "missing_total": sum(len(v) for v in missing.values()),
+    }
+
+def write_report(path: str) -> None:
+    d = os.path.dirname(path)
+    if d:
+        os.makedirs(d, exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(report(), f, ensure_ascii=False, indent=2)
+
+def reset() -> None:
+    with _LOCK:
+        _MISSES.clear()
+        _HITS.clear()
+
+_ENV_REPORT = os.environ.get("CASANDRA_OFFLINE_REPORT")
+if _ENV_REPORT:
+    atexit.register(write_report, _ENV_REPORT)
@@ -0,0 +1,268 @@
+# utils/pipeline.py
+"""
+Minado como pipeline de etapas con colas acotadas:
+
+    calendario -> búsquedas por equipo -> ensamblado de features -> escritor
+    (1 hilo)      (lookup_workers)         (assembly_workers)        (hilo principal)
+
+  1) calendario: get_matches_list por (liga, temporada, jornada); emite un
+     MatchJob por partido aún no presente en el shard,
+  2) búsquedas por equipo: Elo (get_team_elo) y forma (get_previus_matches) de
+     ambos equipos a través de utils.feature_cache (mismas claves que Match),
+  3) ensamblado: get_match_features (Elo y forma salen de la caché; resultado
+     con get_match_result y valor de mercado) -> fila,
+  4) escritor: ShardWriter por (liga, temporada), flush por fila.
+
+Cada etapa emite en cuanto tiene el registro listo; las colas son de tamaño
+'queue_size', así que si el escritor o el ensamblado se atrasan, las etapas
+anteriores se bloquean en put() en vez de acumular partidos (backpressure).
+La memoria no depende del número de temporadas: en vuelo hay como mucho
+~3 * queue_size partidos, las claves ya minadas se cargan por temporada y
+solo quedan abiertos MAX_OPEN_WRITERS shards.
+
+    n = run(["laliga"], range(2000, 2025), range(5, 39))
+
+Métricas: pipeline_items_total{stage}, pipeline_errors_total{stage, kind},
+pipeline_blocked_seconds{stage} (tiempo esperando sitio en la cola de salida).
+"""
+
+from __future__ import annotations
+
+import contextlib
+import os
+import queue
+import sys
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, Iterable, Iterator, NamedTuple, Optional, Tuple
+
+from utils import deadline, feature_store, metrics, profiling
+
+QUEUE_SIZE = 16
+LOOKUP_WORKERS = 4
+ASSEMBLY_WORKERS = 2
+MAX_OPEN_WRITERS = 4
+PROGRESS_EVERY = 25          # filas entre líneas de progreso
+
+END = object()               # fin de stream (uno por cola; cada hilo lo reenvía a sus hermanos)
+
+class MatchJob(NamedTuple):
+    liga: str
+    temporada: int
+    jornada: int
+    local: str
+    away: str
+    fecha: str               # dd/mm/aa
+
+    @property
+    def names(self) -> str:
+        """Solo para trazas: hay nombres con guion ('Paris Saint-Germain')."""
+        return f"{self.local}-{self.away}"
+
+    @property
+    def teams(self) -> Tuple[str, str]:
+        return self.local, self.away
+
+def match_names(match_slug: str) -> Tuple[str, str]:
+    """'bar-rma' -> ('Barcelona', 'Real Madrid') (get_match_features trabaja con nombres)."""
+    from utils.unslug_team import unslug_team
+    h, a = match_slug.split("-", 1)
+    return unslug_team(h) or h, unslug_team(a) or a
+
+# ---------- etapas ----------
+def iter_fixtures(ligas: Iterable[str], temporadas: Iterable[int], jornadas: Iterable[int],
+                  out_dir: str = feature_store.FEATURES_DIR, debug: bool = False,
+                  log: Callable[[str], None] = print) -> Iterator[MatchJob]:
+    """Partidos pendientes en orden (liga, temporada, jornada); 'done' se carga por temporada."""
+    from utils.get_matches import get_matches_list
+    jornadas, temporadas = list(jornadas), list(temporadas)
+    for liga in ligas:
+        for temporada in temporadas:
+            done = feature_store.done_keys(feature_store.shard_path(liga, temporada, out_dir))
+            for jornada in jornadas:
+                with profiling.stage("fixtures"):
+                    matches = get_matches_list(liga, temporada, jornada, debug=debug)
+                if matches is None:
+                    continue
+                log(f"[mine] {liga} {temporada} J{jornada}: {len(matches)} partidos")
+                for slug, fecha in matches:
+                    local, away = match_names(slug)
+                    if (fecha, local, away) not in done:
+                        yield MatchJob(liga, temporada, jornada, local, away, fecha)
+
+def lookup_teams(job: MatchJob, deadline_s: Optional[float] = None) -> MatchJob:
+    """Elo y forma de ambos equipos en utils.feature_cache; los fallos se resuelven al ensamblar."""
+    from utils.prefetch import warm_team
+    for team in (job.local, job.away):
+        try:
+            with deadline.scope(deadline_s), profiling.stage("lookups"):
+                warm_team(team, job.fecha, settled=True)
+        except (Exception, deadline.DeadlineExceeded) as e:
+            metrics.inc("pipeline_errors_total", stage="lookups", kind=type(e).__name__)
+    return job
+
+def assemble(job: MatchJob, deadline_s: Optional[float] = None) -> Tuple[MatchJob, dict]:
+    from utils.get_match_features import get_match_features
+    match = get_match_features(job.teams, job.fecha, job.liga, deadline_s=deadline_s)
+    return job, match.to_row(Temporada=job.temporada, Jornada=job.jornada)
+
+# ---------- plomería ----------
+class _Stage:
+    """'workers' hilos que leen de inq, aplican fn y ponen el resultado (si no es None) en outq."""
+
+    def __init__(self, name: str, fn: Callable, inq: queue.Queue, outq: queue.Queue, workers: int,
+                 stop: threading.Event, log: Callable[[str], None]) -> None:
+        self.name, self.fn, self.inq, self.outq = name, fn, inq, outq
+        self.stop, self.log = stop, log
+        self._alive = workers
+        self._lock = threading.Lock()
+        self.threads = [threading.Thread(target=self._loop, name=f"casandra-{name}-{i}", daemon=True)
+                        for i in range(workers)]
+        for t in self.threads:
+            t.start()
+
+    def _loop(self) -> None:
+        try:
+            while True:
+                item = self.inq.get()
+                if item is END:
+                    self.inq.put(END)               # para los demás hilos de la etapa
+                    return
+                if self.stop.is_set():
+                    continue                        # drenar sin trabajar
+                try:
+                    out = self.fn(item)
+                except Exception as e:
+                    metrics.inc("pipeline_errors_total", stage=self.name, kind=type(e).__name__)
+                    self.log(f"[mine][err] {getattr(item, 'names', item)} {getattr(item, 'fecha', '')}: {e}")
+                    continue
+                metrics.inc("pipeline_items_total", stage=self.name)
+                if out is not None:
+                    _put(self.outq, out, self.name)
+        finally:
+            with self._lock:
+                self._alive -= 1
+                last = self._alive == 0
+            if last:
+                self.outq.put(END)
+
+def _put(q: queue.Queue, item, stage: str) -> None:
+    """put() bloqueante; el tiempo esperando sitio es la presión de las etapas de abajo."""
+    try:
+        q.put_nowait(item)
+        return
+    except queue.Full:
+        pass
+    t0 = time.perf_counter()
+    q.put(item)
+    metrics.observe("pipeline_blocked_seconds", time.perf_counter() - t0, stage=stage)
+
+def _produce(jobs: Iterator[MatchJob], outq: queue.Queue, stop: threading.Event,
+             log: Callable[[str], None]) -> None:
+    try:
+        for job in jobs:
+            if stop.is_set():
+                break
+            metrics.inc("pipeline_items_total", stage="fixtures")
+            _put(outq, job, "fixtures")
+    except Exception as e:
+        metrics.inc("pipeline_errors_total", stage="fixtures", kind=type(e).__name__)
+        log(f"[mine][err] calendario: {e}")
+    finally:
+        outq.put(END)
+
+class _Writers:
+    """ShardWriters abiertos por (liga, temporada); se cierra el menos reciente al pasar de MAX_OPEN_WRITERS."""
+
+    def __init__(self, out_dir: str, max_open: int = MAX_OPEN_WRITERS) -> None:
+        self.out_dir, self.max_open = out_dir, max_open
+        self._open: "OrderedDict[Tuple[str, int], feature_store.ShardWriter]" = OrderedDict()
+
+    def write(self, job: MatchJob, row: dict) -> None:
+        key = (job.liga, job.temporada)
+        w = self._open.get(key)
+        if w is None:
+            w = self._open[key] = feature_store.ShardWriter(
+                feature_store.shard_path(job.liga, job.temporada, self.out_dir))
+            while len(self._open) > self.max_open:
+                self._open.popitem(last=False)[1].close()
+        self._open.move_to_end(key)
+        w.write(row)
+
+    def close(self) -> None:
+        while self._open:
+            self._open.popitem()[1].close()
+
+def run(ligas: Iterable[str], temporadas: Iterable[int], jornadas: Iterable[int],
+        out_dir: str = feature_store.FEATURES_DIR, quiet: bool = True, debug: bool = False,
+        deadline_s: Optional[float] = None, lookup_workers: int = LOOKUP_WORKERS,
+        assembly_workers: int = ASSEMBLY_WORKERS, queue_size: int = QUEUE_SIZE) -> int:
+    """
+    Mina con el pipeline completo; devuelve las filas escritas.
+    Con quiet=True las trazas de los scrapers van a /dev/null (nada se acumula
+    en memoria) y el progreso del minado sigue saliendo por la salida estándar.
+    """
+    out = sys.stdout
+    log = lambda msg: print(msg, file=out, flush=True)
+    stop = threading.Event()
+    q_jobs: queue.Queue = queue.Queue(maxsize=queue_size)
+    q_ready: queue.Queue = queue.Queue(maxsize=queue_size)
+    q_rows: queue.Queue = queue.Queue(maxsize=queue_size)
+    writers = _Writers(out_dir)
+    written, t0 = 0, time.time()
+
+    with contextlib.ExitStack() as stack:
+        if quiet:
+            stack.enter_context(contextlib.redirect_stdout(stack.enter_context(open(os.devnull, "w"))))
+        producer = threading.Thread(target=_produce, name="casandra-fixtures", daemon=True,
+                                    args=(iter_fixtures(ligas, temporadas, jornadas, out_dir, debug, log),
+                                          q_jobs, stop, log))
+        producer.start()
+        stages = [
+            _Stage("lookups", lambda job: lookup_teams(job, deadline_s), q_jobs, q_ready, lookup_workers, stop, log),
+            _Stage("assembly", lambda job: assemble(job, deadline_s), q_ready, q_rows, assembly_workers, stop, log),
+        ]
+        try:
+            while True:
+                try:
+                    item = q_rows.get(timeout=0.5)   # timeout: deja pasar Ctrl+C
+                except queue.Empty:
+                    continue
+                if item is END:
+                    break
+                job, row = item
+                with profiling.stage("write"):
+                    writers.write(job, row)
+                written += 1
+                if written % PROGRESS_EVERY == 0:
+                    mins = max(time.time() - t0, 1e-9) / 60
+                    log(f"[mine] {written} partidos ({written / mins:.1f}/min)  "
+                        f"colas: calendario={q_jobs.qsize()} búsquedas={q_ready.qsize()} filas={q_rows.qsize()}")
+        except BaseException:
+            # Ctrl+C / error del escritor: parar el calendario y dejar que las etapas drenen
+            stop.set()
+            raise
+        finally:
+            writers.close()
+            if stop.is_set():
+                _drain(q_rows)
+            else:
+                producer.join()
+                for st in stages:
+                    for t in st.threads:
+                        t.join()
+
+    mins = max(time.time() - t0, 1e-9) / 60
+    log(f"[mine] pipeline: {written} partidos en {mins:.1f} min ({written / mins:.1f}/min)")
+    return written
+
+def _drain(q: queue.Queue, timeout: float = 5.0) -> None:
+    """Vacía una cola hasta ver END (o timeout) para desbloquear a los productores."""
+    end = time.time() + timeout
+    while time.time() < end:
+        try:
+            if q.get(timeout=0.1) is END:
+                return
+        except queue.Empty:
+            pass
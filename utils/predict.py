@@ -0,0 +1,250 @@
+# utils/predict.py
+"""
+Motor de predicción por jornada.
+
+PredictionEngine carga los modelos una vez (artefactos mmap en models/result/ y
+models/goals/, ver utils.model_artifact) y, para una (liga, temporada, jornada):
+  1) obtiene los partidos con get_matches_list,
+  2) construye las filas de features de TODOS los partidos,
+  3) las codifica en una sola matriz y predice con UNA llamada vectorizada por modelo,
+  4) ordena por confianza (de mayor a menor).
+
+El módulo solo importa la librería estándar: listar predicciones cacheadas
+(cached_predictions) no carga numpy, modelos ni scrapers.
+
+La salida se cachea en data/predictions_cache.json por (liga, temporada, jornada).
+La caché se mira ANTES de pedir el calendario: una entrada de los mismos modelos
+comprobada hace menos de RECHECK_SECONDS se devuelve sin tocar la red. Pasado ese
+plazo (o con refresh) se vuelve a pedir la lista de partidos y se compara el hash
+de entrada (partidos + versión de los modelos); si coincide solo se renueva la
+marca de comprobación. Una lista de partidos vacía no se cachea.
+
+next_matchweek guarda la jornada resuelta en data/next_matchweek.json y la reutiliza
+mientras su último partido no haya pasado; después busca a partir de ella.
+"""
+
+from __future__ import annotations
+
+import contextlib
+import hashlib
+import io
+import json
+import os
+import threading
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+
+MODELS_DIR = "./models"
+PREDICTIONS_CACHE = "./data/predictions_cache.json"
+NEXT_MATCHWEEK_CACHE = "./data/next_matchweek.json"
+RECHECK_SECONDS = 6 * 3600   # antigüedad a partir de la cual se revalida el hash de entrada
+LIGAS = ["laliga", "premier", "seriea", "bundesliga", "ligue1"]
+
+# ---------- Caché de predicciones ----------
+_CACHE_LOCK = threading.Lock()
+
+def _load_cache(path: str = PREDICTIONS_CACHE) -> dict:
+    if os.path.exists(path):
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except Exception:
+            return {}
+    return {}
+
+def _save_cache(data: dict, path: str = PREDICTIONS_CACHE) -> None:
+    d = os.path.dirname(path)
+    if d:
+        os.makedirs(d, exist_ok=True)
+    tmp = path + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(data, f, ensure_ascii=False, indent=2)
+    os.replace(tmp, path)
+
+def cache_key(liga: str, temporada: int, jornada: int) -> str:
+    return f"{liga}|{temporada}|{jornada}"
+
+def cached_predictions(liga: Optional[str] = None, path: str = PREDICTIONS_CACHE) -> Dict[str, dict]:
+    """Entradas cacheadas (opcionalmente de una liga) sin cargar modelos ni scrapers."""
+    data = _load_cache(path)
+    return {k: v for k, v in data.items() if not liga or k.startswith(f"{liga}|")}
+
+def _input_hash(matches: List[Tuple[str, str]], model_id: str) -> str:
+    h = hashlib.sha1(model_id.encode())
+    for slug, fecha in matches:
+        h.update(f"{slug}@{fecha};".encode())
+    return h.hexdigest()[:16]
+
+def _is_recent(entry: dict, max_age: float = RECHECK_SECONDS) -> bool:
+    stamp = entry.get("checked_at") or entry.get("generated_at")
+    try:
+        return (datetime.now() - datetime.fromisoformat(stamp)).total_seconds() < max_age
+    except (TypeError, ValueError):
+        return False
+
+def season_for_date(d: datetime) -> int:
+    return d.year if d.month >= 7 else d.year - 1
+
+def _by_confidence(p: dict) -> Tuple[float, float]:
+    return p["conf_result"], p["conf_goals"]
+
+# ---------- Motor ----------
+class PredictionEngine:
+    """Modelos cargados una vez; predice jornadas completas en lote."""
+
+    def __init__(self, models_dir: str = MODELS_DIR, cache_path: str = PREDICTIONS_CACHE) -> None:
+        from utils.model_artifact import artifact_id, load_artifact
+        from utils.train_model import FeatureEncoder
+        self.models_dir = models_dir
+        self.cache_path = cache_path
+        self._prefetcher = None
+        self.models: Dict[str, dict] = {}
+        ids = []
+        for target in ("result", "goals"):
+            p = os.path.join(models_dir, target)
+            if not os.path.isdir(p):
+                raise FileNotFoundError(f"Falta el modelo {p}; entrena con train.py")
+            model = load_artifact(p)
+            self.models[target] = {
+                "model": model,
+                "encoder": FeatureEncoder.from_dict(model.meta["encoder"]),
+                "classes": model.meta["classes"],
+            }
+            ids.append(artifact_id(p))
+        self.model_id = "|".join(ids)
+
+    # -- features --
+    def build_rows(self, liga: str, temporada: int, jornada: int,
+                   matches: List[Tuple[str, str]], debug: bool = False) -> List[dict]:
+        from utils.get_match_features import get_match_features
+        from utils.unslug_team import unslug_team
+        rows = []
+        for slug, fecha in matches:
+            h, a = slug.split("-", 1)
+            names = (unslug_team(h) or h, unslug_team(a) or a)   # sin unir: hay nombres con guion
+            with contextlib.redirect_stdout(io.StringIO()) if not debug else contextlib.nullcontext():
+                match = get_match_features(names, fecha, liga)
+            row = match.to_row(Temporada=temporada, Jornada=jornada)
+            row["slug"] = slug
+            rows.append(row)
+        return rows
+
+    # -- predicción vectorizada --
+    def predict_rows(self, rows: List[dict]) -> List[dict]:
+        import numpy as np
+        from utils.train_model import softmax_confidence
+        if not rows:
+            return []
+        str_rows = [{k: ("" if v is None else str(v)) for k, v in r.items()} for r in rows]
+        out = [{"partido": r["slug"], "local": r["Local"], "visitante": r["Visitante"], "fecha": r["Fecha"]}
+               for r in rows]
+        for target, bundle in self.models.items():
+            X = bundle["encoder"].transform(str_rows)
+            scores = bundle["model"].decision_function(X)   # una llamada por modelo
+            if scores.ndim == 1:
+                scores = np.column_stack([-scores, scores])
+            full = np.full((len(rows), len(bundle["classes"])), -1e9)
+            full[:, np.asarray(bundle["model"].classes_, dtype=int)] = scores
+            conf = softmax_confidence(full)
+            best = conf.argmax(axis=1)
+            for i, o in enumerate(out):
+                o[target] = bundle["classes"][best[i]]
+                o[f"conf_{target}"] = round(float(conf[i, best[i]]), 4)
+        out.sort(key=_by_confidence, reverse=True)
+        return out
+
+    def predict_matchweek(self, liga: str, temporada: int, jornada: int,
+                          refresh: bool = False, debug: bool = False, prefetch_next: bool = True) -> dict:
+        from utils.get_matches import get_matches_list
+        key = cache_key(liga, temporada, jornada)
+        with _CACHE_LOCK:
+            entry = _load_cache(self.cache_path).get(key)
+        if entry and entry.get("model_id") != self.model_id:
+            entry = None
+        if entry and not refresh and _is_recent(entry):
+            return entry
+
+        matches = get_matches_list(liga, temporada, jornada, debug=debug) or []
+        ih = _input_hash(matches, self.model_id)
+        now = datetime.now().isoformat(timespec="seconds")
+        if entry and entry.get("input_hash") == ih and not refresh:
+            entry = dict(entry, checked_at=now)
+            self._store(key, entry)
+            return entry
+
+        if prefetch_next:
+            # mientras se calcula N, calentar N+1 (hilo daemon, prioridad baja)
+            if self._prefetcher is None:
+                from utils.prefetch import Prefetcher
+                self._prefetcher = Prefetcher(debug=debug)
+            self._prefetcher.schedule(liga, temporada, jornada + 1)
+        preds = self.predict_rows(self.build_rows(liga, temporada, jornada, matches, debug=debug))
+        entry = {
+            "liga": liga, "temporada": temporada, "jornada": jornada,
+            "input_hash": ih, "model_id": self.model_id, "generated_at": now, "checked_at": now,
+            "predicciones": preds,
+        }
+        if matches:
+            # sin partidos (calendario aún no publicado o scraper caído) no se cachea
+            self._store(key, entry)
+        return entry
+
+    def _store(self, key: str, entry: dict) -> None:
+        with _CACHE_LOCK:
+            cache = _load_cache(self.cache_path)
+            cache[key] = entry
+            _save_cache(cache, self.cache_path)
+
+    def update_matches(self, liga: str, temporada: int, jornada: int, slugs, debug: bool = False) -> dict:
+        """
+        Recalcula solo los partidos 'slugs' de una jornada ya predicha (modo en
+        vivo: cambió la forma de alguno de sus equipos) y los fusiona con el resto
+        de la entrada cacheada. Sin entrada válida, predice la jornada entera.
+        """
+        from utils.get_matches import get_matches_list
+        matches = get_matches_list(liga, temporada, jornada, debug=debug) or []
+        key = cache_key(liga, temporada, jornada)
+        with _CACHE_LOCK:
+            entry = _load_cache(self.cache_path).get(key)
+        if not entry or entry.get("input_hash") != _input_hash(matches, self.model_id):
+            return self.predict_matchweek(liga, temporada, jornada, refresh=True, debug=debug, prefetch_next=False)
+        todo = [(slug, fecha) for slug, fecha in matches if slug in set(slugs)]
+        preds = self.predict_rows(self.build_rows(liga, temporada, jornada, todo, debug=debug))
+        fresh = {p["partido"] for p in preds}
+        merged = [p for p in entry["predicciones"] if p["partido"] not in fresh] + preds
+        merged.sort(key=_by_confidence, reverse=True)
+        now = datetime.now().isoformat(timespec="seconds")
+        entry = dict(entry, predicciones=merged, generated_at=now, checked_at=now)
+        self._store(key, entry)
+        return entry
+
+def next_matchweek(liga: str, temporada: int, today: Optional[datetime] = None,
+                   max_jornadas: int = 38, debug: bool = False,
+                   path: str = NEXT_MATCHWEEK_CACHE) -> Optional[int]:
+    """
+    Primera jornada con algún partido en fecha >= hoy. La respuesta se guarda
+    con la fecha de su último partido: hasta ese día se devuelve sin pedir
+    calendarios, y después la búsqueda empieza en ella en vez de en la 1.
+    """
+    from utils.get_matches import get_matches_list
+    today = (today or datetime.now()).replace(hour=0, minute=0, second=0, microsecond=0)
+    key = f"{liga}|{temporada}"
+    with _CACHE_LOCK:
+        saved = _load_cache(path).get(key)
+    start = 1
+    if saved:
+        try:
+            if datetime.strptime(saved["hasta"], "%d/%m/%y") >= today:
+                return saved["jornada"]
+            start = int(saved["jornada"])
+        except (KeyError, TypeError, ValueError):
+            pass
+    for j in range(start, max_jornadas + 1):
+        fechas = [datetime.strptime(f, "%d/%m/%y") for _, f in get_matches_list(liga, temporada, j, debug=debug) or []]
+        if any(f >= today for f in fechas):
+            with _CACHE_LOCK:
+                data = _load_cache(path)
+                data[key] = {"jornada": j, "hasta": max(fechas).strftime("%d/%m/%y")}
+                _save_cache(data, path)
+            return j
+    return None
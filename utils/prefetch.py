@@ -0,0 +1,150 @@
+# utils/prefetch.py
+"""
+Prefetch en segundo plano de la jornada siguiente.
+
+Mientras el minado (o la predicción) procesa la jornada N, el calendario de la
+temporada ya da partidos y fechas de N+1. Prefetcher calienta en un hilo aparte
+lo que get_match_features pedirá después:
+
+  - Elo (snapshot diario de ClubElo) y forma (eventos de temporada del equipo en
+    TSDB, FBref si hace falta) de ambos equipos,
+  - la búsqueda del resultado (eventos del día / temporada, utils.query_planner).
+
+Partidos ya jugados: se calcula a través de utils.feature_cache, así la pasada
+real encuentra la feature en memoria. Si coinciden en el tiempo, la pasada real
+NO se une al cálculo de fondo (utils.singleflight separa las prioridades): lo
+hace ella misma con su deadline y sus tokens. Partidos futuros (predicción):
+solo se calientan las cachés HTTP; la feature no se guarda porque aún faltan
+los resultados de la jornada N.
+
+Todo corre con rate_limit.low_priority(): comparte los límites por host con
+el trabajo principal pero solo usa los tokens que sobran.
+
+    pf = Prefetcher()
+    pf.schedule("laliga", 2024, 12)      # no bloquea
+    ...
+    pf.close()
+"""
+
+from __future__ import annotations
+
+import queue
+import threading
+from datetime import datetime
+from typing import Optional, Set, Tuple
+
+from utils import feature_cache, metrics, rate_limit
+from utils.CONSTANTS import PREVIUS_MATCHES_CONSIDERED
+
+MAX_PENDING = 4          # jornadas en cola como mucho
+
+def _names(slug: str) -> Tuple[str, str]:
+    from utils.unslug_team import unslug_team
+    h, a = slug.split("-", 1)
+    return unslug_team(h) or h, unslug_team(a) or a
+
+def warm_team(team: str, fecha: str, settled: bool) -> int:
+    from utils.get_elo import get_team_elo
+    from utils.get_previews_matches import get_previus_matches
+    form = lambda: get_previus_matches(team, fecha, PREVIUS_MATCHES_CONSIDERED, debug=False)
+    if not settled:
+        # ClubElo aún no publica esa fecha: solo eventos de temporada del equipo
+        form()
+        return 1
+    # mismas claves que Match.set_teams_elo / set_performance_data
+    feature_cache.get_or_compute("elo", team, fecha, lambda: get_team_elo(team, fecha, debug=False))
+    feature_cache.get_or_compute("form", team, fecha, form, n=PREVIUS_MATCHES_CONSIDERED)
+    return 2
+
+def prefetch_matchweek(liga: str, temporada: int, jornada: int, today: Optional[datetime] = None,
+                       stop: Optional[threading.Event] = None) -> int:
+    """Calienta las cachés de una jornada. Devuelve el número de consultas hechas."""
+    from utils.get_match_result import get_match_result
+    from utils.get_matches import get_matches_list
+    today = (today or datetime.now()).replace(hour=0, minute=0, second=0, microsecond=0)
+    matches = get_matches_list(liga, temporada, jornada) or []
+    done, seen = 0, set()
+    for slug, fecha in matches:
+        if stop is not None and stop.is_set():
+            break
+        settled = datetime.strptime(fecha, "%d/%m/%y") < today
+        home, away = _names(slug)
+        for team in (home, away):
+            if (team, fecha) in seen:
+                continue
+            seen.add((team, fecha))
+            try:
+                done += warm_team(team, fecha, settled)
+            except Exception as e:
+                metrics.inc("prefetch_errors_total", league=liga, kind=type(e).__name__)
+        if settled:
+            try:
+                get_match_result(f"{home}-{away}", fecha, liga)
+                done += 1
+            except Exception as e:
+                metrics.inc("prefetch_errors_total", league=liga, kind=type(e).__name__)
+    metrics.inc("prefetch_lookups_total", done, league=liga)
+    return done
+
+class Prefetcher:
+    """Un hilo de fondo que procesa jornadas encoladas con schedule()."""
+
+    def __init__(self, max_pending: int = MAX_PENDING, debug: bool = False) -> None:
+        self.debug = debug
+        self._q: "queue.Queue[Optional[Tuple[str, int, int]]]" = queue.Queue(maxsize=max_pending)
+        self._scheduled: Set[Tuple[str, int, int]] = set()
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self.done = 0
+        self._thread = threading.Thread(target=self._loop, name="casandra-prefetch", daemon=True)
+        self._thread.start()
+
+    def schedule(self, liga: str, temporada: int, jornada: int) -> bool:
+        """Encola una jornada (sin bloquear). False si ya estaba o la cola está llena."""
+        key = (liga, int(temporada), int(jornada))
+        with self._lock:
+            if key in self._scheduled or self._stop.is_set():
+                return False
+            try:
+                self._q.put_nowait(key)
+            except queue.Full:
+                metrics.inc("prefetch_dropped_total", league=liga)
+                return False
+            self._scheduled.add(key)
+        return True
+
+    def _loop(self) -> None:
+        while True:
+            key = self._q.get()
+            if key is None or self._stop.is_set():
+                return
+            liga, temporada, jornada = key
+            try:
+                with rate_limit.low_priority():
+                    n = prefetch_matchweek(liga, temporada, jornada, stop=self._stop)
+                self.done += n
+                if self.debug:
+                    print(f"[prefetch] {liga} {temporada} J{jornada}: {n} consultas")
+            except Exception as e:
+                metrics.inc("prefetch_errors_total", league=liga, kind=type(e).__name__)
+                if self.debug:
+                    print(f"[prefetch][err] {liga} {temporada} J{jornada}: {e}")
+
+    def close(self, wait: bool = False) -> None:
+        """Detiene el hilo; con wait=True termina antes las jornadas encoladas."""
+        if not wait:
+            self._stop.set()
+            with self._lock:
+                while True:
+                    try:
+                        self._q.get_nowait()
+                    except queue.Empty:
+                        break
+        self._q.put(None)
+        self._thread.join()
+
+    def __enter__(self) -> "Prefetcher":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
@@ -0,0 +1,272 @@
+# utils/profiling.py
+"""
+Modo --profile para el minado (mine.py) y la predicción (main.py).
+
+Profiler de muestreo en un hilo aparte: cada INTERVAL segundos toma la pila de
+todos los hilos (sys._current_frames) y acumula:
+  - pilas "plegadas" (formato de flamegraph.pl / speedscope / inferno):
+        MainThread;mine:mine;get_match_features:get_match_features;... 37
+  - categoría de cada muestra según el frame más interno que la delata:
+        network     requests/urllib3/http.client/socket/ssl
+        html_parse  bs4/html.parser/lxml/html5lib
+        data_parse  csv/json (CSV de ClubElo, JSON de TSDB)
+        fuzzy       _best_row_for_team y helpers de matching, rapidfuzz/difflib
+        numpy       numpy/pandas
+        cache       requests_cache/sqlite3
+        rate_limit  utils.rate_limit (espera de tokens / Retry-After)
+        wait        hilos bloqueados en futures/locks (hedging, singleflight)
+        python      resto
+    Las llamadas a funciones C (p.ej. un ufunc de numpy) se atribuyen al frame
+    Python que las invoca.
+
+Etapas (stage): tiempo de reloj, CPU del hilo y pico de memoria (tracemalloc)
+de cada etapa de get_match_features; fuera de un Profiler activo son no-op.
+
+    with profiling.Profiler("data/profiles", run="laliga-2024"):
+        mine(...)
+
+Cada ejecución escribe en <dir>/<run>-<timestamp>/:
+    stacks.folded   pilas plegadas (flamegraph.pl stacks.folded > fg.svg)
+    summary.json    categorías, etapas, funciones más calientes y la comparación
+                    BeautifulSoup vs _best_row_for_team
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import sys
+import threading
+import time
+import tracemalloc
+from collections import Counter
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Dict, Iterator, List, Optional, Tuple
+
+PROFILES_DIR = "./data/profiles"
+INTERVAL = 0.005
+MAX_DEPTH = 128
+
+# (categoría, fragmentos de ruta de fichero); se evalúan del frame más interno hacia fuera
+_FILE_RULES: List[Tuple[str, Tuple[str, ...]]] = [
+    ("html_parse", ("/bs4/", "/html/parser.py", "/lxml/", "/html5lib/")),
+    ("data_parse", ("/csv.py", "/json/")),
+    ("fuzzy", ("/rapidfuzz/", "/difflib.py")),
+    ("numpy", ("/numpy/", "/pandas/")),
+    ("cache", ("/requests_cache/", "/sqlite3/", "/utils/http_cache.py")),
+    ("rate_limit", ("/utils/rate_limit.py",)),
+    ("network", ("/requests/", "/urllib3/", "/http/client.py", "/socket.py", "/ssl.py")),
+    ("wait", ("/concurrent/futures/", "/threading.py", "/queue.py")),
+]
+# funciones de matching de nombres (get_elo, get_previews_matches, unslug_team)
+_FUZZY_FUNCS = {"_best_row_for_team", "_norm", "_token_set", "_jaccard", "_alias_variants_from_name",
+                "_row_club_name", "_resolve_team_id_by_name", "unslug_team"}
+# funciones cuya presencia en la pila (inclusiva) se compara en el resumen
+HOTSPOTS = {"BeautifulSoup": ("/bs4/__init__.py", "__init__"),
+            "_best_row_for_team": ("/utils/get_elo.py", "_best_row_for_team")}
+
+def _category(frames: List) -> str:
+    for f in frames:                    # del más interno al más externo
+        code = f.f_code
+        if code.co_name in _FUZZY_FUNCS:
+            return "fuzzy"
+        path = code.co_filename.replace("\\", "/")
+        for cat, parts in _FILE_RULES:
+            if any(p in path for p in parts):
+                return cat
+    return "python"
+
+def _label(code) -> str:
+    mod = os.path.splitext(os.path.basename(code.co_filename))[0]
+    return f"{mod}:{code.co_name}"
+
+# ---------- etapas ----------
+class _StageStats:
+    __slots__ = ("calls", "wall", "cpu", "peak")
+
+    def __init__(self) -> None:
+        self.calls = 0
+        self.wall = 0.0
+        self.cpu = 0.0
+        self.peak = 0
+
+_ACTIVE: Optional["Profiler"] = None
+_tls = threading.local()
+
+@contextmanager
+def stage(name: str) -> Iterator[None]:
+    """Cronometra una etapa (reloj, CPU del hilo, pico de memoria) si hay un Profiler activo."""
+    prof = _ACTIVE
+    if prof is None:
+        yield
+        return
+    stack = getattr(_tls, "stack", None)
+    if stack is None:
+        stack = _tls.stack = []
+    trace = tracemalloc.is_tracing()
+    if trace:
+        tracemalloc.reset_peak()
+    frame = [name, 0]            # [nombre, pico de las sub-etapas]
+    stack.append(frame)
+    w0, c0 = time.perf_counter(), time.thread_time()
+    try:
+        yield
+    finally:
+        wall, cpu = time.perf_counter() - w0, time.thread_time() - c0
+        stack.pop()
+        peak = max(tracemalloc.get_traced_memory()[1], frame[1]) if trace else 0
+        if stack:
+            # reset_peak de esta etapa borró el pico de la exterior: se lo pasamos
+            stack[-1][1] = max(stack[-1][1], peak)
+        prof._record_stage(name, wall, cpu, peak)
+
+# ---------- profiler ----------
+class Profiler:
+    def __init__(self, out_dir: str = PROFILES_DIR, run: str = "run", interval: float = INTERVAL,
+                 trace_memory: bool = True) -> None:
+        self.out_dir = out_dir
+        self.run = run
+        self.interval = interval
+        self.trace_memory = trace_memory
+        self.stacks: Counter = Counter()
+        self.categories: Counter = Counter()
+        self.hotspots: Counter = Counter()
+        self.self_time: Counter = Counter()
+        self.samples = 0
+        self.memory_peak = 0
+        self.stages: Dict[str, _StageStats] = {}
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self.path: Optional[str] = None
+
+    # ---------- muestreo ----------
+    def _sample(self) -> None:
+        me = threading.get_ident()
+        names = {t.ident: t.name for t in threading.enumerate()}
+        for tid, frame in sys._current_frames().items():
+            if tid == me:
+                continue
+            frames = []
+            f = frame
+            while f is not None and len(frames) < MAX_DEPTH:
+                frames.append(f)
+                f = f.f_back
+            labels = [_label(fr.f_code) for fr in reversed(frames)]
+            key = ";".join([names.get(tid, f"thread-{tid}")] + labels)
+            seen = set()
+            for fr in frames:
+                path = fr.f_code.co_filename.replace("\\", "/")
+                for name, (part, func) in HOTSPOTS.items():
+                    if name not in seen and fr.f_code.co_name == func and path.endswith(part):
+                        seen.add(name)
+            with self._lock:
+                self.samples += 1
+                self.stacks[key] += 1
+                self.categories[_category(frames)] += 1
+                self.self_time[labels[-1]] += 1
+                for name in seen:
+                    self.hotspots[name] += 1
+
+    def _loop(self) -> None:
+        while not self._stop.wait(self.interval):
+            self._sample()
+
+    def _record_stage(self, name: str, wall: float, cpu: float, peak: int) -> None:
+        with self._lock:
+            s = self.stages.get(name)
+            if s is None:
+                s = self.stages[name] = _StageStats()
+            s.calls += 1
+            s.wall += wall
+            s.cpu += cpu
+            s.peak = max(s.peak, peak)
+            self.memory_peak = max(self.memory_peak, peak)
+
+    # ---------- ciclo de vida ----------
+    def start(self) -> "Profiler":
+        global _ACTIVE
+        self._t0, self._c0 = time.perf_counter(), time.process_time()
+        self._started_tracing = self.trace_memory and not tracemalloc.is_tracing()
+        if self._started_tracing:
+            tracemalloc.start()
+        _ACTIVE = self
+        self._thread = threading.Thread(target=self._loop, name="casandra-profiler", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> dict:
+        global _ACTIVE
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+        _ACTIVE = None
+        self.wall = time.perf_counter() - self._t0
+        self.cpu = time.process_time() - self._c0
+        if tracemalloc.is_tracing():
+            # las etapas hacen reset_peak: el pico global es el mayor de los vistos
+            self.memory_peak = max(self.memory_peak, tracemalloc.get_traced_memory()[1])
+        if self._started_tracing:
+            tracemalloc.stop()
+        summary = self.summary()
+        self.write(summary)
+        return summary
+
+    def __enter__(self) -> "Profiler":
+        return self.start()
+
+    def __exit__(self, *exc) -> None:
+        self.stop()
+        print(self.report())
+
+    # ---------- salida ----------
+    def summary(self) -> dict:
+        with self._lock:
+            n = max(self.samples, 1)
+            hot = {k: {"samples": self.hotspots.get(k, 0), "pct": round(100 * self.hotspots.get(k, 0) / n, 1)}
+                   for k in HOTSPOTS}
+            top = max(hot, key=lambda k: hot[k]["samples"])
+            return {
+                "run": self.run,
+                "interval_s": self.interval,
+                "wall_s": round(self.wall, 3),
+                "cpu_s": round(self.cpu, 3),
+                "memory_peak_bytes": self.memory_peak,
+                "samples": self.samples,
+                "categories": {c: {"samples": k, "pct": round(100 * k / n, 1), "approx_s": round(k * self.interval, 3)}
+                               for c, k in self.categories.most_common()},
+                "stages": {name: {"calls": s.calls, "wall_s": round(s.wall, 3), "cpu_s": round(s.cpu, 3),
+                                  "peak_bytes": s.peak}
+                           for name, s in sorted(self.stages.items(), key=lambda kv: -kv[1].wall)},
+                "top_self": [{"function": f, "samples": k, "pct": round(100 * k / n, 1)}
+                             for f, k in self.self_time.most_common(25)],
+                "hotspots": hot,
+                "dominant_hotspot": top if hot[top]["samples"] else None,
+            }
+
+    def write(self, summary: Optional[dict] = None) -> str:
+        stamp = datetime.now().strftime("%Y%m%d-%H%M%S")
+        self.path = os.path.join(self.out_dir, f"{self.run}-{stamp}")
+        os.makedirs(self.path, exist_ok=True)
+        with self._lock, open(os.path.join(self.path, "stacks.folded"), "w", encoding="utf-8") as f:
+            for key, count in self.stacks.most_common():
+                f.write(f"{key} {count}\n")
+        with open(os.path.join(self.path, "summary.json"), "w", encoding="utf-8") as f:
+            json.dump(summary or self.summary(), f, ensure_ascii=False, indent=2)
+        return self.path
+
+    def report(self) -> str:
+        s = self.summary()
+        lines = [f"[profile] {s['run']}: {s['wall_s']}s reloj, {s['cpu_s']}s CPU, "
+                 f"{s['samples']} muestras, pico memoria {s['memory_peak_bytes'] / 1e6:.1f} MB"]
+        for c, v in s["categories"].items():
+            lines.append(f"  {c:<11} {v['pct']:5.1f}%  ~{v['approx_s']}s")
+        for name, v in s["stages"].items():
+            lines.append(f"  etapa {name:<12} x{v['calls']:<4} reloj {v['wall_s']}s  CPU {v['cpu_s']}s  "
+                         f"pico {v['peak_bytes'] / 1e6:.1f} MB")
+        for k, v in s["hotspots"].items():
+            lines.append(f"  {k:<20} {v['pct']:5.1f}% de las muestras (inclusivo)")
+        if self.path:
+            lines.append(f"  -> {self.path}/stacks.folded, summary.json")
+        return "\n".join(lines)
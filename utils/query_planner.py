@@ -0,0 +1,179 @@
+# utils/query_planner.py
+"""
+Planificador de consultas con presupuesto de requests.
+
+Un scraper con varias formas de encontrar el mismo dato (p.ej. el resultado de
+un partido: eventos de la temporada del equipo, eventos del día, búsquedas
+"A vs B") declara sus estrategias y el planner las prueba en orden de
+"aciertos esperados por request":
+
+    score = P(acierto) / max(coste estimado, MIN_COST)
+    P(acierto) = (aciertos + prior·PRIOR_N) / (intentos + PRIOR_N)
+
+El coste estimado lo da cada estrategia (0 si lo que necesita tiene respuesta
+fresca en la caché HTTP) o, si no, la media observada de requests por intento.
+
+    planner = Planner("tsdb_result", [Strategy("day", fn, prior=0.8, cost=cost_fn), ...])
+    hit, name = planner.run(ctx, RequestBudget(6), scope="laliga")
+
+RequestBudget cuenta solo requests reales (las URLs frescas en caché no gastan;
+una entrada caducada se revalida y sí gasta) y las estrategias dejan de pedir
+al agotarse. Las estadísticas se guardan por scope
+(p.ej. liga) en data/query_planner.json: las siguientes llamadas empiezan por
+la estrategia que más acierta. Métricas: planner_strategy_total{planner, strategy, result}.
+"""
+
+from __future__ import annotations
+
+import atexit
+import json
+import os
+import threading
+from typing import Any, Callable, Dict, List, NamedTuple, Optional, Tuple
+
+from utils import http_cache, metrics
+
+STATS_PATH = "./data/query_planner.json"
+PRIOR_N = 4.0          # peso (en intentos) del prior de cada estrategia
+MIN_COST = 0.25        # una estrategia "gratis" (en caché) no tiene score infinito
+SAVE_EVERY = 20        # registros entre escrituras del JSON
+
+class RequestBudget:
+    """Máximo de requests reales por consulta (las respuestas frescas en caché no cuentan)."""
+
+    def __init__(self, limit: int) -> None:
+        self.limit = limit
+        self.spent = 0
+
+    @property
+    def remaining(self) -> int:
+        return max(0, self.limit - self.spent)
+
+    @property
+    def exhausted(self) -> bool:
+        return self.spent >= self.limit
+
+    def take(self, url: str) -> bool:
+        """Reserva un request para 'url'. False si no queda presupuesto."""
+        if http_cache.is_fresh(url):
+            return True
+        if self.exhausted:
+            metrics.inc("planner_budget_exhausted_total")
+            return False
+        self.spent += 1
+        return True
+
+class Strategy(NamedTuple):
+    name: str
+    fn: Callable[[Any, RequestBudget], Any]         # (ctx, budget) -> resultado o None
+    prior: float = 0.5                              # tasa de acierto esperada sin historial
+    cost: Optional[Callable[[Any], Optional[float]]] = None   # requests estimados (None = usar media)
+
+class Planner:
+    def __init__(self, name: str, strategies: List[Strategy], path: str = STATS_PATH) -> None:
+        self.name = name
+        self.strategies = strategies
+        self.path = path
+        self._lock = threading.Lock()
+        self._stats: Optional[Dict[str, Dict[str, List[float]]]] = None   # scope -> key -> [intentos, aciertos, requests]
+        self._dirty = 0
+        atexit.register(self.save)
+
+    # ---------- estadísticas ----------
+    def _load(self) -> Dict[str, Dict[str, List[float]]]:
+        if self._stats is None:
+            data = {}
+            if os.path.exists(self.path):
+                try:
+                    with open(self.path, "r", encoding="utf-8") as f:
+                        data = json.load(f).get(self.name, {})
+                except Exception:
+                    data = {}
+            self._stats = data
+        return self._stats
+
+    def save(self) -> None:
+        with self._lock:
+            if not self._dirty or self._stats is None:
+                return
+            try:
+                all_data = {}
+                if os.path.exists(self.path):
+                    with open(self.path, "r", encoding="utf-8") as f:
+                        all_data = json.load(f)
+            except Exception:
+                all_data = {}
+            all_data[self.name] = self._stats
+            try:
+                os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+                tmp = self.path + ".tmp"
+                with open(tmp, "w", encoding="utf-8") as f:
+                    json.dump(all_data, f, ensure_ascii=False, indent=2)
+                os.replace(tmp, self.path)
+                self._dirty = 0
+            except Exception:
+                pass
+
+    def record(self, scope: str, key: str, hit: bool, requests: int) -> None:
+        with self._lock:
+            st = self._load().setdefault(scope, {}).setdefault(key, [0, 0, 0])
+            st[0] += 1
+            st[1] += int(hit)
+            st[2] += requests
+            self._dirty += 1
+            flush = self._dirty >= SAVE_EVERY
+        if flush:
+            self.save()
+
+    def hit_rate(self, scope: str, key: str, prior: float) -> float:
+        with self._lock:
+            n, h, _ = self._load().get(scope, {}).get(key, [0, 0, 0])
+        return (h + prior * PRIOR_N) / (n + PRIOR_N)
+
+    def avg_requests(self, scope: str, key: str, default: float = 1.0) -> float:
+        with self._lock:
+            n, _, r = self._load().get(scope, {}).get(key, [0, 0, 0])
+        return r / n if n else default
+
+    def rank(self, scope: str, keys: List[str], prior: Callable[[str], float]) -> List[str]:
+        """Ordena claves arbitrarias (p.ej. formas de query) por tasa de acierto observada."""
+        return sorted(keys, key=lambda k: -self.hit_rate(scope, k, prior(k)))
+
+    # ---------- plan ----------
+    def plan(self, ctx: Any, scope: str = "*") -> List[Tuple[float, Strategy]]:
+        out = []
+        for s in self.strategies:
+            cost = s.cost(ctx) if s.cost else None
+            if cost is None:
+                cost = self.avg_requests(scope, s.name)
+            out.append((self.hit_rate(scope, s.name, s.prior) / max(cost, MIN_COST), s))
+        out.sort(key=lambda t: -t[0])
+        return out
+
+    def run(self, ctx: Any, budget: RequestBudget, scope: str = "*", debug: bool = False) -> Tuple[Any, Optional[str]]:
+        """Prueba las estrategias en orden hasta un acierto. (resultado, estrategia) o (None, None)."""
+        for score, s in self.plan(ctx, scope):
+            if score <= 0:
+                continue      # coste infinito: no aplicable a esta consulta
+            if budget.exhausted and not (s.cost and s.cost(ctx) == 0):
+                if debug: print(f"[planner:{self.name}] presupuesto agotado, salto '{s.name}'")
+                continue
+            before = budget.spent
+            result = s.fn(ctx, budget)
+            used = budget.spent - before
+            self.record(scope, s.name, result is not None, used)
+            metrics.inc("planner_strategy_total", planner=self.name, strategy=s.name,
+                        result="hit" if result is not None else "miss")
+            if debug:
+                print(f"[planner:{self.name}] {s.name} (score {score:.2f}) -> "
+                      f"{'acierto' if result is not None else 'fallo'} con {used} requests")
+            if result is not None:
+                return result, s.name
+        return None, None
+
+    def stats(self, scope: Optional[str] = None) -> Dict[str, Dict[str, dict]]:
+        with self._lock:
+            data = self._load()
+            scopes = [scope] if scope else sorted(data)
+            return {sc: {k: {"attempts": int(n), "hits": int(h), "requests": int(r)}
+                         for k, (n, h, r) in data.get(sc, {}).items()} for sc in scopes}
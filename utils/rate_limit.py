@@ -0,0 +1,229 @@
+# utils/rate_limit.py
+"""
+Rate limiter por host, adaptativo (AIMD) y compartido entre procesos.
+
+Cada host tiene un token bucket (rate req/s, burst). El estado vive en una base
+SQLite local (./data/rate_limits.sqlite, o CASANDRA_RATE_DB; journal según
+utils.sqlite_journal), así que varios procesos del minero se reparten el mismo
+presupuesto:
+
+    wait = rate_limit.acquire(url)          # bloquea hasta tener token
+    r = requests.get(url, ...)
+    rate_limit.feedback(url, r.status_code, r.headers, from_cache=r.from_cache)
+
+Las URLs con respuesta fresca en la caché HTTP (http_cache.is_fresh) no
+consumen tokens ni ajustan el rate. Una entrada caducada se revalida contra
+el servidor (304 o cuerpo nuevo): pasa por el bucket y por Retry-After. Igual
+que un request forzado (modo en vivo, http_cache.refresh_kwargs), que salta
+la caché aunque la entrada esté fresca: acquire(url, force=True).
+
+Adaptación (AIMD):
+  - respuesta limpia (2xx/3xx/404) -> rate += ADD_STEP (hasta max_rate)
+  - 429 / 5xx                      -> rate *= DECREASE (hasta min_rate)
+  - Retry-After (segundos o fecha HTTP) bloquea el host hasta ese instante
+    para TODOS los procesos.
+
+Prioridad baja (prefetch en segundo plano, utils.prefetch):
+
+    with rate_limit.low_priority():
+        ...                                  # solo toma tokens si quedan LOW_PRIORITY_RESERVE libres
+
+así el trabajo de fondo usa la capacidad sobrante del bucket sin quitar
+turno a las peticiones del minado / la predicción en curso.
+
+CASANDRA_RATE_LIMIT=0 (o disable()) lo desactiva (benchmarks / replay).
+"""
+
+from __future__ import annotations
+
+import os
+import random
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from email.utils import parsedate_to_datetime
+from typing import Dict, Iterator, Mapping, NamedTuple, Optional
+from urllib.parse import urlsplit
+
+from utils import deadline, http_cache, metrics, sqlite_journal
+
+class HostLimit(NamedTuple):
+    rate: float       # req/s inicial
+    max_rate: float   # techo del aumento aditivo
+    burst: float      # tokens máximos acumulables
+
+# FBref banea con facilidad (~10 req/min); TSDB/ClubElo aguantan más.
+HOST_LIMITS: Dict[str, HostLimit] = {
+    "www.thesportsdb.com": HostLimit(2.0, 4.0, 4),
+    "fbref.com": HostLimit(0.2, 0.5, 2),
+    "api.clubelo.com": HostLimit(2.0, 6.0, 4),
+    "www.worldfootball.net": HostLimit(0.5, 1.0, 2),
+    "www.transfermarkt.com": HostLimit(0.3, 0.5, 2),
+}
+DEFAULT_LIMIT = HostLimit(1.0, 2.0, 2)
+MIN_RATE = 0.02          # nunca por debajo de 1 req / 50 s
+ADD_STEP = 0.02          # req/s sumados por respuesta limpia
+DECREASE = 0.5           # factor multiplicativo ante 429/5xx
+MAX_RETRY_AFTER = 300.0  # no respetar bloqueos absurdos (s)
+LOW_PRIORITY_RESERVE = 1.0   # tokens que la prioridad baja deja siempre libres
+
+DB_PATH = os.environ.get("CASANDRA_RATE_DB", "./data/rate_limits.sqlite")
+
+_ENABLED = os.environ.get("CASANDRA_RATE_LIMIT", "1") != "0"
+_LOCAL = threading.local()
+_LOW_PRIORITY: ContextVar[bool] = ContextVar("casandra_rate_low_priority", default=False)
+
+@contextmanager
+def low_priority() -> Iterator[None]:
+    token = _LOW_PRIORITY.set(True)
+    try:
+        yield
+    finally:
+        _LOW_PRIORITY.reset(token)
+
+def is_low_priority() -> bool:
+    return _LOW_PRIORITY.get()
+
+def disable() -> None:
+    global _ENABLED
+    _ENABLED = False
+
+def enable() -> None:
+    global _ENABLED
+    _ENABLED = True
+
+def host_of(url: str) -> str:
+    return urlsplit(url).netloc.lower()
+
+def limit_for(host: str) -> HostLimit:
+    return HOST_LIMITS.get(host, DEFAULT_LIMIT)
+
+# ---------- Estado compartido (SQLite) ----------
+def _conn() -> sqlite3.Connection:
+    c = getattr(_LOCAL, "conn", None)
+    if c is None or getattr(_LOCAL, "path", None) != DB_PATH:
+        d = os.path.dirname(DB_PATH)
+        if d:
+            os.makedirs(d, exist_ok=True)
+        c = sqlite3.connect(DB_PATH, timeout=30, isolation_level=None)
+        c.execute(f"PRAGMA journal_mode={sqlite_journal.journal_mode(DB_PATH)}")
+        c.execute("""CREATE TABLE IF NOT EXISTS buckets (
+                         host TEXT PRIMARY KEY,
+                         rate REAL NOT NULL,
+                         tokens REAL NOT NULL,
+                         updated REAL NOT NULL,
+                         blocked_until REAL NOT NULL DEFAULT 0)""")
+        _LOCAL.conn, _LOCAL.path = c, DB_PATH
+    return c
+
+def _load(c: sqlite3.Connection, host: str, now: float):
+    row = c.execute("SELECT rate, tokens, updated, blocked_until FROM buckets WHERE host=?", (host,)).fetchone()
+    if row is None:
+        lim = limit_for(host)
+        row = (lim.rate, lim.burst, now, 0.0)
+        c.execute("INSERT INTO buckets VALUES (?,?,?,?,?)", (host, *row))
+    return row
+
+def _try_take(host: str) -> float:
+    """Toma un token si hay; si no, devuelve los segundos a esperar (sin tomarlo)."""
+    need = 1.0 + (LOW_PRIORITY_RESERVE if _LOW_PRIORITY.get() else 0.0)
+    c = _conn()
+    now = time.time()
+    c.execute("BEGIN IMMEDIATE")
+    try:
+        rate, tokens, updated, blocked_until = _load(c, host, now)
+        if now < blocked_until:
+            c.execute("COMMIT")
+            return blocked_until - now
+        lim = limit_for(host)
+        tokens = min(lim.burst, tokens + max(0.0, now - updated) * rate)
+        need = min(need, lim.burst)          # burst 1: la prioridad baja espera al bucket lleno
+        if tokens >= need:
+            tokens -= 1.0
+            wait = 0.0
+        else:
+            wait = (need - tokens) / rate
+        c.execute("UPDATE buckets SET tokens=?, updated=? WHERE host=?", (tokens, now, host))
+        c.execute("COMMIT")
+        return wait
+    except BaseException:
+        c.execute("ROLLBACK")
+        raise
+
+def acquire(url: str, force: bool = False) -> float:
+    """
+    Espera hasta poder emitir un request a este host. Devuelve los segundos esperados.
+    force=True: el request no se sirve de la caché (refresco forzado) aunque haya entrada fresca.
+    """
+    if not _ENABLED or (not force and http_cache.is_fresh(url)):
+        return 0.0
+    host = host_of(url)
+    waited = 0.0
+    while True:
+        wait = _try_take(host)
+        if wait <= 0:
+            break
+        wait += random.uniform(0, 0.05)  # evita que todos los procesos despierten a la vez
+        deadline.sleep(wait, "rate_limit")      # sin margen para esperar el token: falla ya
+        waited += wait
+    if waited:
+        metrics.observe("rate_limit_wait_seconds", waited, limiter="token_bucket", host=host,
+                        priority="low" if _LOW_PRIORITY.get() else "normal")
+    return waited
+
+# ---------- Retroalimentación ----------
+def retry_after(headers: Optional[Mapping[str, str]]) -> Optional[float]:
+    """Retry-After en segundos (acepta entero o fecha HTTP), acotado a MAX_RETRY_AFTER."""
+    if not headers:
+        return None
+    ra = headers.get("Retry-After")
+    if not ra:
+        return None
+    ra = ra.strip()
+    if ra.isdigit():
+        secs = float(ra)
+    else:
+        try:
+            secs = parsedate_to_datetime(ra).timestamp() - time.time()
+        except Exception:
+            return None
+    return max(0.0, min(secs, MAX_RETRY_AFTER))
+
+def feedback(url: str, status, headers: Optional[Mapping[str, str]] = None, from_cache: bool = False) -> None:
+    """Ajusta el rate del host según la respuesta (status int o 'error' para excepciones)."""
+    if not _ENABLED or from_cache:
+        return
+    host = host_of(url)
+    throttled = status == 429 or (isinstance(status, int) and 500 <= status < 600)
+    if not throttled and not isinstance(status, int):
+        return  # error de red: ni sube ni baja
+    lim = limit_for(host)
+    ra = retry_after(headers) if throttled else None
+    c = _conn()
+    now = time.time()
+    c.execute("BEGIN IMMEDIATE")
+    try:
+        rate, tokens, updated, blocked_until = _load(c, host, now)
+        if throttled:
+            rate = max(MIN_RATE, rate * DECREASE)
+            tokens = min(tokens, 0.0)
+            if ra:
+                blocked_until = max(blocked_until, now + ra)
+        else:
+            rate = min(lim.max_rate, rate + ADD_STEP)
+        c.execute("UPDATE buckets SET rate=?, tokens=?, blocked_until=? WHERE host=?",
+                  (rate, tokens, blocked_until, host))
+        c.execute("COMMIT")
+    except BaseException:
+        c.execute("ROLLBACK")
+        raise
+    if throttled:
+        metrics.inc("rate_limit_decrease_total", host=host, status=status)
+
+def current_rates() -> Dict[str, dict]:
+    """Estado actual de todos los hosts (diagnóstico)."""
+    rows = _conn().execute("SELECT host, rate, tokens, updated, blocked_until FROM buckets").fetchall()
+    now = time.time()
+    return {h: {"rate": r, "tokens": t, "blocked_for": max(0.0, b - now)} for h, r, t, _, b in rows}
@@ -0,0 +1,120 @@
+# utils/singleflight.py
+"""
+Coalescencia de requests concurrentes idénticos ("single-flight").
+
+Los dos equipos de un partido (y los workers de una jornada) piden a menudo la
+misma URL a la vez: el mismo eventsday.php, el mismo CSV diario de ClubElo, el
+mismo calendario de FBref. Un Group registra las llamadas en vuelo por clave:
+el primer llamante ejecuta fn(), el resto espera y recibe el MISMO resultado ya
+parseado (o la misma excepción). No es una caché: al terminar, la clave se
+libera y la siguiente llamada vuelve a ejecutar.
+
+Uso:
+    _DAYS = singleflight.group("tsdb_eventsday")
+    events = _DAYS.do(url, lambda: _fetch(url))
+
+Contadores (utils.metrics):
+    singleflight_calls_total{group}       llamadas recibidas
+    singleflight_collapsed_total{group}   llamadas servidas por otra en vuelo
+    singleflight_retried_total{group}     reintentos tras el DeadlineExceeded de otro llamante
+
+El resultado se comparte entre hilos: los llamantes no deben mutarlo.
+
+Deadlines (utils.deadline): quien se une a una llamada en vuelo espera como
+mucho lo que le queda de SU deadline y, si no llega, lanza su propio
+DeadlineExceeded. Si la llamada en vuelo termina con el DeadlineExceeded del
+primer llamante, ese error no se reparte: los que esperaban vuelven a
+intentarlo (uno pasa a ejecutar fn() con su propio presupuesto).
+
+Prioridad (utils.rate_limit.low_priority): las llamadas de fondo solo se
+coalescen entre sí. Una llamada normal nunca espera a una de prefetch, que
+corre con los tokens sobrantes y sin deadline (inversión de prioridad).
+"""
+
+from __future__ import annotations
+
+import threading
+from typing import Any, Callable, Dict, Hashable, Optional
+
+from utils import deadline, metrics, rate_limit
+
+class _Call:
+    __slots__ = ("done", "result", "error", "waiters")
+
+    def __init__(self) -> None:
+        self.done = threading.Event()
+        self.result: Any = None
+        self.error: Optional[BaseException] = None
+        self.waiters = 0
+
+class Group:
+    """Registro de llamadas en vuelo por clave (normalmente la URL)."""
+
+    def __init__(self, name: str) -> None:
+        self.name = name
+        self._lock = threading.Lock()
+        self._inflight: Dict[Hashable, _Call] = {}
+        self.calls = 0
+        self.collapsed = 0
+
+    def do(self, key: Hashable, fn: Callable[[], Any]) -> Any:
+        metrics.inc("singleflight_calls_total", group=self.name)
+        if rate_limit.is_low_priority():
+            key = ("low_priority", key)
+        with self._lock:
+            self.calls += 1
+        while True:
+            with self._lock:
+                call = self._inflight.get(key)
+                leader = call is None
+                if leader:
+                    call = self._inflight[key] = _Call()
+                else:
+                    call.waiters += 1
+                    self.collapsed += 1
+            if leader:
+                return self._lead(key, call, fn)
+
+            metrics.inc("singleflight_collapsed_total", group=self.name)
+            if not call.done.wait(deadline.remaining()):
+                metrics.inc("deadline_exceeded_total", at=f"singleflight:{self.name}")
+                raise deadline.DeadlineExceeded(f"singleflight:{self.name}")
+            if isinstance(call.error, deadline.DeadlineExceeded):
+                # se agotó el presupuesto del otro llamante, no el nuestro: reintentar
+                metrics.inc("singleflight_retried_total", group=self.name)
+                continue
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+    def _lead(self, key: Hashable, call: _Call, fn: Callable[[], Any]) -> Any:
+        try:
+            call.result = fn()
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                self._inflight.pop(key, None)
+            call.done.set()
+        return call.result
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {"calls": self.calls, "collapsed": self.collapsed, "inflight": len(self._inflight)}
+
+_GROUPS: Dict[str, Group] = {}
+_GROUPS_LOCK = threading.Lock()
+
+def group(name: str) -> Group:
+    """Group compartido por nombre (un registro por tipo de recurso)."""
+    with _GROUPS_LOCK:
+        g = _GROUPS.get(name)
+        if g is None:
+            g = _GROUPS[name] = Group(name)
+        return g
+
+def stats() -> Dict[str, Dict[str, int]]:
+    with _GROUPS_LOCK:
+        groups = list(_GROUPS.values())
+    return {g.name: g.stats() for g in groups}
@@ -0,0 +1,225 @@
+# utils/source_router.py
+"""
+Router de fuentes redundantes con hedging y circuit breaker.
+
+Para datos que ofrecen varias fuentes (p.ej. calendario de jornada: FBref y
+worldfootball.net), SourceRouter:
+
+  1) ordena las fuentes por tiempo esperado = latencia mediana / tasa de éxito
+     (estadísticas móviles de las últimas WINDOW llamadas; sin datos, manda el
+     orden declarado),
+  2) lanza la primera; si no hay respuesta válida antes del deadline de hedge
+     (p90 de su latencia, acotado) lanza también la siguiente,
+  3) devuelve la PRIMERA respuesta válida que llegue; las demás terminan en
+     segundo plano y solo alimentan las estadísticas,
+  4) abre el circuito de una fuente tras BREAKER_THRESHOLD fallos seguidos y no
+     la lanza (ni como principal ni como cobertura) durante BREAKER_COOLDOWN
+     segundos, salvo que todas estén abiertas. Pasado el cooldown queda
+     semiabierta: una sola llamada de prueba a la vez; si falla, se reabre.
+
+Dos criterios sobre el resultado: is_valid decide si una respuesta gana (p.ej.
+lista no vacía) e is_healthy si la fuente funcionó (p.ej. lista vacía pero
+request correcto); solo lo segundo alimenta el breaker. Por defecto,
+is_healthy = is_valid.
+
+Si ninguna respuesta es válida se devuelve la última respuesta inválida (p.ej. [],
+antes que una no sana)
+o, si todas fallaron con excepción, se relanza la última excepción.
+
+Las fuentes se ejecutan en el contexto del llamante (utils.deadline incluido) y
+la espera nunca supera su deadline: al agotarse se lanza DeadlineExceeded.
+"""
+
+from __future__ import annotations
+
+import contextvars
+import statistics
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Any, Callable, Deque, Dict, List, Optional
+
+from utils import deadline, metrics
+
+WINDOW = 50
+DEFAULT_LATENCY = 5.0        # s, fuente sin historial
+HEDGE_MIN = 1.5              # s
+HEDGE_MAX = 8.0              # s
+BREAKER_THRESHOLD = 3        # fallos consecutivos
+BREAKER_COOLDOWN = 300.0     # s
+
+_EXECUTOR = ThreadPoolExecutor(max_workers=8, thread_name_prefix="source-router")
+
+class SourceStats:
+    """Latencias y resultados recientes de una fuente + estado del circuito."""
+
+    def __init__(self) -> None:
+        self.latencies: Deque[float] = deque(maxlen=WINDOW)
+        self.outcomes: Deque[bool] = deque(maxlen=WINDOW)
+        self.consecutive_failures = 0
+        self.open_until = 0.0
+        self.probing = False         # semiabierta: hay una llamada de prueba en curso
+
+    def record(self, ok: bool, elapsed: float) -> bool:
+        """Registra una llamada; devuelve True si este fallo abre el circuito."""
+        self.outcomes.append(ok)
+        self.probing = False
+        if ok:
+            self.latencies.append(elapsed)
+            self.consecutive_failures = 0
+            return False
+        self.consecutive_failures += 1
+        if self.consecutive_failures >= BREAKER_THRESHOLD and not self.is_open():
+            self.open_until = time.monotonic() + BREAKER_COOLDOWN
+            return True
+        return False
+
+    def is_open(self) -> bool:
+        return time.monotonic() < self.open_until
+
+    def claim(self) -> bool:
+        """¿Se puede lanzar? Cerrada: sí. Semiabierta: solo si no hay otra prueba en curso."""
+        if self.consecutive_failures < BREAKER_THRESHOLD:
+            return True
+        if self.probing:
+            return False
+        self.probing = True
+        return True
+
+    def success_rate(self) -> float:
+        return sum(self.outcomes) / len(self.outcomes) if self.outcomes else 1.0
+
+    def p50(self) -> float:
+        return statistics.median(self.latencies) if self.latencies else DEFAULT_LATENCY
+
+    def p90(self) -> float:
+        if not self.latencies:
+            return DEFAULT_LATENCY
+        if len(self.latencies) < 5:
+            return max(self.latencies)
+        return statistics.quantiles(self.latencies, n=10)[-1]
+
+    def expected_time(self) -> float:
+        return self.p50() / max(self.success_rate(), 0.05)
+
+    def as_dict(self) -> dict:
+        return {
+            "calls": len(self.outcomes), "success_rate": round(self.success_rate(), 3),
+            "p50_s": round(self.p50(), 3), "p90_s": round(self.p90(), 3),
+            "consecutive_failures": self.consecutive_failures, "open": self.is_open(),
+        }
+
+class SourceRouter:
+    def __init__(self, name: str, sources: Dict[str, Callable[..., Any]],
+                 is_valid: Callable[[Any], bool] = bool,
+                 is_healthy: Optional[Callable[[Any], bool]] = None) -> None:
+        self.name = name
+        self.sources = dict(sources)            # orden declarado = preferencia inicial
+        self.is_valid = is_valid
+        self.is_healthy = is_healthy or is_valid
+        self.stats: Dict[str, SourceStats] = {s: SourceStats() for s in self.sources}
+        self._lock = threading.Lock()
+
+    def order(self) -> List[str]:
+        """Fuentes con circuito cerrado (o semiabierto) por tiempo esperado; todas si están todas abiertas."""
+        with self._lock:
+            declared = list(self.sources)
+            usable = [s for s in declared if not self.stats[s].is_open()] or declared
+            return sorted(usable, key=lambda s: (self.stats[s].expected_time(), declared.index(s)))
+
+    def _claim(self, source: str) -> bool:
+        with self._lock:
+            st = self.stats[source]
+            return st.is_open() or st.claim()    # abierta: solo llega aquí si lo están todas
+
+    def hedge_after(self, source: str) -> float:
+        with self._lock:
+            return min(HEDGE_MAX, max(HEDGE_MIN, self.stats[source].p90()))
+
+    def _run(self, source: str, args, kwargs):
+        t0 = time.monotonic()
+        try:
+            res = self.sources[source](*args, **kwargs)
+        except deadline.DeadlineExceeded:
+            with self._lock:
+                self.stats[source].probing = False
+            raise                      # no es culpa de la fuente: no cuenta para el breaker
+        except BaseException:
+            self._record(source, False, time.monotonic() - t0)
+            raise
+        self._record(source, self.is_healthy(res), time.monotonic() - t0)
+        return res
+
+    def _record(self, source: str, ok: bool, elapsed: float) -> None:
+        with self._lock:
+            opened = self.stats[source].record(ok, elapsed)
+        metrics.observe("source_latency_seconds", elapsed, router=self.name, source=source)
+        metrics.inc("source_calls_total", router=self.name, source=source, outcome="ok" if ok else "fail")
+        if opened:
+            metrics.inc("source_breaker_open_total", router=self.name, source=source)
+
+    def call(self, *args, debug: bool = False, **kwargs) -> Any:
+        order = self.order()
+        pending = {}
+        last_invalid, last_error, have_invalid = None, None, False
+        nxt = 0
+
+        def launch() -> bool:
+            nonlocal nxt
+            while nxt < len(order):
+                s = order[nxt]
+                nxt += 1
+                if not self._claim(s):
+                    if debug: print(f"[{self.name}] {s} semiabierta, prueba en curso")
+                    continue
+                if debug: print(f"[{self.name}] -> {s}")
+                ctx = contextvars.copy_context()
+                pending[_EXECUTOR.submit(ctx.run, self._run, s, args, dict(kwargs, debug=debug))] = s
+                return True
+            return False
+
+        if not launch():
+            # todas semiabiertas con su prueba en curso: forzar la preferida
+            s = order[0]
+            pending[_EXECUTOR.submit(contextvars.copy_context().run, self._run, s, args,
+                                     dict(kwargs, debug=debug))] = s
+        while pending:
+            timeout = self.hedge_after(order[nxt - 1]) if nxt < len(order) else None
+            left = deadline.remaining()
+            if left is not None:
+                timeout = max(0.0, left if timeout is None else min(timeout, left))
+            done, _ = wait(list(pending), timeout=timeout, return_when=FIRST_COMPLETED)
+            if not done and deadline.expired():
+                deadline.check(f"router:{self.name}")
+            if not done:
+                # deadline sin respuesta: petición de cobertura a la siguiente fuente
+                if debug: print(f"[{self.name}] hedge")
+                if launch():
+                    metrics.inc("source_hedges_total", router=self.name, source=list(pending.values())[-1])
+                continue
+            for fut in done:
+                s = pending.pop(fut)
+                try:
+                    res = fut.result()
+                except Exception as e:
+                    last_error = e
+                    if debug: print(f"[{self.name}] {s} error: {e}")
+                else:
+                    if self.is_valid(res):
+                        metrics.inc("source_wins_total", router=self.name, source=s)
+                        return res
+                    if not have_invalid or self.is_healthy(res):
+                        last_invalid = res             # mejor un [] sano que un bloqueo
+                    have_invalid = True
+                    if debug: print(f"[{self.name}] {s} sin datos válidos")
+            # la fuente en curso falló o vino vacía: pasar a la siguiente sin esperar
+            if not pending and nxt < len(order):
+                launch()
+        if have_invalid:
+            return last_invalid
+        raise last_error
+
+    def report(self) -> Dict[str, dict]:
+        with self._lock:
+            return {s: st.as_dict() for s, st in self.stats.items()}
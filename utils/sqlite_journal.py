@@ -0,0 +1,44 @@
+# utils/sqlite_journal.py
+"""
+Modo de journal para las bases SQLite compartidas (cola de trabajo, rate
+limiter, caché negativa, caché de features).
+
+WAL necesita memoria compartida entre los procesos que abren la base, así que
+solo vale en una máquina. Si la base está en un montaje de red (NFS, SMB/CIFS,
+sshfs... según /proc/mounts) se usa el journal clásico (DELETE), que funciona
+con los locks del sistema de ficheros:
+
+    c.execute(f"PRAGMA journal_mode={sqlite_journal.journal_mode(path)}")
+
+CASANDRA_SQLITE_JOURNAL=wal|delete lo fuerza para todas las bases.
+"""
+
+from __future__ import annotations
+
+import os
+from typing import Optional
+
+NETWORK_FS = {"nfs", "nfs4", "cifs", "smb3", "smbfs", "fuse.sshfs", "9p", "afs", "ceph", "glusterfs",
+              "fuse.glusterfs", "lustre", "gpfs"}
+
+def _fs_type(path: str) -> Optional[str]:
+    """Tipo de sistema de ficheros que contiene 'path' (Linux, /proc/mounts); None si no se sabe."""
+    try:
+        with open("/proc/mounts", "r", encoding="utf-8") as f:
+            mounts = [line.split()[1:3] for line in f if len(line.split()) >= 3]
+    except OSError:
+        return None
+    real = os.path.realpath(path)
+    best, fs = "", None
+    for point, kind in mounts:
+        point = point.replace("\\040", " ")
+        if (real == point or real.startswith(point.rstrip("/") + "/")) and len(point) > len(best):
+            best, fs = point, kind
+    return fs
+
+def journal_mode(path: str, override: Optional[str] = None) -> str:
+    """'WAL' en disco local, 'DELETE' en un montaje de red; 'override' (o el entorno) manda."""
+    forced = (override or os.environ.get("CASANDRA_SQLITE_JOURNAL", "")).strip().upper()
+    if forced in ("WAL", "DELETE"):
+        return forced
+    return "DELETE" if _fs_type(os.path.dirname(os.path.abspath(path)) or ".") in NETWORK_FS else "WAL"
@@ -0,0 +1,163 @@
+# utils/standings.py
+"""
+Clasificaciones incrementales (features de BRUTE_FEATURES.md):
+
+    PA            posición actual en la competición (0 = sin partidos aún)
+    TGACL/TGECL   goles a favor / en contra del local en la competición
+    TGACV/TGECV   goles a favor / en contra del visitante en la competición
+    PPLCL         promedio de puntos del local jugando como local
+    PPVCV         promedio de puntos del visitante jugando como visitante
+
+LeagueTable acumula por equipo (general, local y visitante) y cada resultado es
+una actualización O(1); la posición se obtiene ordenando la tabla solo cuando
+se consulta tras un cambio (~20 equipos).
+
+standings_features(store) recorre el histórico UNA vez en orden cronológico y
+devuelve las features de todos los partidos (estado previo al día del partido:
+los partidos del mismo día no se ven entre sí). table_as_of() da la tabla de
+una competición en cualquier fecha.
+"""
+
+from __future__ import annotations
+
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from utils.match_store import MatchStore, normalize_team, to_day
+
+STANDINGS_COLUMNS: List[str] = ["PA_L", "PA_V", "TGACL", "TGECL", "TGACV", "TGECV", "PPLCL", "PPVCV"]
+
+# columnas de los acumuladores por equipo
+PJ, PG, PE, PP, GF, GC, PTS, PJ_L, PTS_L, GF_L, GC_L, PJ_V, PTS_V, GF_V, GC_V = range(15)
+N_ACC = 15
+
+class LeagueTable:
+    """Tabla de una competición/temporada."""
+
+    def __init__(self) -> None:
+        self.team_row: Dict[int, int] = {}      # índice de equipo (store) -> fila
+        self.teams: List[int] = []
+        self.acc = np.zeros((0, N_ACC), dtype=np.int32)
+        self._positions: Optional[Dict[int, int]] = None
+
+    def _row(self, team: int) -> int:
+        r = self.team_row.get(team)
+        if r is None:
+            r = self.team_row[team] = len(self.teams)
+            self.teams.append(team)
+            if r >= len(self.acc):
+                grow = np.zeros((max(8, len(self.acc)), N_ACC), dtype=np.int32)
+                self.acc = np.concatenate([self.acc, grow])
+        return r
+
+    def apply(self, home: int, away: int, hg: int, ag: int) -> None:
+        h, a = self._row(home), self._row(away)
+        ph = 3 if hg > ag else (1 if hg == ag else 0)
+        pa = 3 if ag > hg else (1 if hg == ag else 0)
+        acc = self.acc
+        acc[h, PJ] += 1; acc[h, GF] += hg; acc[h, GC] += ag; acc[h, PTS] += ph
+        acc[a, PJ] += 1; acc[a, GF] += ag; acc[a, GC] += hg; acc[a, PTS] += pa
+        acc[h, PG if ph == 3 else (PE if ph == 1 else PP)] += 1
+        acc[a, PG if pa == 3 else (PE if pa == 1 else PP)] += 1
+        acc[h, PJ_L] += 1; acc[h, PTS_L] += ph; acc[h, GF_L] += hg; acc[h, GC_L] += ag
+        acc[a, PJ_V] += 1; acc[a, PTS_V] += pa; acc[a, GF_V] += ag; acc[a, GC_V] += hg
+        self._positions = None
+
+    def positions(self) -> Dict[int, int]:
+        """equipo -> posición (puntos, diferencia de goles, goles a favor)."""
+        if self._positions is None:
+            n = len(self.teams)
+            acc = self.acc[:n]
+            order = np.lexsort((-acc[:, GF], -(acc[:, GF] - acc[:, GC]), -acc[:, PTS]))
+            self._positions = {self.teams[r]: pos for pos, r in enumerate(order, start=1)}
+        return self._positions
+
+    def stats(self, team: int) -> Optional[np.ndarray]:
+        r = self.team_row.get(team)
+        return None if r is None else self.acc[r]
+
+    def features(self, team: int, side: str) -> Tuple[int, int, int, Optional[float]]:
+        """(PA, goles a favor, goles en contra, promedio de puntos como local/visitante)."""
+        s = self.stats(team)
+        if s is None or s[PJ] == 0:
+            return 0, 0, 0, None
+        if side == "L":
+            avg = s[PTS_L] / s[PJ_L] if s[PJ_L] else None
+        else:
+            avg = s[PTS_V] / s[PJ_V] if s[PJ_V] else None
+        return self.positions()[team], int(s[GF]), int(s[GC]), avg
+
+    def as_rows(self, team_names: List[str]) -> List[dict]:
+        pos = self.positions()
+        rows = []
+        for t in sorted(self.teams, key=lambda t: pos[t]):
+            s = self.acc[self.team_row[t]]
+            rows.append({
+                "pos": pos[t], "team": team_names[t], "pj": int(s[PJ]), "pg": int(s[PG]), "pe": int(s[PE]),
+                "pp": int(s[PP]), "gf": int(s[GF]), "gc": int(s[GC]), "pts": int(s[PTS]),
+                "pts_local": int(s[PTS_L]), "pts_visitante": int(s[PTS_V]),
+            })
+        return rows
+
+def _table_key(store: MatchStore, i: int) -> Tuple[str, int]:
+    return str(store.comp[i]), int(store.season[i])
+
+def standings_features(store: MatchStore) -> Dict[str, np.ndarray]:
+    """
+    Features de clasificación para TODOS los partidos del store en un solo barrido.
+    Devuelve columnas (STANDINGS_COLUMNS) alineadas con los partidos del store;
+    NaN en PPLCL/PPVCV cuando el equipo aún no jugó en esa condición.
+    """
+    n = len(store)
+    out = {c: np.zeros(n, dtype=np.float32) for c in STANDINGS_COLUMNS}
+    tables: Dict[Tuple[str, int], LeagueTable] = {}
+    days, starts = store.match_days()
+    ends = np.append(starts[1:], n)
+    for s, e in zip(starts, ends):
+        # 1) features con el estado previo al día
+        for i in range(s, e):
+            t = tables.get(_table_key(store, i))
+            if t is None:
+                t = tables[_table_key(store, i)] = LeagueTable()
+            pa_l, gf_l, gc_l, avg_l = t.features(int(store.home[i]), "L")
+            pa_v, gf_v, gc_v, avg_v = t.features(int(store.away[i]), "V")
+            out["PA_L"][i], out["PA_V"][i] = pa_l, pa_v
+            out["TGACL"][i], out["TGECL"][i] = gf_l, gc_l
+            out["TGACV"][i], out["TGECV"][i] = gf_v, gc_v
+            out["PPLCL"][i] = np.nan if avg_l is None else avg_l
+            out["PPVCV"][i] = np.nan if avg_v is None else avg_v
+        # 2) aplicar los resultados del día
+        for i in range(s, e):
+            tables[_table_key(store, i)].apply(int(store.home[i]), int(store.away[i]),
+                                               int(store.hg[i]), int(store.ag[i]))
+    return out
+
+def features_by_match(store: MatchStore, feats: Optional[Dict[str, np.ndarray]] = None) -> Dict[tuple, dict]:
+    """(Fecha 'dd/mm/aa', Local, Visitante) -> {columna: valor} para unir con los shards."""
+    feats = feats if feats is not None else standings_features(store)
+    out = {}
+    for i in range(len(store)):
+        fecha = store.dates[i].item().strftime("%d/%m/%y")
+        key = (fecha, store.teams[int(store.home[i])], store.teams[int(store.away[i])])
+        out[key] = {c: (None if np.isnan(v[i]) else float(v[i])) for c, v in feats.items()}
+    return out
+
+def _table_as_of(store: MatchStore, comp: str, season: int, fecha) -> LeagueTable:
+    end = int(np.searchsorted(store.dates, to_day(fecha), side="left"))
+    mask = (store.comp[:end] == comp) & (store.season[:end] == season)
+    t = LeagueTable()
+    for i in np.flatnonzero(mask):
+        t.apply(int(store.home[i]), int(store.away[i]), int(store.hg[i]), int(store.ag[i]))
+    return t
+
+def table_as_of(store: MatchStore, comp: str, season: int, fecha) -> List[dict]:
+    """Clasificación de (competición, temporada) con los partidos anteriores a 'fecha'."""
+    return _table_as_of(store, comp, season, fecha).as_rows(store.teams)
+
+def team_position(store: MatchStore, comp: str, season: int, team_name: str, fecha) -> int:
+    """PA de un equipo antes de 'fecha' (0 si no aparece)."""
+    team = store.team_idx.get(normalize_team(team_name))
+    if team is None:
+        return 0
+    return _table_as_of(store, comp, season, fecha).positions().get(team, 0)
@@ -0,0 +1,390 @@
+# utils/train_model.py
+"""
+Entrenamiento de Casandra (SVM) sobre los shards de features minadas.
+
+Dos modelos: 'result' (1 / X / 2) y 'goals' (total de goles, 0..GOALS_CAP+).
+Dos caminos:
+  - 'sgd'    : SVM lineal (SGDClassifier) con partial_fit sobre TODO el dataset,
+               leído por chunks desde una matriz memmap en disco (out-of-core).
+  - 'kernel' : SVC con kernel RBF sobre una submuestra aleatoria.
+
+Flujo:
+  1) scan     -> una pasada en streaming por los shards ajusta el FeatureEncoder
+                 (vocabulario de Local/Visitante/Competición + media/desv. numéricas).
+  2) encode   -> segunda pasada: X, y, temporada a .npy memmap en cache_dir.
+                 La clave de caché depende de los shards (ruta/tamaño/mtime) y del
+                 target, así que el preprocesado ajustado se reutiliza entre
+                 trials y entre ejecuciones.
+  3) search   -> búsqueda de hiperparámetros en paralelo (joblib, n_jobs núcleos);
+                 los workers comparten la memmap sin copiarla.
+  4) fit      -> reentrena con los mejores parámetros sobre todo y guarda el modelo
+                 como artefacto memory-mappable (utils.model_artifact).
+"""
+
+from __future__ import annotations
+
+import hashlib
+import itertools
+import json
+import math
+import os
+import time
+from typing import Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from utils import feature_store
+
+NUMERIC_FEATURES: List[str] = [
+    "ELO_L", "RANK_L", "ELO_V", "RANK_V",
+    "PGML", "PGEL", "PGMV", "PGEV",
+    "PPL", "PPV",
+    "DD_L", "DD_V",
+    "VMTL", "VMTV",
+]
+CATEGORICAL_FEATURES: List[str] = ["Local", "Visitante", "Competición"]
+
+TARGETS = ("result", "goals")
+RESULT_CLASSES = ["1", "X", "2"]
+GOALS_CAP = 6  # 6 = "6 o más"
+
+CACHE_DIR = "./data/train_cache"
+MODELS_DIR = "./models"
+CHUNK = 4096
+
+SGD_GRID = {
+    "loss": ["hinge", "modified_huber"],
+    "alpha": [1e-5, 1e-4, 1e-3, 1e-2],
+}
+KERNEL_GRID = {
+    "C": [0.1, 1.0, 10.0],
+    "gamma": ["scale", 0.01, 0.1],
+}
+
+# ---------- Targets ----------
+def _num(v) -> float:
+    if v is None or v == "":
+        return math.nan
+    try:
+        return float(v)
+    except (TypeError, ValueError):
+        return math.nan
+
+def target_of(row: Dict[str, str], target: str) -> Optional[str]:
+    gl, gv = _num(row.get("GL")), _num(row.get("GV"))
+    if math.isnan(gl) or math.isnan(gv):
+        return None
+    if target == "result":
+        return "1" if gl > gv else ("2" if gl < gv else "X")
+    if target == "goals":
+        return str(min(int(gl + gv), GOALS_CAP))
+    raise ValueError(f"Target desconocido: {target}")
+
+def classes_of(target: str) -> List[str]:
+    return RESULT_CLASSES if target == "result" else [str(i) for i in range(GOALS_CAP + 1)]
+
+# ---------- Encoder ----------
+class FeatureEncoder:
+    """
+    Preprocesado ajustable en streaming y sin dependencias más allá de numpy:
+    numéricas estandarizadas (NaN -> 0 = media) + one-hot de categóricas
+    (categoría desconocida -> todo ceros).
+    """
+
+    def __init__(self) -> None:
+        self.numeric = list(NUMERIC_FEATURES)
+        self.categorical = list(CATEGORICAL_FEATURES)
+        self.categories: Dict[str, List[str]] = {c: [] for c in self.categorical}
+        self.mean = np.zeros(len(self.numeric))
+        self.std = np.ones(len(self.numeric))
+        self._n = np.zeros(len(self.numeric))
+        self._s = np.zeros(len(self.numeric))
+        self._ss = np.zeros(len(self.numeric))
+        self._seen: Dict[str, set] = {c: set() for c in self.categorical}
+        self._index: Dict[str, Dict[str, int]] = {}
+
+    def partial_fit(self, rows: Sequence[Dict[str, str]]) -> "FeatureEncoder":
+        num = np.array([[_num(r.get(c)) for c in self.numeric] for r in rows], dtype=np.float64)
+        if len(num):
+            ok = ~np.isnan(num)
+            self._n += ok.sum(axis=0)
+            self._s += np.where(ok, num, 0.0).sum(axis=0)
+            self._ss += np.where(ok, num * num, 0.0).sum(axis=0)
+        for c in self.categorical:
+            self._seen[c].update((r.get(c) or "") for r in rows)
+        return self
+
+    def finalize(self) -> "FeatureEncoder":
+        n = np.maximum(self._n, 1)
+        self.mean = self._s / n
+        var = np.maximum(self._ss / n - self.mean ** 2, 0.0)
+        self.std = np.where(var > 0, np.sqrt(var), 1.0)
+        self.categories = {c: sorted(v for v in self._seen[c] if v) for c in self.categorical}
+        self._build_index()
+        return self
+
+    def _build_index(self) -> None:
+        self._index = {c: {v: i for i, v in enumerate(vals)} for c, vals in self.categories.items()}
+
+    @property
+    def n_features(self) -> int:
+        return len(self.numeric) + sum(len(v) for v in self.categories.values())
+
+    def feature_names(self) -> List[str]:
+        return self.numeric + [f"{c}={v}" for c in self.categorical for v in self.categories[c]]
+
+    def transform(self, rows: Sequence[Dict[str, str]]) -> np.ndarray:
+        X = np.zeros((len(rows), self.n_features), dtype=np.float32)
+        if not len(rows):
+            return X
+        num = np.array([[_num(r.get(c)) for c in self.numeric] for r in rows], dtype=np.float64)
+        num = (num - self.mean) / self.std
+        X[:, :len(self.numeric)] = np.nan_to_num(num, nan=0.0)
+        off = len(self.numeric)
+        for c in self.categorical:
+            idx = self._index[c]
+            for i, r in enumerate(rows):
+                j = idx.get(r.get(c) or "")
+                if j is not None:
+                    X[i, off + j] = 1.0
+            off += len(self.categories[c])
+        return X
+
+    def to_dict(self) -> dict:
+        return {
+            "numeric": self.numeric, "categorical": self.categorical,
+            "categories": self.categories,
+            "mean": self.mean.tolist(), "std": self.std.tolist(),
+        }
+
+    @classmethod
+    def from_dict(cls, d: dict) -> "FeatureEncoder":
+        enc = cls()
+        enc.numeric = list(d["numeric"])
+        enc.categorical = list(d["categorical"])
+        enc.categories = {c: list(v) for c, v in d["categories"].items()}
+        enc.mean = np.asarray(d["mean"], dtype=np.float64)
+        enc.std = np.asarray(d["std"], dtype=np.float64)
+        enc._build_index()
+        return enc
+
+# ---------- Streaming ----------
+def iter_batches(paths: Iterable[str], size: int = CHUNK) -> Iterator[List[Dict[str, str]]]:
+    batch: List[Dict[str, str]] = []
+    for row in feature_store.iter_rows(paths):
+        batch.append(row)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+def scan(paths: Sequence[str]) -> FeatureEncoder:
+    enc = FeatureEncoder()
+    for batch in iter_batches(paths):
+        enc.partial_fit(batch)
+    return enc.finalize()
+
+def _cache_key(paths: Sequence[str], target: str) -> str:
+    h = hashlib.sha1(target.encode())
+    for p in paths:
+        st = os.stat(p)
+        h.update(f"{os.path.abspath(p)}|{st.st_size}|{st.st_mtime_ns}".encode())
+    return h.hexdigest()[:16]
+
+class EncodedDataset:
+    """X (memmap float32), y (índices de clase), season (int) + encoder ajustado."""
+
+    def __init__(self, X: np.ndarray, y: np.ndarray, season: np.ndarray,
+                 encoder: FeatureEncoder, classes: List[str], cache_path: str) -> None:
+        self.X, self.y, self.season = X, y, season
+        self.encoder, self.classes, self.cache_path = encoder, classes, cache_path
+
+    def __len__(self) -> int:
+        return len(self.y)
+
+def encode(paths: Sequence[str], target: str, cache_dir: str = CACHE_DIR,
+           encoder: Optional[FeatureEncoder] = None, debug: bool = False) -> EncodedDataset:
+    """
+    Codifica los shards a memmap en cache_dir/<clave>/ (o reutiliza si ya existe).
+    Solo se incluyen filas con resultado conocido.
+    """
+    classes = classes_of(target)
+    key = _cache_key(paths, target)
+    d = os.path.join(cache_dir, key)
+    meta_p = os.path.join(d, "meta.json")
+    if os.path.exists(meta_p):
+        with open(meta_p, "r", encoding="utf-8") as f:
+            meta = json.load(f)
+        if debug: print(f"[train] caché de preprocesado {d} ({meta['n']} filas)")
+        return EncodedDataset(np.load(os.path.join(d, "X.npy"), mmap_mode="r"),
+                              np.load(os.path.join(d, "y.npy"), mmap_mode="r"),
+                              np.load(os.path.join(d, "season.npy"), mmap_mode="r"),
+                              FeatureEncoder.from_dict(meta["encoder"]), classes, d)
+
+    enc = encoder or scan(paths)
+    cls_idx = {c: i for i, c in enumerate(classes)}
+    n = sum(1 for r in feature_store.iter_rows(paths) if target_of(r, target) is not None)
+    os.makedirs(d, exist_ok=True)
+    X = np.lib.format.open_memmap(os.path.join(d, "X.npy"), mode="w+", dtype=np.float32,
+                                  shape=(n, enc.n_features))
+    y = np.empty(n, dtype=np.int16)
+    season = np.empty(n, dtype=np.int16)
+    pos = 0
+    for batch in iter_batches(paths):
+        rows = [r for r in batch if target_of(r, target) is not None]
+        if not rows:
+            continue
+        X[pos:pos + len(rows)] = enc.transform(rows)
+        y[pos:pos + len(rows)] = [cls_idx[target_of(r, target)] for r in rows]
+        season[pos:pos + len(rows)] = [int(_num(r.get("Temporada")) if r.get("Temporada") else 0) for r in rows]
+        pos += len(rows)
+    X.flush()
+    np.save(os.path.join(d, "y.npy"), y)
+    np.save(os.path.join(d, "season.npy"), season)
+    with open(meta_p, "w", encoding="utf-8") as f:
+        json.dump({"n": int(n), "target": target, "paths": list(paths), "encoder": enc.to_dict()}, f)
+    if debug: print(f"[train] codificadas {n} filas x {enc.n_features} features -> {d}")
+    return EncodedDataset(np.load(os.path.join(d, "X.npy"), mmap_mode="r"), y, season, enc, classes, d)
+
+def holdout_split(ds: EncodedDataset, frac: float = 0.2) -> Tuple[np.ndarray, np.ndarray]:
+    """Validación temporal: última temporada (o último 'frac' si solo hay una)."""
+    seasons = np.unique(ds.season)
+    if len(seasons) > 1:
+        va = ds.season == seasons[-1]
+        return np.flatnonzero(~va), np.flatnonzero(va)
+    cut = int(len(ds) * (1 - frac))
+    idx = np.arange(len(ds))
+    return idx[:cut], idx[cut:]
+
+# ---------- Scoring ----------
+def softmax_confidence(scores: np.ndarray) -> np.ndarray:
+    """Confianza por clase a partir de decision_function (softmax estable)."""
+    s = np.asarray(scores, dtype=np.float64)
+    if s.ndim == 1:
+        s = np.column_stack([-s, s])
+    s = s - s.max(axis=1, keepdims=True)
+    e = np.exp(s)
+    return e / e.sum(axis=1, keepdims=True)
+
+def _expand_scores(model, X: np.ndarray, n_classes: int) -> np.ndarray:
+    """decision_function alineado a todas las clases (las no vistas quedan a -inf)."""
+    s = model.decision_function(X)
+    if s.ndim == 1:
+        s = np.column_stack([-s, s])
+    out = np.full((X.shape[0], n_classes), -1e9)
+    out[:, np.asarray(model.classes_, dtype=int)] = s
+    return out
+
+def evaluate(model, X: np.ndarray, y: np.ndarray, n_classes: int) -> Dict[str, float]:
+    if not len(y):
+        return {"accuracy": math.nan, "log_loss": math.nan, "n": 0}
+    p = softmax_confidence(_expand_scores(model, X, n_classes))
+    acc = float((p.argmax(axis=1) == y).mean())
+    ll = float(-np.log(np.clip(p[np.arange(len(y)), y], 1e-15, 1.0)).mean())
+    return {"accuracy": acc, "log_loss": ll, "n": int(len(y))}
+
+# ---------- Camino lineal (SGD, out-of-core) ----------
+def _fit_sgd(X: np.ndarray, y: np.ndarray, idx: np.ndarray, n_classes: int, params: dict,
+             epochs: int = 5, seed: int = 0):
+    from sklearn.linear_model import SGDClassifier
+    clf = SGDClassifier(random_state=seed, **params)
+    classes = np.arange(n_classes)
+    rng = np.random.default_rng(seed)
+    for _ in range(epochs):
+        order = idx[rng.permutation(len(idx))]
+        for i in range(0, len(order), CHUNK):
+            chunk = np.sort(order[i:i + CHUNK])  # lectura secuencial de la memmap
+            clf.partial_fit(X[chunk], y[chunk], classes=classes)
+    return clf
+
+def _sgd_trial(X, y, tr, va, n_classes, params, epochs):
+    t0 = time.perf_counter()
+    clf = _fit_sgd(X, y, tr, n_classes, params, epochs)
+    res = evaluate(clf, X[va], y[va], n_classes)
+    res.update(params=params, seconds=time.perf_counter() - t0)
+    return res
+
+def _grid(grid: Dict[str, list]) -> List[dict]:
+    keys = sorted(grid)
+    return [dict(zip(keys, vals)) for vals in itertools.product(*(grid[k] for k in keys))]
+
+def train_sgd(ds: EncodedDataset, grid: Dict[str, list] = SGD_GRID, epochs: int = 5,
+              n_jobs: int = -1, debug: bool = False):
+    from joblib import Parallel, delayed
+    tr, va = holdout_split(ds)
+    n_classes = len(ds.classes)
+    trials = Parallel(n_jobs=n_jobs, mmap_mode="r")(
+        delayed(_sgd_trial)(ds.X, ds.y, tr, va, n_classes, p, epochs) for p in _grid(grid)
+    )
+    trials.sort(key=lambda t: (t["log_loss"], -t["accuracy"]))
+    if debug:
+        for t in trials:
+            print(f"[sgd] {t['params']} acc={t['accuracy']:.3f} ll={t['log_loss']:.3f} ({t['seconds']:.1f}s)")
+    best = trials[0]
+    model = _fit_sgd(ds.X, ds.y, np.arange(len(ds)), n_classes, best["params"], epochs)
+    return model, best, trials
+
+# ---------- Camino kernel (SVC sobre submuestra) ----------
+def train_kernel(ds: EncodedDataset, subsample: int = 20000, grid: Dict[str, list] = KERNEL_GRID,
+                 n_jobs: int = -1, seed: int = 0, debug: bool = False):
+    from joblib import Parallel, delayed
+    from sklearn.svm import SVC
+    tr, va = holdout_split(ds)
+    rng = np.random.default_rng(seed)
+    if len(tr) > subsample:
+        tr = np.sort(rng.choice(tr, subsample, replace=False))
+    Xtr, ytr = np.asarray(ds.X[tr]), np.asarray(ds.y[tr])
+    Xva, yva = np.asarray(ds.X[va]), np.asarray(ds.y[va])
+    n_classes = len(ds.classes)
+
+    def _trial(params):
+        t0 = time.perf_counter()
+        clf = SVC(kernel="rbf", decision_function_shape="ovr", **params).fit(Xtr, ytr)
+        res = evaluate(clf, Xva, yva, n_classes)
+        res.update(params=params, seconds=time.perf_counter() - t0)
+        return res
+
+    trials = Parallel(n_jobs=n_jobs, prefer="processes")(delayed(_trial)(p) for p in _grid(grid))
+    trials.sort(key=lambda t: (t["log_loss"], -t["accuracy"]))
+    if debug:
+        for t in trials:
+            print(f"[svc] {t['params']} acc={t['accuracy']:.3f} ll={t['log_loss']:.3f} ({t['seconds']:.1f}s)")
+    best = trials[0]
+    full = np.arange(len(ds))
+    if len(full) > subsample:
+        full = np.sort(rng.choice(full, subsample, replace=False))
+    model = SVC(kernel="rbf", decision_function_shape="ovr", **best["params"]).fit(
+        np.asarray(ds.X[full]), np.asarray(ds.y[full]))
+    return model, best, trials
+
+# ---------- Persistencia ----------
+def save_model(model, ds: EncodedDataset, target: str, path_kind: str, best: dict,
+               out_dir: str = MODELS_DIR) -> str:
+    """Guarda el modelo como artefacto memory-mappable en out_dir/<target>/ (ver utils.model_artifact)."""
+    from utils.model_artifact import save_artifact
+    best = {k: v for k, v in best.items() if k != "seconds"}
+    return save_artifact(model, os.path.join(out_dir, target), {
+        "encoder": ds.encoder.to_dict(), "classes": ds.classes,
+        "target": target, "path": path_kind, "validation": best,
+    })
+
+def train(target: str, path_kind: str = "sgd", features_dir: str = feature_store.FEATURES_DIR,
+          ligas: Optional[Iterable[str]] = None, subsample: int = 20000, n_jobs: int = -1,
+          epochs: int = 5, cache_dir: str = CACHE_DIR, out_dir: str = MODELS_DIR, debug: bool = False) -> str:
+    paths = feature_store.list_shards(features_dir, ligas)
+    if not paths:
+        raise FileNotFoundError(f"No hay shards de features en {features_dir}")
+    ds = encode(paths, target, cache_dir, debug=debug)
+    if len(ds) == 0:
+        raise ValueError("Los shards no contienen partidos con resultado.")
+    if path_kind == "sgd":
+        model, best, _ = train_sgd(ds, epochs=epochs, n_jobs=n_jobs, debug=debug)
+    elif path_kind == "kernel":
+        model, best, _ = train_kernel(ds, subsample=subsample, n_jobs=n_jobs, debug=debug)
+    else:
+        raise ValueError("path_kind debe ser 'sgd' o 'kernel'.")
+    out = save_model(model, ds, target, path_kind, best, out_dir)
+    print(f"[train] {target}/{path_kind}: acc={best['accuracy']:.3f} log_loss={best['log_loss']:.3f} "
+          f"params={best['params']} -> {out}")
+    return out
@@ -0,0 +1,73 @@
+# utils/transfermarkt.py
+"""
+Valor de mercado de las plantillas por liga y temporada (Transfermarkt).
+
+La página de competición de una temporada lista todos sus clubes con el valor
+total de la plantilla:
+
+    https://www.transfermarkt.com/-/startseite/wettbewerb/ES1/plus/?saison_id=2024
+
+    rows = league_values("ES1", 2024)      # [("Real Madrid", "€1.34bn"), ("Sevilla FC", "€180.50m"), ...]
+
+Los importes se devuelven tal cual (texto); utils.get_team_value los convierte
+y construye data/team_values.csv con build_team_values (ver team_values.py).
+"""
+
+from __future__ import annotations
+
+import time
+from typing import Dict, List, Tuple
+
+import requests
+from bs4 import BeautifulSoup
+
+from utils import deadline, http_cache, metrics, offline, rate_limit
+
+BASE = "https://www.transfermarkt.com"
+# primera y segunda división de cada liga (README: clubes de 1ª/2ª/3ª)
+COMPETITIONS: Dict[str, List[str]] = {
+    "laliga": ["ES1", "ES2"],
+    "premier": ["GB1", "GB2"],
+    "seriea": ["IT1", "IT2"],
+    "bundesliga": ["L1", "L2"],
+    "ligue1": ["FR1", "FR2"],
+}
+
+def _headers():
+    return {
+        "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/124.0 Safari/537.36",
+        "Accept-Language": "en-US,en;q=0.9,es;q=0.8",
+    }
+
+def league_url(code: str, season: int) -> str:
+    return f"{BASE}/-/startseite/wettbewerb/{code}/plus/?saison_id={season}"
+
+def parse_league_page(html: str) -> List[Tuple[str, str]]:
+    """(club, valor total en texto) por fila de la tabla de clubes; filas sin valor se omiten."""
+    soup = BeautifulSoup(html, "html.parser")
+    out = []
+    for tr in soup.select("table.items > tbody > tr"):
+        link = tr.select_one("td.hauptlink a[title]")
+        values = tr.select("td.rechts")
+        if link is None or not values:
+            continue
+        raw = values[-1].get_text(strip=True)       # última columna: valor total de la plantilla
+        if raw and raw != "-":
+            out.append((link["title"].strip(), raw))
+    return out
+
+def league_values(code: str, season: int, debug: bool = False) -> List[Tuple[str, str]]:
+    url = league_url(code, season)
+    if offline.is_enabled():
+        resp = offline.cached_get(url, "transfermarkt", _headers())
+    else:
+        http_cache.ensure_installed()
+        rate_limit.acquire(url)
+        t0 = time.perf_counter()
+        resp = requests.get(url, headers=_headers(), timeout=deadline.timeout(30))
+        from_cache = http_cache.from_cache(resp, "transfermarkt")
+        metrics.record_request("transfermarkt", url, resp.status_code, time.perf_counter() - t0, from_cache=from_cache)
+        rate_limit.feedback(url, resp.status_code, resp.headers, from_cache=from_cache)
+    if debug: print(f"[TM] GET {resp.status_code} {url}")
+    resp.raise_for_status()
+    return parse_league_page(resp.text)
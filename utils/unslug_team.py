@@ -1,7 +1,9 @@
 # utils/team_aliases.py
 import json
 import os
-from typing import Optional, List
+import re
+import unicodedata
+from typing import Dict, List, Optional, Set
 
 def unslug_team(slug: str, json_path: str = "./data/team_aliases.json") -> Optional[str]:
     """
@@ -22,3 +24,38 @@ def unslug_team(slug: str, json_path: str = "./data/team_aliases.json") -> Optio
     if not aliases:
         return None
     return aliases[0]
+
+# ---------- Nombre canónico de club ----------
+# Tokens que no distinguen clubes ('FC Barcelona' == 'Barcelona', 'Pau FC' == 'Pau').
+CLUB_TOKENS = {"fc", "cf", "afc", "sc", "ac", "club"}
+_ALIAS_CLUBS: Dict[str, Dict[str, Set[str]]] = {}
+
+def club_key(name: str) -> str:
+    """Clave canónica de un nombre de club: sin acentos, signos ni tokens genéricos."""
+    s = unicodedata.normalize("NFKD", name or "")
+    s = "".join(c for c in s if not unicodedata.combining(c)).lower()
+    tokens = [t for t in re.split(r"[^a-z0-9]+", s) if t]
+    return "".join(t for t in tokens if t not in CLUB_TOKENS) or "".join(tokens)
+
+def _slug_clubs(json_path: str) -> Dict[str, Set[str]]:
+    """slug -> claves de club distintas que declara (más de una = slug ambiguo)."""
+    if json_path not in _ALIAS_CLUBS:
+        data = {}
+        if os.path.exists(json_path):
+            with open(json_path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        _ALIAS_CLUBS[json_path] = {slug.strip().lower(): {club_key(n) for n in names}
+                                   for slug, names in data.items()}
+    return _ALIAS_CLUBS[json_path]
+
+def canonical_team(name: str, json_path: str = "./data/team_aliases.json") -> Optional[str]:
+    """
+    Clave canónica de un equipo dado por nombre o por slug de team_aliases.
+    Un slug que el JSON asigna a varios clubes (p.ej. 'bre': Brentford, Brest,
+    Brescia) no identifica a ninguno: devuelve None.
+    """
+    raw = (name or "").strip()
+    clubs = _slug_clubs(json_path).get(raw.lower())
+    if clubs is not None:
+        return next(iter(clubs)) if len(clubs) == 1 else None
+    return club_key(raw) or None
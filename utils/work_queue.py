@@ -0,0 +1,273 @@
+# utils/work_queue.py
+"""
+Cola de trabajo compartida para minar con varios nodos (procesos o máquinas).
+
+Cada tarea es una (liga, temporada, jornada). La cola y el almacén de resultados
+viven en una base SQLite (./data/queue/mine.sqlite o CASANDRA_QUEUE_DB); varias
+máquinas pueden compartirla sobre un sistema de ficheros común, cada una con su
+propia IP y, por tanto, su propio presupuesto de rate limit.
+
+Modo de journal: utils.sqlite_journal (WAL en disco local, DELETE en un
+montaje de red). Se puede forzar solo para la cola con
+CASANDRA_QUEUE_JOURNAL=wal|delete. Aun así, los locks de NFS son la parte
+frágil: el montaje debe tenerlos activos (sin 'nolock').
+
+    q = WorkQueue()
+    q.enqueue(["laliga"], range(1995, 2025), range(1, 39))
+    task = q.lease("nodo-a")                 # None si no queda trabajo
+    ... q.heartbeat(task) cada LEASE_SECONDS / 3 mientras se mina ...
+    q.put_rows(task, rows); q.complete(task, n)   # o q.fail(task, error)
+
+Leases: una tarea tomada queda 'leased' hasta lease_until; el nodo la renueva
+con heartbeat(). Si el nodo muere, al expirar el lease otro nodo la retoma
+(attempts += 1); tras MAX_ATTEMPTS queda 'failed'. Un heartbeat que encuentra
+la tarea en manos de otro nodo devuelve False: el nodo debe abandonarla.
+
+Resultados: tabla 'rows' con clave (liga, temporada, Fecha, Local, Visitante);
+reescribir una fila (tarea reintentada) es idempotente. export_shards() vuelca
+las filas nuevas a los shards CSV de utils.feature_store.
+
+stats() da el rendimiento por nodo y agregado (tareas, partidos, partidos/min).
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import socket
+import sqlite3
+import threading
+import time
+from typing import Dict, Iterable, NamedTuple, Optional
+
+from utils import feature_store, metrics, sqlite_journal
+
+DB_PATH = os.environ.get("CASANDRA_QUEUE_DB", "./data/queue/mine.sqlite")
+LEASE_SECONDS = 600.0     # una jornada completa con FBref lento cabe de sobra
+MAX_ATTEMPTS = 3
+class Task(NamedTuple):
+    id: int
+    liga: str
+    temporada: int
+    jornada: int
+    node: str
+    attempt: int
+
+def default_node() -> str:
+    return f"{socket.gethostname()}-{os.getpid()}"
+
+def journal_mode(path: str) -> str:
+    return sqlite_journal.journal_mode(path, os.environ.get("CASANDRA_QUEUE_JOURNAL"))
+
+class WorkQueue:
+    def __init__(self, path: str = DB_PATH, lease_seconds: float = LEASE_SECONDS,
+                 max_attempts: int = MAX_ATTEMPTS) -> None:
+        self.path = path
+        self.lease_seconds = lease_seconds
+        self.max_attempts = max_attempts
+        self._local = threading.local()
+        self._conn()
+
+    # ---------- conexión ----------
+    def _conn(self) -> sqlite3.Connection:
+        c = getattr(self._local, "conn", None)
+        if c is None:
+            d = os.path.dirname(self.path)
+            if d:
+                os.makedirs(d, exist_ok=True)
+            c = sqlite3.connect(self.path, timeout=60, isolation_level=None)
+            c.execute(f"PRAGMA journal_mode={journal_mode(self.path)}")
+            c.execute("""CREATE TABLE IF NOT EXISTS tasks (
+                             id INTEGER PRIMARY KEY,
+                             liga TEXT NOT NULL, temporada INTEGER NOT NULL, jornada INTEGER NOT NULL,
+                             status TEXT NOT NULL DEFAULT 'pending',   -- pending|leased|done|failed
+                             attempts INTEGER NOT NULL DEFAULT 0,
+                             node TEXT, lease_until REAL NOT NULL DEFAULT 0,
+                             started REAL, finished REAL, matches INTEGER NOT NULL DEFAULT 0, error TEXT,
+                             UNIQUE (liga, temporada, jornada))""")
+            c.execute("""CREATE TABLE IF NOT EXISTS nodes (
+                             node TEXT PRIMARY KEY, first_seen REAL, last_seen REAL,
+                             tasks_done INTEGER NOT NULL DEFAULT 0, tasks_failed INTEGER NOT NULL DEFAULT 0,
+                             matches INTEGER NOT NULL DEFAULT 0, busy_seconds REAL NOT NULL DEFAULT 0)""")
+            c.execute("""CREATE TABLE IF NOT EXISTS rows (
+                             liga TEXT, temporada INTEGER, fecha TEXT, local TEXT, visitante TEXT,
+                             node TEXT, written REAL, exported INTEGER NOT NULL DEFAULT 0, data TEXT,
+                             PRIMARY KEY (liga, temporada, fecha, local, visitante))""")
+            self._local.conn = c
+        return c
+
+    def _tx(self):
+        return _Tx(self._conn())
+
+    def _touch_node(self, c: sqlite3.Connection, node: str, now: float, **add) -> None:
+        c.execute("INSERT OR IGNORE INTO nodes (node, first_seen, last_seen) VALUES (?,?,?)", (node, now, now))
+        sets = "".join(f", {k}={k}+?" for k in add)
+        c.execute(f"UPDATE nodes SET last_seen=?{sets} WHERE node=?", (now, *add.values(), node))
+
+    # ---------- productor ----------
+    def enqueue(self, ligas: Iterable[str], temporadas: Iterable[int], jornadas: Iterable[int]) -> int:
+        """Crea las tareas que no existan. Devuelve cuántas son nuevas."""
+        tasks = [(l, int(t), int(j)) for l in ligas for t in temporadas for j in jornadas]
+        with self._tx() as c:
+            before = c.execute("SELECT COUNT(*) FROM tasks").fetchone()[0]
+            c.executemany("INSERT OR IGNORE INTO tasks (liga, temporada, jornada) VALUES (?,?,?)", tasks)
+            after = c.execute("SELECT COUNT(*) FROM tasks").fetchone()[0]
+        return after - before
+
+    def retry_failed(self) -> int:
+        with self._tx() as c:
+            return c.execute("UPDATE tasks SET status='pending', attempts=0, error=NULL "
+                             "WHERE status='failed'").rowcount
+
+    # ---------- nodos ----------
+    def lease(self, node: str) -> Optional[Task]:
+        """Toma la siguiente tarea pendiente (o con lease expirado). None si no queda trabajo."""
+        now = time.time()
+        with self._tx() as c:
+            # leases expirados que ya agotaron intentos -> failed
+            c.execute("UPDATE tasks SET status='failed', error=COALESCE(error, 'lease expirado') "
+                      "WHERE status='leased' AND lease_until<? AND attempts>=?", (now, self.max_attempts))
+            row = c.execute("""SELECT id, liga, temporada, jornada, attempts, status FROM tasks
+                               WHERE status='pending' OR (status='leased' AND lease_until<?)
+                               ORDER BY liga, temporada, jornada LIMIT 1""", (now,)).fetchone()
+            if row is None:
+                return None
+            tid, liga, temporada, jornada, attempts, status = row
+            c.execute("UPDATE tasks SET status='leased', node=?, attempts=attempts+1, lease_until=?, started=? "
+                      "WHERE id=?", (node, now + self.lease_seconds, now, tid))
+            self._touch_node(c, node, now)
+        if status == "leased":
+            metrics.inc("queue_lease_expired_total", league=liga)
+        metrics.inc("queue_leases_total", node=node)
+        return Task(tid, liga, temporada, jornada, node, attempts + 1)
+
+    def heartbeat(self, task: Task) -> bool:
+        """Renueva el lease. False si la tarea ya no es de este nodo (expiró y otro la tomó)."""
+        now = time.time()
+        with self._tx() as c:
+            n = c.execute("UPDATE tasks SET lease_until=? WHERE id=? AND node=? AND status='leased' "
+                          "AND attempts=?", (now + self.lease_seconds, task.id, task.node, task.attempt)).rowcount
+            self._touch_node(c, task.node, now)
+        return n == 1
+
+    def _finish(self, task: Task, status: str, matches: int = 0, error: Optional[str] = None) -> bool:
+        now = time.time()
+        with self._tx() as c:
+            started = c.execute("SELECT started FROM tasks WHERE id=? AND node=? AND attempts=?",
+                                (task.id, task.node, task.attempt)).fetchone()
+            if started is None:
+                return False      # lease perdido: otro nodo la está haciendo
+            c.execute("UPDATE tasks SET status=?, finished=?, matches=?, error=?, lease_until=0 WHERE id=?",
+                      (status, now, matches, error, task.id))
+            busy = now - (started[0] or now)
+            if status == "done":
+                self._touch_node(c, task.node, now, tasks_done=1, matches=matches, busy_seconds=busy)
+            else:
+                self._touch_node(c, task.node, now, tasks_failed=1 if status == "failed" else 0,
+                                 busy_seconds=busy)
+        metrics.inc("queue_tasks_total", node=task.node, result=status)
+        return True
+
+    def complete(self, task: Task, matches: int) -> bool:
+        return self._finish(task, "done", matches)
+
+    def fail(self, task: Task, error: str) -> bool:
+        """Devuelve la tarea a 'pending' (o 'failed' si agotó los intentos)."""
+        status = "failed" if task.attempt >= self.max_attempts else "pending"
+        return self._finish(task, status, error=error[:500])
+
+    # ---------- almacén de resultados ----------
+    def done_keys(self, liga: str, temporada: int) -> set:
+        rows = self._conn().execute("SELECT fecha, local, visitante FROM rows WHERE liga=? AND temporada=?",
+                                    (liga, temporada)).fetchall()
+        return set(rows)
+
+    def put_row(self, task: Task, row: Dict) -> None:
+        with self._tx() as c:
+            c.execute("INSERT OR REPLACE INTO rows VALUES (?,?,?,?,?,?,?,0,?)",
+                      (task.liga, task.temporada, row["Fecha"], row["Local"], row["Visitante"],
+                       task.node, time.time(), json.dumps(row, ensure_ascii=False, default=str)))
+
+    def export_shards(self, root: str = feature_store.FEATURES_DIR) -> int:
+        """Añade a los shards CSV las filas aún no exportadas. Devuelve cuántas escribió."""
+        c = self._conn()
+        pending = c.execute("SELECT DISTINCT liga, temporada FROM rows WHERE exported=0").fetchall()
+        written = 0
+        for liga, temporada in pending:
+            path = feature_store.shard_path(liga, temporada, root)
+            done = feature_store.done_keys(path)
+            rows = c.execute("SELECT fecha, local, visitante, data FROM rows "
+                             "WHERE liga=? AND temporada=? AND exported=0 ORDER BY fecha", (liga, temporada)).fetchall()
+            with feature_store.ShardWriter(path) as w:
+                for fecha, local, visitante, data in rows:
+                    if (fecha, local, visitante) not in done:
+                        w.write(json.loads(data))
+                        written += 1
+            with self._tx() as tx:
+                tx.executemany("UPDATE rows SET exported=1 WHERE liga=? AND temporada=? AND fecha=? "
+                               "AND local=? AND visitante=?", [(liga, temporada, f, l, v) for f, l, v, _ in rows])
+        return written
+
+    # ---------- estado ----------
+    def stats(self) -> dict:
+        c = self._conn()
+        now = time.time()
+        status = dict(c.execute("SELECT status, COUNT(*) FROM tasks GROUP BY status").fetchall())
+        nodes = {}
+        for node, first, last, done, failed, matches, busy in c.execute(
+                "SELECT node, first_seen, last_seen, tasks_done, tasks_failed, matches, busy_seconds FROM nodes"):
+            span = max(last - first, 1e-9)
+            nodes[node] = {
+                "tasks_done": done, "tasks_failed": failed, "matches": matches,
+                "matches_per_min": round(60 * matches / span, 2) if matches else 0.0,
+                "busy_pct": round(100 * min(busy / span, 1.0), 1),
+                "idle_for_s": round(now - last, 1),
+            }
+        first, last, total = c.execute("SELECT MIN(started), MAX(finished), SUM(matches) FROM tasks "
+                                       "WHERE status='done'").fetchone()
+        agg = {"matches": total or 0, "matches_per_min": 0.0}
+        if total and last and first and last > first:
+            agg["matches_per_min"] = round(60 * total / (last - first), 2)
+        live = [n for n, v in nodes.items() if v["idle_for_s"] < self.lease_seconds]
+        return {"tasks": status, "nodes": nodes, "aggregate": {**agg, "live_nodes": len(live)},
+                "rows_pending_export": c.execute("SELECT COUNT(*) FROM rows WHERE exported=0").fetchone()[0]}
+
+class _Tx:
+    """BEGIN IMMEDIATE ... COMMIT/ROLLBACK (la conexión va en autocommit)."""
+
+    def __init__(self, c: sqlite3.Connection) -> None:
+        self.c = c
+
+    def __enter__(self) -> sqlite3.Connection:
+        self.c.execute("BEGIN IMMEDIATE")
+        return self.c
+
+    def __exit__(self, exc_type, *exc) -> None:
+        self.c.execute("ROLLBACK" if exc_type else "COMMIT")
+
+class Heartbeat:
+    """Hilo que renueva el lease de una tarea mientras dura el bloque 'with'."""
+
+    def __init__(self, queue: WorkQueue, task: Task, every: Optional[float] = None) -> None:
+        self.queue, self.task = queue, task
+        self.every = every or queue.lease_seconds / 3
+        self.lost = threading.Event()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._loop, name=f"heartbeat-{task.id}", daemon=True)
+
+    def _loop(self) -> None:
+        while not self._stop.wait(self.every):
+            try:
+                if not self.queue.heartbeat(self.task):
+                    self.lost.set()
+                    return
+            except sqlite3.Error as e:
+                print(f"[queue][heartbeat] {e}")
+
+    def __enter__(self) -> "Heartbeat":
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self._stop.set()
+        self._thread.join()